@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Benchmark import and CLI startup time.
+
+Short-lived workers and CLI invocations pay this cost on every spawn, so
+``import snapwright`` and ``snapwright --version`` must stay cheap and must
+not load Playwright. Each case runs in a fresh interpreter in an empty
+directory; the median wall time of several runs is reported.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 20 --max-ms 150
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CASES = {
+    "python (baseline)": ["-c", "pass"],
+    "import snapwright": ["-c", "import snapwright"],
+    "snapwright --version": ["-m", "snapwright.cli", "--version"],
+    "import snapwright.core (loads Playwright)": ["-c", "import snapwright.core"],
+}
+
+# Cases checked against --max-ms; the last one is for reference only
+GATED = ("import snapwright", "snapwright --version")
+
+
+def time_case(args, runs: int, cwd: str) -> float:
+    """Median milliseconds to run ``python <args>`` in a new process."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=cwd, check=True, capture_output=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Runs per case (default: 10)")
+    parser.add_argument(
+        "--max-ms",
+        type=float,
+        help="Fail if import or --version takes longer than this (ms)"
+    )
+    args = parser.parse_args()
+
+    failed = []
+    with tempfile.TemporaryDirectory() as cwd:
+        for name, case in CASES.items():
+            median = time_case(case, args.runs, cwd)
+            print(f"{name:45} {median:8.1f} ms")
+            if args.max_ms is not None and name in GATED and median > args.max_ms:
+                failed.append(name)
+
+        # Importing must not touch the working directory (no cache_dir)
+        subprocess.run([sys.executable, "-c", "import snapwright"], cwd=cwd, check=True)
+        if os.listdir(cwd):
+            failed.append("import snapwright created files")
+
+    if failed:
+        print(f"FAILED: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -49,6 +49,11 @@ def example_cache_management():
     for url in urls:
         capture_screenshot(url, use_cache=True)
     
+    # Measure how much work the cache saved in this process
+    stats = screenshot_cache.get_cache_stats()
+    print(f"   - Hit rate: {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses)")
+    print(f"   - Capture time saved: {stats['seconds_saved']:.1f}s")
+    
     # Clean up old cache entries
     screenshot_cache.cleanup_old_cache()
     print("   Cleaned up old cache entries")
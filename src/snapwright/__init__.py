@@ -5,31 +5,85 @@ Basic usage:
     from snapwright import screenshot
     
     path = screenshot("https://example.com")
+
+Importing the package is cheap and has no side effects: each name below is
+imported from its module on first access, so Playwright, the cache index
+and the browser manager are only loaded when used.
 """
 
-from .core import (
-    screenshot,
-    capture_screenshot,
-    browse_and_extract,
-    batch_screenshots,
-)
-from .browser_manager import BrowserManager, browser_manager
-from .cache import ScreenshotCache, screenshot_cache
-from .config import BrowserConfig, browser_config, set_config
-from .exceptions import BrowserError, TimeoutError, NavigationError
+import importlib
+from typing import Any, List, TYPE_CHECKING
 
 __version__ = "0.1.0"
 
+# Public name -> module it lives in
+_EXPORTS = {
+    "screenshot": ".core",
+    "capture_screenshot": ".core",
+    "capture_screenshot_bytes": ".core",
+    "browse_and_extract": ".core",
+    "batch_screenshots": ".core",
+    "batch_extract": ".batch",
+    "parallel_batch_screenshots": ".parallel",
+    "BrowserActorPool": ".actor",
+    "BrowserManager": ".browser_manager",
+    "browser_manager": ".browser_manager",
+    "ScreenshotCache": ".cache",
+    "screenshot_cache": ".cache",
+    "BrowserConfig": ".config",
+    "browser_config": ".config",
+    "set_config": ".config",
+    "canonicalize_url": ".urls",
+    "BrowserError": ".exceptions",
+    "TimeoutError": ".exceptions",
+    "NavigationError": ".exceptions",
+}
+
+if TYPE_CHECKING:
+    from .core import (
+        screenshot,
+        capture_screenshot,
+        capture_screenshot_bytes,
+        browse_and_extract,
+        batch_screenshots,
+    )
+    from .batch import batch_extract
+    from .parallel import parallel_batch_screenshots
+    from .actor import BrowserActorPool
+    from .browser_manager import BrowserManager, browser_manager
+    from .cache import ScreenshotCache, screenshot_cache
+    from .config import BrowserConfig, browser_config, set_config
+    from .urls import canonicalize_url
+    from .exceptions import BrowserError, TimeoutError, NavigationError
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value  # Later lookups skip this hook
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(_EXPORTS))
+
+
 __all__ = [
     # Main functions
     "screenshot",
     "capture_screenshot",
+    "capture_screenshot_bytes",
     "browse_and_extract",
     "batch_screenshots",
+    "batch_extract",
+    "parallel_batch_screenshots",
     
     # Managers
     "BrowserManager",
     "browser_manager",
+    "BrowserActorPool",
     "ScreenshotCache",
     "screenshot_cache",
     
@@ -37,9 +91,10 @@ __all__ = [
     "BrowserConfig",
     "browser_config",
     "set_config",
+    "canonicalize_url",
     
     # Exceptions
     "BrowserError",
     "TimeoutError",
     "NavigationError",
-]
\ No newline at end of file
+]
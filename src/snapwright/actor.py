@@ -0,0 +1,150 @@
+"""Thread-safe capture API backed by browser-owning actor threads.
+
+Sync Playwright objects may only be used from the thread that created them.
+``BrowserActorPool`` runs one or more threads that each own a private
+``BrowserManager``; any thread can submit jobs and gets a ``Future`` back.
+
+Usage:
+    from snapwright import BrowserActorPool
+
+    with BrowserActorPool(threads=4) as pool:
+        future = pool.submit_capture("https://example.com")
+        path = future.result()
+"""
+
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, List
+
+from .browser_manager import BrowserManager
+from .config import browser_config
+from .core import capture_screenshot, capture_screenshot_bytes, browse_and_extract
+from .exceptions import BrowserError
+from .extract import SelectorSpec
+
+logger = logging.getLogger(__name__)
+
+# Sentinel that tells an actor thread to shut down
+_STOP = object()
+
+
+class BrowserActorPool:
+    """Pool of threads that each own a browser and consume capture jobs."""
+
+    def __init__(self, threads: Optional[int] = None, max_queue: int = 0) -> None:
+        """
+        Args:
+            threads: Number of browser-owning threads (default: browser_config.actor_threads)
+            max_queue: Maximum pending jobs; submit blocks when full (0 = unbounded)
+        """
+        self._jobs: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._shutdown = False
+        self._shutdown_lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+        for i in range(threads or browser_config.actor_threads):
+            thread = threading.Thread(
+                target=self._run,
+                name=f"snapwright-actor-{i}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def __enter__(self) -> "BrowserActorPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+
+    @property
+    def size(self) -> int:
+        """Number of browser-owning threads."""
+        return len(self._threads)
+
+    def _run(self) -> None:
+        """Actor loop: own a browser and run jobs against it until stopped."""
+        manager = BrowserManager(shared=False)
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is _STOP:
+                    break
+
+                future, func, args, kwargs = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                try:
+                    future.set_result(func(*args, manager=manager, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            manager.cleanup()
+
+    def submit(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """
+        Run ``func(*args, manager=<actor's manager>, **kwargs)`` on an actor thread.
+
+        Returns:
+            Future resolving to the function's return value
+        """
+        with self._shutdown_lock:
+            if self._shutdown:
+                raise BrowserError("Cannot submit to a pool that has been shut down")
+
+            future: Future = Future()
+            self._jobs.put((future, func, args, kwargs))
+            return future
+
+    def submit_capture(self, url: str, **kwargs: Any) -> "Future[Optional[Path]]":
+        """Submit a ``capture_screenshot`` job; kwargs are passed through."""
+        return self.submit(capture_screenshot, url, **kwargs)
+
+    def submit_capture_bytes(self, url: str, **kwargs: Any) -> "Future[Optional[bytes]]":
+        """Submit a ``capture_screenshot_bytes`` job; kwargs are passed through."""
+        return self.submit(capture_screenshot_bytes, url, **kwargs)
+
+    def submit_extract(
+        self,
+        url: str,
+        extract_selectors: Dict[str, SelectorSpec],
+        **kwargs: Any
+    ) -> "Future[Dict[str, Any]]":
+        """Submit a ``browse_and_extract`` job; kwargs are passed through."""
+        return self.submit(browse_and_extract, url, extract_selectors, **kwargs)
+
+    def capture_screenshot(self, url: str, **kwargs: Any) -> Optional[Path]:
+        """Capture a screenshot on an actor thread and wait for the result."""
+        return self.submit_capture(url, **kwargs).result()
+
+    def browse_and_extract(
+        self,
+        url: str,
+        extract_selectors: Dict[str, SelectorSpec],
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Browse and extract on an actor thread and wait for the result."""
+        return self.submit_extract(url, extract_selectors, **kwargs).result()
+
+    def prewarm(self) -> None:
+        """Launch every actor's browser and fill its page pool, blocking until done."""
+        warmups = [self.submit(lambda manager: manager.prewarm()) for _ in self._threads]
+        for warmup in warmups:
+            warmup.result()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs, finish queued ones and close the browsers."""
+        with self._shutdown_lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            for _ in self._threads:
+                self._jobs.put(_STOP)
+
+        if wait:
+            for thread in self._threads:
+                thread.join()
@@ -0,0 +1,571 @@
+"""Asyncio engine for concurrent screenshots.
+
+Usage:
+    import asyncio
+    from snapwright import aio
+
+    results = asyncio.run(aio.batch_screenshots(urls, concurrency=8))
+
+    async for result in aio.batch_extract(urls, {"title": "h1"}, concurrency=8):
+        print(result['url'], result['extracted']['title'])
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from itertools import islice
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Union, List, AsyncGenerator, AsyncIterator, Iterable, Callable, TypeVar
+
+from playwright.async_api import (
+    Browser, BrowserContext, Page, Playwright, Response, async_playwright, Error as PlaywrightError
+)
+
+from .browser_manager import EmulationProfile
+from .cache import screenshot_cache, detach_output
+from .extract import SelectorSpec, compile_selectors, extract_values_async, merge_extracted
+from .refresh import schedule_refresh
+from .responses import ResponseCapture, ResponsePattern
+from .revalidate import document_validators
+from .static import extract_static
+from .urls import dedupe_urls
+from .config import browser_config
+from .core import _cache_options, _cached_failure, _extract_result, _failure_options
+from .exceptions import (
+    BrowserError, TimeoutError, NavigationError,
+    ElementNotFoundError, ScreenshotError
+)
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+
+async def _offload(func: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:
+    """Run a blocking cache call in the default executor, off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+class AsyncBrowserManager:
+    """
+    Manages one async browser and its contexts.
+
+    Unlike the sync ``BrowserManager`` this is not a singleton: async
+    Playwright objects are bound to the event loop that created them, so
+    create one manager per loop and close it when done.
+
+    Example:
+        async with AsyncBrowserManager() as manager:
+            await capture_screenshot("https://example.com", manager=manager)
+    """
+
+    def __init__(self) -> None:
+        self.playwright: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self._profile_contexts: Dict[EmulationProfile, List[BrowserContext]] = {}
+        self._in_flight: Dict[BrowserContext, int] = {}
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "AsyncBrowserManager":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def get_browser(self) -> Browser:
+        """Get or create browser instance."""
+        async with self._lock:
+            if not self.browser:
+                logger.info("Starting async Playwright browser")
+                try:
+                    self.playwright = await async_playwright().start()
+                    self.browser = await self.playwright.chromium.launch(
+                        headless=browser_config.headless,
+                        args=browser_config.browser_args
+                    )
+                except PlaywrightError as e:
+                    raise BrowserError(f"Failed to launch browser: {e}")
+        return self.browser
+
+    @property
+    def contexts(self) -> List[BrowserContext]:
+        """All open contexts across emulation profiles."""
+        return [ctx for contexts in self._profile_contexts.values() for ctx in contexts]
+
+    async def resolve_profile(
+        self, mobile: bool = False, device_name: Optional[str] = None
+    ) -> EmulationProfile:
+        """Map capture options to an emulation profile (see ``BrowserManager.resolve_profile``)."""
+        if device_name:
+            await self.get_browser()
+            devices = self.playwright.devices if self.playwright else {}
+            if device_name in devices:
+                return EmulationProfile.from_device(devices[device_name])
+            logger.warning(f"Unknown device '{device_name}', using generic mobile profile")
+            return EmulationProfile.generic_mobile()
+        if mobile:
+            return EmulationProfile.generic_mobile()
+        return EmulationProfile.desktop()
+
+    async def _acquire_context(self, profile: EmulationProfile) -> BrowserContext:
+        """Reserve the least busy context for ``profile``, creating one if under the limit."""
+        browser = await self.get_browser()
+
+        async with self._lock:
+            contexts = self._profile_contexts.setdefault(profile, [])
+            idle = [ctx for ctx in contexts if self._in_flight[ctx] == 0]
+            if idle:
+                context = idle[0]
+            elif len(contexts) < browser_config.max_contexts:
+                context = await browser.new_context(
+                    ignore_https_errors=browser_config.ignore_https_errors,
+                    accept_downloads=True,
+                    timezone_id='America/New_York',
+                    permissions=['geolocation'],
+                    geolocation={'latitude': 40.7128, 'longitude': -74.0060},
+                    **profile.context_options()
+                )
+                contexts.append(context)
+                self._in_flight[context] = 0
+                logger.debug(f"Created new async browser context (total: {len(self.contexts)})")
+            else:
+                context = min(contexts, key=lambda c: self._in_flight[c])
+
+            self._in_flight[context] += 1
+            return context
+
+    @asynccontextmanager
+    async def page(self, profile: Optional[EmulationProfile] = None) -> AsyncIterator[Page]:
+        """Open a page on the least busy context of ``profile`` and close it afterwards."""
+        context = await self._acquire_context(profile or EmulationProfile.desktop())
+        page = None
+        try:
+            page = await context.new_page()
+            yield page
+        finally:
+            if page:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            if context in self._in_flight:  # Gone if the manager was closed meanwhile
+                self._in_flight[context] -= 1
+
+    async def close(self) -> None:
+        """Close all contexts, the browser and Playwright."""
+        for context in self.contexts:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.warning(f"Error closing context: {e}")
+
+        if self.browser:
+            try:
+                await self.browser.close()
+            except Exception as e:
+                logger.warning(f"Error closing browser: {e}")
+
+        if self.playwright:
+            try:
+                await self.playwright.stop()
+            except Exception as e:
+                logger.warning(f"Error stopping playwright: {e}")
+
+        self._profile_contexts.clear()
+        self._in_flight.clear()
+        self.browser = None
+        self.playwright = None
+
+
+async def capture_screenshot(
+    url: str,
+    output_path: Optional[Union[str, Path]] = None,
+    full_page: bool = True,
+    selector: Optional[str] = None,
+    wait_for: Optional[Union[str, List[str]]] = None,
+    wait_timeout: int = 5000,
+    use_cache: bool = True,
+    extra_wait: int = 0,
+    mobile: bool = False,
+    device_name: Optional[str] = None,
+    manager: Optional[AsyncBrowserManager] = None,
+) -> Optional[Path]:
+    """
+    Async counterpart of ``snapwright.capture_screenshot``.
+
+    Takes the same arguments and shares the same cache. Pass ``manager`` to
+    reuse a browser across calls; otherwise a browser is launched and closed
+    for this capture alone.
+
+    Returns:
+        Path to screenshot file, or None if failed
+    """
+    # Check cache first
+    cache_options = _cache_options(full_page, selector, mobile, device_name)
+    failure_options = _failure_options(cache_options, wait_for, wait_timeout, extra_wait)
+
+    if use_cache:
+        entry = await _offload(screenshot_cache.lookup, url, cache_options, failure_options=failure_options)
+        if entry is None and browser_config.cache_revalidate:
+            entry = await _offload(screenshot_cache.revalidate, url, cache_options)
+        if entry and entry.error:
+            _cached_failure(url, entry)
+            return None
+        if entry:
+            logger.info(f"Using {'stale ' if entry.stale else ''}cached screenshot for {url}")
+            if entry.refresh:
+                schedule_refresh(
+                    url, cache_options,
+                    wait_for=wait_for, wait_timeout=wait_timeout, extra_wait=extra_wait
+                )
+            if output_path and str(entry.path) != str(output_path):
+                return await _offload(screenshot_cache.deliver, entry.path, output_path)
+            return entry.path
+
+    # Generate output path if not provided
+    if output_path is None:
+        timestamp = int(time.time())
+        output_path = Path(browser_config.default_output_dir) / f"screenshot_{timestamp}.png"
+    else:
+        output_path = Path(output_path)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    # Never render into a file hardlinked to a cached copy
+    await _offload(detach_output, output_path)
+
+    if manager is None:
+        async with AsyncBrowserManager() as own_manager:
+            return await _capture(
+                own_manager, url, output_path, full_page, selector, wait_for,
+                wait_timeout, use_cache, extra_wait, mobile, device_name, cache_options,
+                failure_options
+            )
+    return await _capture(
+        manager, url, output_path, full_page, selector, wait_for,
+        wait_timeout, use_cache, extra_wait, mobile, device_name, cache_options,
+        failure_options
+    )
+
+
+async def _response_validators(response: Optional[Response]) -> Dict[str, str]:
+    """Revalidation validators of a main document response, if any."""
+    if response is None:
+        return {}
+    try:
+        body = await response.body()
+    except Exception:
+        body = None  # Redirected or bodiless documents only keep their headers
+    try:
+        return document_validators(response.headers, body)
+    except Exception:
+        return {}
+
+
+async def _capture(
+    manager: AsyncBrowserManager,
+    url: str,
+    output_path: Path,
+    full_page: bool,
+    selector: Optional[str],
+    wait_for: Optional[Union[str, List[str]]],
+    wait_timeout: int,
+    use_cache: bool,
+    extra_wait: int,
+    mobile: bool,
+    device_name: Optional[str],
+    cache_options: Dict[str, Any],
+    failure_options: Dict[str, Any],
+) -> Optional[Path]:
+    """Render ``url`` into ``output_path`` with retries."""
+    started = time.monotonic()
+    for attempt in range(browser_config.max_retries):
+        try:
+            profile = await manager.resolve_profile(mobile, device_name)
+            async with manager.page(profile) as page:
+                # Navigate to URL
+                logger.info(f"Navigating to {url}")
+                try:
+                    response = await page.goto(
+                        url, wait_until=browser_config.wait_until, timeout=browser_config.timeout
+                    )
+                except PlaywrightError as e:
+                    raise NavigationError(f"Failed to navigate to {url}: {e}")
+                validators = await _response_validators(response)
+
+                # Wait for specific element(s) if requested
+                if wait_for:
+                    wait_selectors = [wait_for] if isinstance(wait_for, str) else wait_for
+                    for wait_selector in wait_selectors:
+                        logger.info(f"Waiting for selector: {wait_selector}")
+                        try:
+                            await page.wait_for_selector(wait_selector, timeout=wait_timeout)
+                        except PlaywrightError:
+                            raise TimeoutError(f"Timeout waiting for selector: {wait_selector}")
+
+                # Extra wait if needed
+                if extra_wait > 0:
+                    await page.wait_for_timeout(extra_wait)
+
+                # Take screenshot
+                try:
+                    if selector:
+                        element = await page.query_selector(selector)
+                        if element:
+                            await element.screenshot(path=str(output_path))
+                        else:
+                            raise ElementNotFoundError(f"Selector '{selector}' not found")
+                    else:
+                        await page.screenshot(path=str(output_path), full_page=full_page)
+                except PlaywrightError as e:
+                    raise ScreenshotError(f"Failed to capture screenshot: {e}")
+
+            logger.info(f"Screenshot saved to {output_path}")
+
+            # Save to cache
+            if use_cache:
+                await _offload(
+                    screenshot_cache.save_to_cache, url, output_path, cache_options,
+                    cost=time.monotonic() - started, validators=validators
+                )
+
+            return output_path
+
+        except BrowserError as e:
+            # Re-raise our custom exceptions
+            if use_cache:
+                await _offload(
+                    screenshot_cache.record_failure, url, failure_options, type(e).__name__, str(e),
+                    image_options=cache_options
+                )
+            raise
+        except Exception as e:
+            logger.warning(f"Screenshot attempt {attempt + 1} failed: {e}")
+            if attempt == browser_config.max_retries - 1:
+                message = f"Failed to capture screenshot after {browser_config.max_retries} attempts"
+                logger.error(message)
+                if use_cache:
+                    await _offload(
+                        screenshot_cache.record_failure, url, failure_options, "CaptureFailed", f"{message}: {e}",
+                        image_options=cache_options
+                    )
+                return None
+
+    return None
+
+
+async def batch_screenshots(
+    urls: List[str],
+    output_dir: Optional[Union[str, Path]] = None,
+    full_page: bool = True,
+    use_cache: bool = True,
+    concurrency: Optional[int] = None,
+    name_prefix: str = "screenshot",
+    manager: Optional[AsyncBrowserManager] = None,
+) -> Dict[str, Optional[Path]]:
+    """
+    Capture screenshots of multiple URLs concurrently.
+
+    Up to ``concurrency`` pages are kept in flight, spread over
+    ``browser_config.max_contexts`` contexts. A URL that fails maps to None
+    instead of aborting the rest of the batch. URLs that canonicalize to the
+    same page are captured once, from the first of them as given, and share
+    a screenshot.
+
+    Args:
+        urls: List of URLs to capture
+        output_dir: Directory for screenshots
+        full_page: Capture full page for all
+        use_cache: Use cache if available
+        concurrency: Pages in flight (default: browser_config.max_concurrency)
+        name_prefix: Prefix for generated filenames
+        manager: Browser manager to use (a temporary one if None)
+
+    Returns:
+        Dict mapping URLs to screenshot paths
+    """
+    if manager is None:
+        async with AsyncBrowserManager() as own_manager:
+            return await batch_screenshots(
+                urls, output_dir, full_page, use_cache, concurrency, name_prefix,
+                manager=own_manager
+            )
+
+    if output_dir is None:
+        output_dir = Path(browser_config.default_output_dir) / f"batch_{int(time.time())}"
+    else:
+        output_dir = Path(output_dir)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    semaphore = asyncio.Semaphore(concurrency or browser_config.max_concurrency)
+    results: Dict[str, Optional[Path]] = {url: None for url in urls}
+    groups = dedupe_urls(urls)
+
+    async def capture_one(i: int, inputs: List[str]) -> None:
+        # Dedupe on the canonical form but load the URL as given
+        url = inputs[0]
+        filename = f"{name_prefix}_{i:03d}_{int(time.time())}.png"
+        async with semaphore:
+            logger.info(f"Capturing {i+1}/{len(groups)}: {url}")
+            try:
+                path = await capture_screenshot(
+                    url,
+                    output_path=output_dir / filename,
+                    full_page=full_page,
+                    use_cache=use_cache,
+                    manager=manager
+                )
+            except Exception as e:
+                # A failure of any kind only costs this URL its screenshot
+                logger.error(f"Failed to capture {url}: {e}")
+                return
+        for original in inputs:
+            results[original] = path
+
+    await asyncio.gather(*(
+        capture_one(i, inputs) for i, inputs in enumerate(groups.values())
+    ))
+
+    return results
+
+
+async def browse_and_extract(
+    url: str,
+    extract_selectors: Dict[str, SelectorSpec],
+    screenshot: bool = False,
+    screenshot_path: Optional[Path] = None,
+    wait_for: Optional[str] = None,
+    wait_timeout: int = 5000,
+    manager: Optional[AsyncBrowserManager] = None,
+    static: Optional[bool] = None,
+    capture_responses: Optional[Dict[str, ResponsePattern]] = None,
+) -> Dict[str, Any]:
+    """
+    Async counterpart of ``snapwright.browse_and_extract``.
+
+    Takes the same arguments and returns the same result dict. Pass
+    ``manager`` to reuse a browser across calls; otherwise a browser is
+    launched and closed for this extraction alone.
+    """
+    result = _extract_result(url)
+
+    if static is None:
+        static = browser_config.static_extract
+    if static and not screenshot and not capture_responses:
+        extracted = await _offload(extract_static, url, extract_selectors, wait_for=wait_for)
+        if extracted is not None:
+            result['extracted'] = extracted
+            result['engine'] = 'static'
+            return result
+
+    if manager is None:
+        async with AsyncBrowserManager() as own_manager:
+            # static=False: the static path has already been tried
+            return await browse_and_extract(
+                url, extract_selectors, screenshot, screenshot_path, wait_for, wait_timeout,
+                manager=own_manager, static=False, capture_responses=capture_responses
+            )
+
+    try:
+        wait_until = browser_config.wait_until
+        capture = None
+        if capture_responses:
+            capture = ResponseCapture(capture_responses)
+            if not (extract_selectors or screenshot or wait_for):
+                # Only responses wanted: they are awaited below, not the render
+                wait_until = "commit"
+
+        async with manager.page() as page:
+            if capture:
+                page.on("response", capture.on_response)
+
+            await page.goto(url, wait_until=wait_until, timeout=browser_config.timeout)
+
+            if capture:
+                await capture.wait_async(page, wait_timeout)
+
+            if wait_for:
+                await page.wait_for_selector(wait_for, timeout=wait_timeout)
+
+            specs, errors = compile_selectors(extract_selectors)
+            values = await extract_values_async(page, specs) if specs else {}
+            result['extracted'] = merge_extracted(extract_selectors, values, errors)
+
+            if screenshot:
+                if not screenshot_path:
+                    screenshot_path = Path(browser_config.default_output_dir) / f"browse_{int(time.time())}.png"
+                await page.screenshot(path=str(screenshot_path), full_page=True)
+                result['screenshot'] = str(screenshot_path)
+
+            if capture:
+                result['responses'] = await capture.bodies_async()
+
+    except Exception as e:
+        result['error'] = str(e)
+        logger.error(f"Browse and extract failed: {e}")
+
+    return result
+
+
+async def batch_extract(
+    urls: Iterable[str],
+    extract_selectors: Dict[str, SelectorSpec],
+    concurrency: Optional[int] = None,
+    manager: Optional[AsyncBrowserManager] = None,
+    **kwargs: Any
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Extract data from many URLs concurrently, yielding results as they complete.
+
+    Up to ``concurrency`` pages of one browser are in flight at a time and
+    URLs are read lazily, so memory stays flat however long the input is.
+    Results come in completion order; each carries its ``url``. Closing the
+    generator early cancels the pages still in flight.
+
+    Args:
+        urls: URLs to extract from; any iterable
+        extract_selectors: Selector specs, as for ``browse_and_extract``
+        concurrency: Pages in flight (default: browser_config.max_concurrency)
+        manager: Browser manager to use (a temporary one if None)
+        **kwargs: Passed through to ``browse_and_extract`` (wait_for, static, ...)
+
+    Yields:
+        ``browse_and_extract`` result dicts
+    """
+    async with AsyncExitStack() as stack:
+        if manager is None:
+            manager = await stack.enter_async_context(AsyncBrowserManager())
+
+        url_iter = iter(urls)
+        window = concurrency or browser_config.max_concurrency
+        pending: Dict[asyncio.Task, str] = {}
+
+        def start(url: str) -> None:
+            task = asyncio.ensure_future(browse_and_extract(url, extract_selectors, manager=manager, **kwargs))
+            pending[task] = url
+
+        try:
+            for url in islice(url_iter, window):
+                start(url)
+
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        logger.error(f"Extraction of {url} failed: {e}")
+                        result = _extract_result(url, str(e))
+                    yield result
+
+                    # Refill the window as results are handed out
+                    for next_url in islice(url_iter, 1):
+                        start(next_url)
+        finally:
+            for task in pending:
+                task.cancel()
+            # Let cancelled pages close before the browser does
+            await asyncio.gather(*pending, return_exceptions=True)
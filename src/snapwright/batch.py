@@ -0,0 +1,80 @@
+"""Streaming batch extraction over one browser.
+
+``batch_extract`` runs ``browse_and_extract`` for many URLs as concurrent
+pages of a single browser (``snapwright.aio``) and yields each result as
+soon as it is ready. Only a bounded window of URLs is in flight at a time
+and finished results are not kept, so memory stays flat however long the
+input is; with ``output`` every result is also written to a JSONL file as
+it arrives.
+
+Usage:
+    from snapwright import batch_extract
+
+    for result in batch_extract(urls, {"title": "h1"}, concurrency=8, output="titles.jsonl"):
+        print(result['url'], result['extracted'].get('title'))
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterable, Iterator, Union, TextIO
+
+from . import aio
+from .extract import SelectorSpec
+
+logger = logging.getLogger(__name__)
+
+
+def batch_extract(
+    urls: Iterable[str],
+    extract_selectors: Dict[str, SelectorSpec],
+    concurrency: Optional[int] = None,
+    output: Optional[Union[str, Path, TextIO]] = None,
+    **kwargs: Any
+) -> Iterator[Dict[str, Any]]:
+    """
+    Extract data from many URLs in parallel, yielding results as they complete.
+
+    Pages run concurrently in one browser, on an event loop private to this
+    generator; from async code use ``snapwright.aio.batch_extract`` instead.
+    Results come in completion order, not input order; each carries its
+    ``url``. Work only progresses while the generator is consumed, so to
+    just write a file run it to the end (``for _ in batch_extract(...): pass``).
+    Closing the generator early cancels the pages still in flight.
+
+    Args:
+        urls: URLs to extract from; any iterable, read lazily
+        extract_selectors: Selector specs, as for ``browse_and_extract``
+        concurrency: Pages in flight (default: browser_config.max_concurrency)
+        output: JSONL file path or open text file to write each result to
+        **kwargs: Passed through to ``browse_and_extract`` (wait_for, static, ...)
+
+    Yields:
+        ``browse_and_extract`` result dicts
+    """
+    loop = asyncio.new_event_loop()
+    results = aio.batch_extract(urls, extract_selectors, concurrency=concurrency, **kwargs)
+    with ExitStack() as stack:
+        if isinstance(output, (str, Path)):
+            output = stack.enter_context(open(output, "w", encoding="utf-8"))
+
+        try:
+            done_count = 0
+            while True:
+                try:
+                    result = loop.run_until_complete(results.__anext__())
+                except StopAsyncIteration:
+                    break
+                if output is not None:
+                    output.write(json.dumps(result, default=str, ensure_ascii=False) + "\n")
+                    output.flush()
+                done_count += 1
+                yield result
+
+            logger.info(f"Batch extraction finished: {done_count} URLs")
+        finally:
+            # Cancels pages still in flight and closes the browser
+            loop.run_until_complete(results.aclose())
+            loop.close()
@@ -2,24 +2,122 @@
 
 import atexit
 import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from threading import Lock
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Set
 
-from playwright.sync_api import Browser, BrowserContext, Playwright, sync_playwright, Error
+from playwright.sync_api import Browser, BrowserContext, Page, Playwright, sync_playwright, Error
 
 from .config import browser_config
 from .exceptions import BrowserError
+from .memory import process_tree_memory
 
 logger = logging.getLogger(__name__)
 
 
+def _playwright_driver_pid(playwright: Playwright) -> Optional[int]:
+    """PID of the driver process behind a Playwright instance, if it can be found."""
+    try:
+        # Not public API; without it the memory watchdog stays idle
+        pid: int = playwright._impl_obj._connection._transport._proc.pid
+        return pid
+    except AttributeError:
+        logger.debug("Playwright driver PID unavailable; memory sampling disabled")
+        return None
+
+
+@dataclass(frozen=True)
+class EmulationProfile:
+    """Context-level emulation settings; contexts are pooled per profile."""
+    
+    viewport_width: int
+    viewport_height: int
+    device_scale_factor: float = 1.0
+    is_mobile: bool = False
+    has_touch: bool = False
+    locale: str = 'en-US'
+    user_agent: Optional[str] = None
+    
+    @classmethod
+    def desktop(cls) -> "EmulationProfile":
+        """Default desktop profile from the configured viewport."""
+        return cls(browser_config.viewport_width, browser_config.viewport_height)
+    
+    @classmethod
+    def generic_mobile(cls) -> "EmulationProfile":
+        """Fallback phone profile for ``mobile=True`` without a device name."""
+        return cls(375, 667, device_scale_factor=2, is_mobile=True, has_touch=True)
+    
+    @classmethod
+    def from_device(cls, descriptor: Dict[str, Any]) -> "EmulationProfile":
+        """Build a profile from a Playwright ``devices`` registry entry."""
+        viewport = descriptor['viewport']
+        return cls(
+            viewport['width'],
+            viewport['height'],
+            device_scale_factor=descriptor.get('device_scale_factor', 1.0),
+            is_mobile=descriptor.get('is_mobile', False),
+            has_touch=descriptor.get('has_touch', False),
+            user_agent=descriptor.get('user_agent'),
+        )
+    
+    def context_options(self) -> Dict[str, Any]:
+        """Keyword arguments for ``browser.new_context``."""
+        options = {
+            'viewport': {'width': self.viewport_width, 'height': self.viewport_height},
+            'device_scale_factor': self.device_scale_factor,
+            'is_mobile': self.is_mobile,
+            'has_touch': self.has_touch,
+            'locale': self.locale,
+        }
+        if self.user_agent:
+            options['user_agent'] = self.user_agent
+        return options
+
+
+@dataclass
+class _ManagedContext:
+    """Lifecycle bookkeeping for one browser context."""
+    
+    context: BrowserContext
+    profile: EmulationProfile
+    browser: Optional[Browser] = None
+    created_at: float = field(default_factory=time.monotonic)
+    uses: int = 0  # Pages checked out over the context's lifetime
+    busy: int = 0  # Pages currently checked out
+    retiring: bool = False  # Closed once its busy pages come back
+    idle_pages: List[Page] = field(default_factory=list)
+    
+    @property
+    def state(self) -> str:
+        return "busy" if self.busy else "idle"
+    
+    def expired(self) -> bool:
+        """Whether the context has reached its max age or max uses."""
+        max_age = browser_config.context_max_age
+        max_uses = browser_config.context_max_uses
+        return bool(
+            (max_age and time.monotonic() - self.created_at >= max_age)
+            or (max_uses and self.uses >= max_uses)
+        )
+
+
 class BrowserManager:
     """Manages a single browser instance with multiple contexts."""
     
     _instance: Optional["BrowserManager"] = None
     _lock = Lock()
+    _initialized: bool
     
-    def __new__(cls):
+    def __new__(cls, shared: bool = True) -> "BrowserManager":
+        if not shared:
+            # Private instance, e.g. one per browser-owning thread
+            instance = super().__new__(cls)
+            instance._initialized = False
+            return instance
+        
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
@@ -27,81 +125,515 @@ class BrowserManager:
                     cls._instance._initialized = False
         return cls._instance
     
-    def __init__(self):
+    def __init__(self, shared: bool = True):
+        """
+        Args:
+            shared: Return the process-wide singleton (True) or a private
+                instance that the caller must ``cleanup()`` from the thread
+                that used it (False)
+        """
         if self._initialized:
             return
-            
+        
         self.playwright: Optional[Playwright] = None
         self.browser: Optional[Browser] = None
-        self.contexts: List[BrowserContext] = []
+        # Contexts per emulation profile, least recently used profile first
+        self._profiles: "OrderedDict[EmulationProfile, List[_ManagedContext]]" = OrderedDict()
+        self._managed: Dict[BrowserContext, _ManagedContext] = {}
+        self._devices: Optional[Dict[str, Dict[str, Any]]] = None
+        # Use counts for pooled pages, checked out or idle
+        self._page_uses: Dict[Page, int] = {}
+        self._counters = {
+            'contexts_created': 0,
+            'contexts_closed': 0,
+            'pages_created': 0,
+            'pages_closed': 0,
+            'browser_launches': 0,
+            'browser_crashes': 0,
+            'memory_context_recycles': 0,
+            'memory_browser_recycles': 0,
+        }
+        # Crash recovery: a warm spare browser and a launch generation that
+        # lets callers tell whether the browser they used has since died
+        self._standby: Optional[Browser] = None
+        self._standby_needed = False
+        self._generation = 0
+        self._crashed_generations: Set[int] = set()
+        # Launch generation each checked-out page was handed out under
+        self._checked_out: Dict[Page, int] = {}
+        self._closing = False
+        # Browsers replaced by recycle_browser(), closed once their pages drain
+        self._draining: List[Browser] = []
+        # Memory watchdog, sampling this manager's Playwright driver and
+        # every browser it launched
+        self._driver_pid: Optional[int] = None
+        self._last_memory_check = 0.0
+        self._memory: Optional[Dict[str, int]] = None
+        self._memory_sampled_at: Optional[float] = None
+        self._shared = shared
+        self._exit_hook = False
         self._initialized = True
-        
-        # Register cleanup on exit
-        atexit.register(self.cleanup)
     
     def get_browser(self) -> Browser:
-        """Get or create browser instance."""
+        """
+        Get or create browser instance.
+        
+        A browser that has disconnected (crash, OOM kill) is replaced by the
+        warm standby if one is ready, otherwise relaunched.
+        """
+        if self.browser is not None and not self.browser.is_connected():
+            self._on_disconnected(self.browser)
+        
         if not self.browser:
-            logger.info("Starting Playwright browser")
+            if self._standby is not None and self._standby.is_connected():
+                logger.info("Promoting standby browser")
+                self.browser, self._standby = self._standby, None
+                self._standby_needed = browser_config.warm_standby
+            else:
+                self.browser = self._launch()
+                if browser_config.warm_standby and self._standby is None:
+                    self._standby = self._launch()
+            self._generation += 1
+        return self.browser
+    
+    def _launch(self) -> Browser:
+        """Launch a Chromium instance, restarting Playwright if its driver died."""
+        for attempt in range(2):
             try:
-                self.playwright = sync_playwright().start()
-                self.browser = self.playwright.chromium.launch(
+                if not self.playwright:
+                    logger.info("Starting Playwright browser")
+                    self.playwright = sync_playwright().start()
+                    self._driver_pid = _playwright_driver_pid(self.playwright)
+                    # Register cleanup on exit once there is something to clean
+                    # up. Private instances are thread-bound and cannot be
+                    # cleaned up from the atexit thread.
+                    if self._shared and not self._exit_hook:
+                        atexit.register(self.cleanup)
+                        self._exit_hook = True
+                browser = self.playwright.chromium.launch(
                     headless=browser_config.headless,
                     args=browser_config.browser_args
                 )
+                break
             except Error as e:
-                raise BrowserError(f"Failed to launch browser: {e}")
-        return self.browser
+                if attempt or not self._counters['browser_crashes']:
+                    raise BrowserError(f"Failed to launch browser: {e}")
+                logger.warning(f"Browser launch failed after a crash, restarting Playwright: {e}")
+                if self.playwright:
+                    try:
+                        self.playwright.stop()
+                    except Exception:
+                        pass
+                self.playwright = None
+                self._driver_pid = None
+        
+        browser.on("disconnected", self._on_disconnected)
+        self._counters['browser_launches'] += 1
+        return browser
     
-    def get_context(self) -> BrowserContext:
-        """Get a browser context, reusing if possible."""
-        # Clean up closed contexts
-        self.contexts = [ctx for ctx in self.contexts if ctx.pages]
+    def _on_disconnected(self, browser: Browser) -> None:
+        """Handle a browser that went away without us closing it."""
+        if self._closing:
+            return
+        
+        if browser is self._standby:
+            logger.warning("Standby browser disconnected")
+            self._standby = None
+            self._standby_needed = browser_config.warm_standby
+        elif browser is self.browser:
+            logger.error("Browser disconnected unexpectedly; will relaunch")
+            self._counters['browser_crashes'] += 1
+            self._crashed_generations.add(self._generation)
+            self.browser = None
+        elif browser in self._draining:
+            self._draining.remove(browser)
+        else:
+            return
+        
+        # Its contexts and pages died with it
+        for managed in list(self._managed.values()):
+            if managed.browser is browser:
+                self._forget_context(managed)
+    
+    @property
+    def generation(self) -> int:
+        """Launch generation of the current browser."""
+        return self._generation
+    
+    def crashed_since(self, generation: int) -> bool:
+        """Whether the browser of ``generation`` has crashed since it was handed out."""
+        if self.browser is not None and not self.browser.is_connected():
+            self._on_disconnected(self.browser)
+        return generation in self._crashed_generations
+    
+    def _replenish_standby(self) -> None:
+        """Launch a new standby browser once nothing is in flight."""
+        if not self._standby_needed or any(m.busy for m in self._managed.values()):
+            return
+        self._standby_needed = False
+        try:
+            self._standby = self._launch()
+        except BrowserError as e:
+            logger.warning(f"Failed to launch standby browser: {e}")
+    
+    @property
+    def contexts(self) -> List[BrowserContext]:
+        """All open contexts across emulation profiles."""
+        return list(self._managed)
+    
+    def resolve_profile(self, mobile: bool = False, device_name: Optional[str] = None) -> EmulationProfile:
+        """
+        Map capture options to an emulation profile.
         
-        # Reuse existing context if available
-        for context in self.contexts:
-            if len(context.pages) == 0:  # No active pages
-                return context
+        ``device_name`` is looked up in Playwright's full ``devices``
+        registry (e.g. "iPhone 13", "Pixel 7", "Galaxy S9+").
+        """
+        if device_name:
+            if self._devices is None:
+                self.get_browser()
+                self._devices = self.playwright.devices if self.playwright else {}
+            if device_name in self._devices:
+                return EmulationProfile.from_device(self._devices[device_name])
+            logger.warning(f"Unknown device '{device_name}', using generic mobile profile")
+            return EmulationProfile.generic_mobile()
+        if mobile:
+            return EmulationProfile.generic_mobile()
+        return EmulationProfile.desktop()
+    
+    def get_context(self, profile: Optional[EmulationProfile] = None) -> BrowserContext:
+        """
+        Get a browser context for ``profile``, reusing if possible.
+        
+        Each profile gets up to ``max_contexts`` contexts of its own, so
+        mobile and desktop captures do not compete for slots. At most
+        ``max_profiles`` profiles are kept; the least recently used idle
+        profile is closed to make room.
+        """
+        return self._select(profile).context
+    
+    def _select(self, profile: Optional[EmulationProfile]) -> _ManagedContext:
+        """Pick the context to run the next page on, recycling expired ones."""
+        if profile is None:
+            profile = EmulationProfile.desktop()
+        
+        if profile not in self._profiles:
+            self._profiles[profile] = []
+            self._evict_profiles()
+        self._profiles.move_to_end(profile)
+        
+        # Recycle contexts past their max age or uses. Busy ones are only
+        # marked and get closed when their last page is checked in.
+        for managed in list(self._profiles[profile]):
+            if not managed.retiring and managed.expired():
+                logger.debug(f"Recycling context after {managed.uses} uses")
+                managed.retiring = True
+            if managed.retiring and not managed.busy:
+                self._close_context(managed)
+        
+        active = [m for m in self._profiles[profile] if not m.retiring]
+        
+        # Reuse an idle context if available
+        for managed in active:
+            if managed.state == "idle":
+                return managed
         
         # Create new context if under limit
-        if len(self.contexts) < browser_config.max_contexts:
-            browser = self.get_browser()
-            context = browser.new_context(
-                viewport={
-                    'width': browser_config.viewport_width,
-                    'height': browser_config.viewport_height
-                },
-                ignore_https_errors=browser_config.ignore_https_errors,
-                accept_downloads=True,
-                locale='en-US',
-                timezone_id='America/New_York',
-                permissions=['geolocation'],
-                geolocation={'latitude': 40.7128, 'longitude': -74.0060},
-            )
-            self.contexts.append(context)
-            logger.debug(f"Created new browser context (total: {len(self.contexts)})")
-            return context
+        if len(active) < browser_config.max_contexts:
+            return self._new_context(profile)
         
         # Otherwise use the least busy context
-        return min(self.contexts, key=lambda c: len(c.pages))
+        return min(active, key=lambda m: m.busy)
+    
+    def _new_context(self, profile: EmulationProfile) -> _ManagedContext:
+        """Create and register a new browser context for ``profile``."""
+        browser = self.get_browser()
+        context = browser.new_context(
+            ignore_https_errors=browser_config.ignore_https_errors,
+            accept_downloads=True,
+            timezone_id='America/New_York',
+            permissions=['geolocation'],
+            geolocation={'latitude': 40.7128, 'longitude': -74.0060},
+            **profile.context_options()
+        )
+        managed = _ManagedContext(context, profile, browser)
+        self._profiles.setdefault(profile, []).append(managed)
+        self._managed[context] = managed
+        self._counters['contexts_created'] += 1
+        
+        # Forget contexts that close underneath us (e.g. renderer crash)
+        context.on("close", lambda _: self._forget_context(managed))
+        
+        logger.debug(f"Created new browser context for {profile} (total: {len(self._managed)})")
+        return managed
+    
+    def _forget_context(self, managed: _ManagedContext) -> None:
+        """Drop all bookkeeping for a context."""
+        if self._managed.pop(managed.context, None) is None:
+            return
+        self._counters['contexts_closed'] += 1
+        contexts = self._profiles.get(managed.profile)
+        if contexts and managed in contexts:
+            contexts.remove(managed)
+        for page in managed.idle_pages:
+            self._page_uses.pop(page, None)
+        managed.idle_pages.clear()
+    
+    def _close_context(self, managed: _ManagedContext) -> None:
+        """Close a context and its pooled pages."""
+        self._counters['pages_closed'] += len(managed.idle_pages)
+        self._forget_context(managed)
+        try:
+            managed.context.close()
+        except Exception as e:
+            logger.warning(f"Error closing context: {e}")
+        self._close_drained()
+    
+    def _close_drained(self) -> None:
+        """Close recycled browsers that no longer have contexts."""
+        for browser in list(self._draining):
+            if any(m.browser is browser for m in self._managed.values()):
+                continue
+            self._draining.remove(browser)
+            try:
+                browser.close()
+            except Exception as e:
+                logger.warning(f"Error closing recycled browser: {e}")
+    
+    def recycle_contexts(self) -> None:
+        """
+        Retire every context: idle ones close now, busy ones when their
+        pages come back. New pages go to fresh contexts.
+        """
+        for managed in list(self._managed.values()):
+            managed.retiring = True
+            if not managed.busy:
+                self._close_context(managed)
+    
+    def recycle_browser(self) -> None:
+        """
+        Replace the browser without killing in-flight work.
+        
+        The next page goes to a new (or standby) browser; the old one is
+        closed once its checked-out pages have been returned.
+        """
+        if self.browser is None:
+            return
+        logger.info("Recycling browser")
+        self._draining.append(self.browser)
+        self.browser = None
+        self.recycle_contexts()
+        # Without open contexts nothing else would close it
+        self._close_drained()
+    
+    def sample_memory(self) -> Optional[Dict[str, int]]:
+        """
+        Sample RSS of this manager's process tree now: its Playwright driver
+        and the Chromium processes under it, not other managers' browsers.
+        None if unsupported or nothing is running.
+        """
+        self._memory = process_tree_memory(self._driver_pid) if self._driver_pid else None
+        self._last_memory_check = time.monotonic()
+        self._memory_sampled_at = time.time()
+        return self._memory
+    
+    def _check_memory(self) -> None:
+        """Watchdog: sample memory on interval and recycle past the thresholds."""
+        interval = browser_config.memory_check_interval
+        hard_limit = browser_config.memory_hard_limit_mb
+        soft_limit = browser_config.memory_soft_limit_mb
+        if not interval or not (hard_limit or soft_limit):
+            return  # Nothing to enforce; skip the /proc walk
+        if time.monotonic() - self._last_memory_check < interval:
+            return
+        
+        usage = self.sample_memory()
+        if usage is None:
+            return
+        
+        total_mb = usage['total'] / (1024 * 1024)
+        
+        if hard_limit and total_mb >= hard_limit:
+            logger.warning(f"Chromium using {total_mb:.0f} MB (hard limit {hard_limit} MB), recycling browser")
+            self._counters['memory_browser_recycles'] += 1
+            self.recycle_browser()
+        elif soft_limit and total_mb >= soft_limit:
+            logger.warning(f"Chromium using {total_mb:.0f} MB (soft limit {soft_limit} MB), recycling contexts")
+            self._counters['memory_context_recycles'] += 1
+            self.recycle_contexts()
+    
+    def _evict_profiles(self) -> None:
+        """Close least recently used idle profiles beyond ``max_profiles``."""
+        # Never evict the most recently requested profile
+        for profile in list(self._profiles)[:-1]:
+            if len(self._profiles) <= browser_config.max_profiles:
+                return
+            contexts = self._profiles[profile]
+            if any(m.busy for m in contexts):
+                continue
+            
+            logger.debug(f"Evicting emulation profile {profile}")
+            for managed in list(contexts):
+                self._close_context(managed)
+            del self._profiles[profile]
+    
+    def _new_pooled_page(self, context: BrowserContext) -> Page:
+        """Open a page that will be tracked by the page pool."""
+        page = context.new_page()
+        self._page_uses[page] = 0
+        self._counters['pages_created'] += 1
+        return page
+    
+    def _discard_page(self, page: Page) -> None:
+        """Close a page and stop tracking it."""
+        self._page_uses.pop(page, None)
+        self._counters['pages_closed'] += 1
+        try:
+            page.close()
+        except Exception as e:
+            logger.debug(f"Error closing page: {e}")
+    
+    def checkout_page(self, profile: Optional[EmulationProfile] = None) -> Page:
+        """
+        Take a ready page from the pool, opening a new one if none is idle.
+        
+        Every page checked out must be returned with ``checkin_page``.
+        
+        Args:
+            profile: Emulation profile of the context (default: desktop)
+        """
+        self._check_memory()
+        managed = self._select(profile)
+        
+        page = None
+        while managed.idle_pages:
+            candidate = managed.idle_pages.pop()
+            # Health check: pooled pages must be open and parked on about:blank
+            if not candidate.is_closed() and candidate.url == "about:blank":
+                page = candidate
+                break
+            logger.debug("Dropping unhealthy pooled page")
+            self._discard_page(candidate)
+        
+        if page is None:
+            page = self._new_pooled_page(managed.context)
+        
+        managed.busy += 1
+        managed.uses += 1
+        self._checked_out[page] = self._generation
+        return page
+    
+    def checkin_page(self, page: Page, discard: bool = False) -> None:
+        """
+        Return a page to the pool after use.
+        
+        The page is reset to ``about:blank`` and kept for reuse, unless
+        ``discard`` is set, it has reached ``page_max_uses``, or its
+        context's pool is already full; then it is closed. A retiring
+        context is closed once its last page comes back.
+        """
+        self._checkin(page, discard)
+        self._prune_crashes()
+        # Off the capture path: refill the standby after a crash
+        self._replenish_standby()
+    
+    def _prune_crashes(self) -> None:
+        """Forget crashes of generations no checked-out page belongs to."""
+        oldest = min(self._checked_out.values(), default=self._generation + 1)
+        self._crashed_generations = {g for g in self._crashed_generations if g >= oldest}
+    
+    def _checkin(self, page: Page, discard: bool) -> None:
+        """Return ``page`` to its context's pool or close it."""
+        self._checked_out.pop(page, None)
+        uses = self._page_uses.get(page, 0) + 1
+        managed = self._managed.get(page.context)
+        if managed is None:
+            self._discard_page(page)
+            return
+        
+        managed.busy -= 1
+        if managed.retiring:
+            self._discard_page(page)
+            if not managed.busy:
+                self._close_context(managed)
+            return
+        
+        if (
+            discard
+            or page.is_closed()
+            or uses >= browser_config.page_max_uses
+            or len(managed.idle_pages) >= browser_config.page_pool_size
+        ):
+            self._discard_page(page)
+            return
+        
+        try:
+            page.goto("about:blank")
+        except Error as e:
+            logger.debug(f"Failed to reset pooled page: {e}")
+            self._discard_page(page)
+            return
+        
+        self._page_uses[page] = uses
+        managed.idle_pages.append(page)
+    
+    def prewarm(
+        self,
+        pages_per_context: Optional[int] = None,
+        profile: Optional[EmulationProfile] = None
+    ) -> None:
+        """Open ``profile``'s contexts up to ``max_contexts`` and fill their page pools."""
+        count = browser_config.page_pool_size if pages_per_context is None else pages_per_context
+        if profile is None:
+            profile = EmulationProfile.desktop()
+        
+        contexts = self._profiles.setdefault(profile, [])
+        while len(contexts) < browser_config.max_contexts:
+            self._new_context(profile)
+        
+        for managed in contexts:
+            while len(managed.idle_pages) < count:
+                managed.idle_pages.append(self._new_pooled_page(managed.context))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get live context/page figures and lifetime counters."""
+        managed = list(self._managed.values())
+        busy_pages = sum(m.busy for m in managed)
+        idle_pages = sum(len(m.idle_pages) for m in managed)
+        
+        return {
+            'browser_running': self.browser is not None,
+            'standby_ready': self._standby is not None,
+            'profiles': len(self._profiles),
+            'live_contexts': len(managed),
+            'busy_contexts': sum(1 for m in managed if m.state == "busy"),
+            'idle_contexts': sum(1 for m in managed if m.state == "idle"),
+            'live_pages': busy_pages + idle_pages,
+            'busy_pages': busy_pages,
+            'idle_pages': idle_pages,
+            'draining_browsers': len(self._draining),
+            'memory': self._memory,
+            'memory_sampled_at': self._memory_sampled_at,
+            'memory_soft_limit_mb': browser_config.memory_soft_limit_mb,
+            'memory_hard_limit_mb': browser_config.memory_hard_limit_mb,
+            **self._counters,
+        }
     
     def cleanup(self):
         """Clean up all resources."""
         logger.info("Cleaning up browser resources")
+        self._closing = True
         
         # Close all contexts
-        for context in self.contexts:
-            try:
-                context.close()
-            except Exception as e:
-                logger.warning(f"Error closing context: {e}")
+        for managed in list(self._managed.values()):
+            self._close_context(managed)
         
-        # Close browser
-        if self.browser:
-            try:
-                self.browser.close()
-            except Exception as e:
-                logger.warning(f"Error closing browser: {e}")
+        # Close browsers
+        for browser in (self.browser, self._standby, *self._draining):
+            if browser:
+                try:
+                    browser.close()
+                except Exception as e:
+                    logger.warning(f"Error closing browser: {e}")
         
         # Stop playwright
         if self.playwright:
@@ -110,15 +642,24 @@ class BrowserManager:
             except Exception as e:
                 logger.warning(f"Error stopping playwright: {e}")
         
-        self.contexts.clear()
+        self._profiles.clear()
+        self._managed.clear()
+        self._page_uses.clear()
+        self._checked_out.clear()
+        self._crashed_generations.clear()
         self.browser = None
+        self._standby = None
+        self._standby_needed = False
+        self._draining.clear()
         self.playwright = None
+        self._driver_pid = None
+        self._closing = False
     
     def reset(self):
         """Reset the browser manager, closing all resources."""
         self.cleanup()
         self._initialized = False
-        self.__init__()
+        self.__init__(self._shared)
 
 
 # Global instance
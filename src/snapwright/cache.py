@@ -3,171 +3,1053 @@
 import hashlib
 import json
 import logging
-from datetime import datetime, timedelta
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from threading import Lock, RLock
+from typing import Optional, Dict, Any, Callable, Iterator, List, Tuple, Union
 
 from .config import browser_config
 from .exceptions import CacheError
+from .revalidate import document_unchanged
+from .urls import cache_url
+
+try:
+    import fcntl
+except ImportError:  # Windows: locking falls back to this process only
+    fcntl = None  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    options TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS failures (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    error TEXT NOT NULL,
+    message TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    image_key TEXT NOT NULL DEFAULT ''  -- Entry whose successful capture clears the record
+);
+"""
+
+# Columns added after the first SQLite release, created on older indexes
+_ADDED_COLUMNS = {
+    'size': "INTEGER NOT NULL DEFAULT 0",  # Bytes of the image file
+    'last_access': "REAL NOT NULL DEFAULT 0",
+    'cost': "REAL NOT NULL DEFAULT 0",  # Seconds the capture took
+    'priority': "REAL NOT NULL DEFAULT 0",  # Lowest is evicted first
+    'hits': "INTEGER NOT NULL DEFAULT 0",
+    # Main document validators for conditional revalidation
+    'etag': "TEXT",
+    'last_modified': "TEXT",
+    'body_hash': "TEXT",
+}
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS entries_created_at ON entries (created_at);
+CREATE INDEX IF NOT EXISTS entries_filename ON entries (filename);
+CREATE INDEX IF NOT EXISTS entries_priority ON entries (priority);
+CREATE INDEX IF NOT EXISTS failures_image_key ON failures (image_key);
+"""
+
+# Lookup and housekeeping counters reported by get_cache_stats, per process
+_COUNTERS = (
+    'hits',  # Fresh images served
+    'stale_hits',  # Expired images served while recaptured
+    'misses',  # Lookups that found nothing
+    'failure_hits',  # Lookups answered with a recent failure
+    'revalidations',  # Expired entries renewed because the page was unchanged
+    'evictions',  # Entries removed to stay within budget
+    'expired',  # Entries removed by cleanup_old_cache
+    'bytes_saved',  # Image bytes served instead of rendered
+    'seconds_saved',  # Capture time of the images served
+)
+
+# ioctl that clones a file's extents (reflink) on Btrfs, XFS and others
+_FICLONE = 0x40049409
+
+
+def _clone_file(src: Path, dst: Path) -> None:
+    """
+    Copy ``src`` to ``dst``, sharing data blocks where the filesystem allows.
+    
+    Tries a reflink, then an in-kernel ``copy_file_range``, then a plain copy.
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+                return
+            except OSError:
+                pass
+        
+        if hasattr(os, 'copy_file_range'):
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                if remaining == 0:
+                    return
+            except OSError:
+                pass
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+        
+        shutil.copyfileobj(fsrc, fdst)
+
+
+def _place_file(src: Path, dst: Path, mode: str) -> None:
+    """
+    Atomically make ``dst`` a copy of ``src`` using the delivery ``mode``.
+    
+    'hardlink' links when src and dst share a filesystem, 'reflink' clones
+    (see ``_clone_file``), anything else copies. Links and clones fall back
+    to a copy when the filesystem refuses them.
+    """
+    tmp = dst.with_name(f".{dst.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        if mode == "hardlink":
+            try:
+                os.link(src, tmp)
+            except OSError:
+                _clone_file(src, tmp)
+        elif mode == "reflink":
+            _clone_file(src, tmp)
+        else:
+            shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def detach_output(path: Union[str, Path]) -> None:
+    """
+    Remove ``path`` if it is a hardlink shared with other files.
+    
+    Call before overwriting an output file in place, so a screenshot
+    delivered by hardlink never rewrites the cached copy it shares data with.
+    """
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+@dataclass
+class CacheEntry:
+    """Result of a cache lookup."""
+    
+    path: Optional[Path]  # None when served from memory
+    data: Optional[bytes] = None  # Image bytes, when requested
+    stale: bool = False  # Past its TTL, served inside the stale-while-revalidate window
+    refresh: bool = False  # Caller should recapture it in the background
+    error: Optional[str] = None  # Exception class of a recent failed capture, served instead of an image
+    message: Optional[str] = None  # That failure's error message
+    retry_at: float = 0.0  # When the failure record expires
+
+
+class MemoryCache:
+    """
+    Byte-bounded LRU of screenshot bytes held in this process.
+    
+    Lookups are dictionary operations only: no index queries, no stat, no
+    file reads.
+    """
+    
+    def __init__(self, max_bytes: Optional[int] = None):
+        """
+        Args:
+            max_bytes: Total bytes to hold (default: browser_config.memory_cache_mb)
+        """
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, float, float]]" = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+    
+    @property
+    def max_bytes(self) -> int:
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return browser_config.memory_cache_mb * 1024 * 1024
+    
+    @property
+    def size(self) -> int:
+        """Bytes currently held."""
+        return self._size
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """Bytes for ``key`` if held and not expired."""
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+    
+    def get_entry(self, key: str) -> Optional[Tuple[bytes, float]]:
+        """Bytes and capture cost for ``key`` if held and not expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            data, expires_at, cost = entry
+            if time.time() >= expires_at:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return data, cost
+    
+    def put(self, key: str, data: bytes, expires_at: float, cost: float = 0.0) -> None:
+        """Hold ``data`` until ``expires_at``, evicting least recently used bytes."""
+        limit = self.max_bytes
+        if len(data) > limit or expires_at <= time.time():
+            return
+        
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (data, expires_at, cost)
+            self._size += len(data)
+            while self._size > limit:
+                self._remove(next(iter(self._entries)))
+    
+    def discard(self, key: str) -> None:
+        """Drop ``key`` if held."""
+        with self._lock:
+            self._remove(key)
+    
+    def clear(self) -> None:
+        """Drop everything."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+    
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[0])
+
 
 class ScreenshotCache:
-    """Manages screenshot caching with metadata."""
+    """
+    Manages screenshot caching with a SQLite metadata index.
+    
+    Images are stored once per distinct content, named by SHA-256 under
+    ``cache_dir/<first two hex digits>/``; entries for different URLs or
+    options that rendered identically share one file.
+    
+    Construction does no I/O: ``cache_dir`` is created and the index opened
+    (and migrated) on first use.
+    """
     
-    def __init__(self):
+    def __init__(self) -> None:
         self.cache_dir = Path(browser_config.cache_dir)
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.index_file = self.cache_dir / "cache_index.sqlite3"
+        # Held while cache files change, so processes sharing cache_dir agree
+        self.lock_file = self.cache_dir / "cache.lock"
+        # Legacy index, migrated into SQLite on first use
         self.metadata_file = self.cache_dir / "cache_metadata.json"
-        self.metadata = self._load_metadata()
+        # Serializes use of the connection by concurrent captures on actor threads
+        self._lock = RLock()
+        # Hot screenshot bytes in front of the disk cache (MEMORY_CACHE_MB, 0 = off)
+        self.memory = MemoryCache()
+        # Memory hits not yet counted in the index, flushed on the next disk lookup
+        self._memory_hits: Dict[str, int] = {}
+        self._counters: Dict[str, float] = dict.fromkeys(_COUNTERS, 0)
+        self._conn: Optional[sqlite3.Connection] = None
     
-    def _load_metadata(self) -> Dict[str, Any]:
-        """Load cache metadata."""
-        if self.metadata_file.exists():
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """The index connection, opened on first use."""
+        if self._conn is None:
+            return self._open()
+        return self._conn
+    
+    def _open(self) -> sqlite3.Connection:
+        """Create ``cache_dir``, open the index and bring it up to date."""
+        with self._lock:
+            if self._conn is not None:
+                return self._conn
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # Processes opening a new index together must not race on setup
+            with self._file_lock():
+                conn = self._conn = self._connect()
+                self._migrate_json_metadata()
+                self._init_totals()
+            return conn
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the index database in WAL mode."""
+        try:
+            db = sqlite3.connect(
+                str(self.index_file),
+                timeout=30,
+                isolation_level=None,  # Autocommit; each statement is its own transaction
+                check_same_thread=False
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.executescript(_SCHEMA)
+            self._upgrade_schema(db)
+            db.executescript(_INDEXES)
+            return db
+        except sqlite3.Error as e:
+            raise CacheError(f"Failed to open cache index {self.index_file}: {e}")
+    
+    def _upgrade_schema(self, db: sqlite3.Connection) -> None:
+        """Add columns missing from an index created by an older version."""
+        if 'image_key' not in {row[1] for row in db.execute("PRAGMA table_info(failures)")}:
             try:
-                with open(self.metadata_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"Failed to load cache metadata: {e}")
-        return {}
+                db.execute("ALTER TABLE failures ADD COLUMN image_key TEXT NOT NULL DEFAULT ''")
+            except sqlite3.OperationalError:
+                pass  # Added concurrently by another process
+        
+        existing = {row[1] for row in db.execute("PRAGMA table_info(entries)")}
+        missing = [name for name in _ADDED_COLUMNS if name not in existing]
+        if not missing:
+            return
+        
+        for name in missing:
+            try:
+                db.execute(f"ALTER TABLE entries ADD COLUMN {name} {_ADDED_COLUMNS[name]}")
+            except sqlite3.OperationalError:
+                pass  # Added concurrently by another process
+        
+        if 'size' in missing:
+            # Backfill from the files so byte budgets see existing entries
+            for key, filename in db.execute("SELECT key, filename FROM entries").fetchall():
+                try:
+                    size = (self.cache_dir / filename).stat().st_size
+                except OSError:
+                    size = 0
+                db.execute("UPDATE entries SET size = ? WHERE key = ?", (size, key))
+        if 'last_access' in missing:
+            db.execute("UPDATE entries SET last_access = created_at, priority = created_at")
+    
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Exclusive lock over cache files across threads and processes."""
+        with self._lock:
+            if self._conn is None:
+                self._open()
+            with self._file_lock():
+                yield
+    
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """The cross-process half of ``_exclusive``. Caller holds ``_lock``."""
+        if fcntl is None:
+            yield
+            return
+        
+        with open(self.lock_file, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    
+    def _write_atomic(self, cache_path: Path, write: Callable[[Path], Any]) -> None:
+        """
+        Produce ``cache_path`` via ``write(tmp_path)`` and an atomic rename.
+        
+        Readers in other processes see either the old file or the complete
+        new one, never a partial PNG.
+        """
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-", suffix=".png")
+        os.close(fd)
+        try:
+            write(Path(tmp_name))
+            os.replace(tmp_name, cache_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise
+    
+    def _migrate_json_metadata(self) -> None:
+        """
+        Import entries from the old ``cache_metadata.json`` once, then retire it.
+        
+        Caller holds ``_file_lock``, so another process that got there
+        first has already renamed the file.
+        """
+        if self.metadata_file.exists():
+            self._import_json_metadata()
     
-    def _save_metadata(self):
-        """Save cache metadata."""
+    def _import_json_metadata(self) -> None:
+        """Copy legacy JSON entries into the index."""
         try:
-            with open(self.metadata_file, 'w') as f:
-                json.dump(self.metadata, f, indent=2, default=str)
+            with open(self.metadata_file, 'r') as f:
+                metadata = json.load(f)
         except Exception as e:
-            logger.error(f"Failed to save cache metadata: {e}")
-            raise CacheError(f"Failed to save cache metadata: {e}")
+            logger.warning(f"Failed to load legacy cache metadata: {e}")
+            return
+        
+        rows = []
+        for key, entry in metadata.items():
+            try:
+                created_at = datetime.fromisoformat(entry['timestamp']).timestamp()
+                cache_path = self.cache_dir / entry['filename']
+                rows.append((
+                    key,
+                    entry['url'],
+                    entry['filename'],
+                    created_at,
+                    json.dumps(entry.get('options') or {}, sort_keys=True),
+                    cache_path.stat().st_size if cache_path.exists() else 0,
+                    created_at,
+                    created_at
+                ))
+            except (KeyError, TypeError, ValueError):
+                logger.debug(f"Skipping malformed legacy cache entry {key}")
+        
+        with self._lock:
+            # One transaction for the whole import
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT OR IGNORE INTO entries "
+                "(key, url, filename, created_at, options, size, last_access, priority) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._db.execute("COMMIT")
+        
+        self.metadata_file.rename(self.metadata_file.with_name("cache_metadata.json.migrated"))
+        logger.info(f"Migrated {len(rows)} cache entries from {self.metadata_file.name}")
+        self._recount_totals()
+    
+    def _init_totals(self) -> None:
+        """Compute the running totals once for an index that predates them. Caller holds ``_file_lock``."""
+        if not self._execute("SELECT 1 FROM settings WHERE name = 'total_entries'"):
+            self._recount_totals()
+    
+    def _recount_totals(self) -> None:
+        """Set the running totals from a full scan of the index. Caller holds ``_exclusive``."""
+        entries = self._execute("SELECT COUNT(*) FROM entries")[0][0]
+        # Files shared by several entries count once
+        size = self._execute(
+            "SELECT COALESCE(SUM(size), 0) FROM "
+            "(SELECT MAX(size) AS size FROM entries GROUP BY filename)"
+        )[0][0]
+        self._execute(
+            "INSERT OR REPLACE INTO settings (name, value) VALUES ('total_entries', ?), ('total_bytes', ?)",
+            (entries, size)
+        )
+    
+    def _adjust_totals(self, entries: int = 0, size: int = 0) -> None:
+        """Add to the running totals. Caller holds ``_exclusive``."""
+        if entries:
+            self._execute("UPDATE settings SET value = value + ? WHERE name = 'total_entries'", (entries,))
+        if size:
+            self._execute("UPDATE settings SET value = value + ? WHERE name = 'total_bytes'", (size,))
+    
+    def _totals(self) -> Tuple[int, int]:
+        """Running (entry count, bytes of distinct files)."""
+        totals = dict(self._execute(
+            "SELECT name, value FROM settings WHERE name IN ('total_entries', 'total_bytes')"
+        ))
+        return int(totals.get('total_entries', 0)), int(totals.get('total_bytes', 0))
+    
+    def _count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
     
-    def get_cache_key(self, url: str, options: Dict[str, Any] = None) -> str:
-        """Generate unique cache key."""
+    def _count_hit(self, stale: bool, size: int, cost: float) -> None:
+        """Count an image served from the cache and the capture it saved."""
+        with self._lock:
+            self._counters['stale_hits' if stale else 'hits'] += 1
+            self._counters['bytes_saved'] += size
+            self._counters['seconds_saved'] += cost
+    
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Run a statement against the index and return its rows."""
+        try:
+            with self._lock:
+                return self._db.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            raise CacheError(f"Cache index query failed: {e}")
+    
+    def get_cache_key(self, url: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """Generate unique cache key, the same for equivalent spellings of a URL."""
         key_data = {
-            'url': url,
+            'url': cache_url(url),
             'options': options or {},
             'viewport': f"{browser_config.viewport_width}x{browser_config.viewport_height}"
         }
         key_str = json.dumps(key_data, sort_keys=True)
         return hashlib.md5(key_str.encode()).hexdigest()
     
-    def get_cached_path(self, url: str, options: Dict[str, Any] = None) -> Optional[Path]:
+    def get_cached_path(self, url: str, options: Optional[Dict[str, Any]] = None) -> Optional[Path]:
         """Get cached screenshot if valid."""
+        entry = self.lookup(url, options)
+        return entry.path if entry and not (entry.stale or entry.error) else None
+    
+    def get_cached_bytes(self, url: str, options: Optional[Dict[str, Any]] = None) -> Optional[bytes]:
+        """
+        Get cached screenshot bytes if valid.
+        
+        Served from the in-memory cache when held there, without touching
+        the index or the filesystem; otherwise read from disk and kept in
+        memory for the next caller.
+        """
+        entry = self.lookup(url, options, read=True)
+        return entry.data if entry and not (entry.stale or entry.error) else None
+    
+    def lookup(
+        self,
+        url: str,
+        options: Optional[Dict[str, Any]] = None,
+        read: bool = False,
+        failure_options: Optional[Dict[str, Any]] = None
+    ) -> Optional[CacheEntry]:
+        """
+        Find a usable cache entry, including stale ones callers may serve.
+        
+        Entries up to ``cache_stale_hours`` past their TTL are returned with
+        ``stale`` set. ``refresh`` is set on stale entries, and on entries
+        with at least ``cache_refresh_min_hits`` hits in the last
+        ``cache_refresh_ahead`` fraction of their TTL; callers are expected
+        to recapture those in the background.
+        
+        With no usable image, a capture that failed recently is returned as
+        an entry with ``error`` set (see ``record_failure``); callers fail
+        fast instead of rendering again.
+        
+        Args:
+            url: Captured URL
+            options: Capture options that key the entry
+            read: Also return the image bytes, from memory when held there
+            failure_options: Options that key failure records, when they
+                differ from ``options`` (see ``record_failure``)
+        """
         if not browser_config.cache_enabled:
             return None
-            
+        
         cache_key = self.get_cache_key(url, options)
+        entry = self._lookup_image(url, cache_key, read)
+        if entry is None:
+            failure_key = cache_key if failure_options is None else self.get_cache_key(url, failure_options)
+            entry = self._lookup_failure(failure_key)
+            self._count('failure_hits' if entry else 'misses')
+        return entry
+    
+    def _lookup_image(self, url: str, cache_key: str, read: bool) -> Optional[CacheEntry]:
+        """Cached image for ``cache_key``, fresh or inside the stale window."""
+        if read:
+            held = self.memory.get_entry(cache_key)
+            if held is not None:
+                data, cost = held
+                logger.debug(f"Memory cache hit for {url}")
+                with self._lock:
+                    self._memory_hits[cache_key] = self._memory_hits.get(cache_key, 0) + 1
+                self._count_hit(False, len(data), cost)
+                return CacheEntry(path=None, data=data)
         
-        # Check metadata
-        if cache_key in self.metadata:
-            entry = self.metadata[cache_key]
-            cached_time = datetime.fromisoformat(entry['timestamp'])
-            
-            # Check if cache is still valid
-            if datetime.now() - cached_time < timedelta(hours=browser_config.cache_ttl_hours):
-                cache_path = self.cache_dir / entry['filename']
-                if cache_path.exists():
-                    logger.debug(f"Cache hit for {url}")
-                    return cache_path
-                else:
-                    # Clean up orphaned metadata
-                    del self.metadata[cache_key]
-                    self._save_metadata()
-        
-        return None
-    
-    def save_to_cache(self, url: str, screenshot_path: Path, options: Dict[str, Any] = None) -> Path:
-        """Save screenshot to cache."""
+        self._flush_memory_hits()
+        
+        # Check the index
+        rows = self._execute(
+            "SELECT filename, created_at, hits, size, cost FROM entries WHERE key = ?", (cache_key,)
+        )
+        if not rows:
+            return None
+        
+        filename, created_at, hits, size, cost = rows[0]
+        ttl = browser_config.cache_ttl_hours * 3600
+        age = time.time() - created_at
+        
+        # Check if cache is still valid, or servable while it is recaptured
+        if age >= ttl + browser_config.cache_stale_hours * 3600:
+            return None
+        
+        cache_path = self.cache_dir / filename
+        if not cache_path.exists():
+            # Clean up orphaned entry
+            with self._exclusive():
+                if self._execute("SELECT 1 FROM entries WHERE key = ? AND filename = ?", (cache_key, filename)):
+                    self._execute("DELETE FROM entries WHERE key = ?", (cache_key,))
+                    self._adjust_totals(entries=-1)
+                    self._release_files({filename: size})
+            return None
+        
+        logger.debug(f"Cache hit for {url}")
+        self._touch(cache_key)
+        
+        entry = CacheEntry(path=cache_path, stale=age >= ttl)
+        refresh_at = ttl * (1 - browser_config.cache_refresh_ahead)
+        entry.refresh = entry.stale or (
+            browser_config.cache_refresh_ahead > 0
+            and age >= refresh_at
+            and hits + 1 >= browser_config.cache_refresh_min_hits
+        )
+        
+        if read:
+            try:
+                entry.data = cache_path.read_bytes()
+            except FileNotFoundError:
+                return None
+            if not entry.stale:
+                # Leave memory when refresh-ahead is due, so the next hit
+                # comes back here and can trigger it
+                expires_at = created_at + (refresh_at if browser_config.cache_refresh_ahead > 0 else ttl)
+                self.memory.put(cache_key, entry.data, expires_at, cost)
+        
+        self._count_hit(entry.stale, size, cost)
+        return entry
+    
+    def _lookup_failure(self, cache_key: str) -> Optional[CacheEntry]:
+        """Unexpired failure record for ``cache_key``."""
+        if not browser_config.cache_failures:
+            return None
+        
+        rows = self._execute(
+            "SELECT error, message, expires_at FROM failures WHERE key = ? AND expires_at > ?",
+            (cache_key, time.time())
+        )
+        if not rows:
+            return None
+        
+        error, message, expires_at = rows[0]
+        return CacheEntry(path=None, error=error, message=message, retry_at=expires_at)
+    
+    def record_failure(
+        self,
+        url: str,
+        options: Dict[str, Any],
+        error: str,
+        message: str,
+        image_options: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Remember that a capture failed, so repeats fail fast for a while.
+        
+        The record lasts ``failure_ttls[error]`` seconds, or
+        ``failure_ttls['default']`` for error types not listed; a TTL of 0
+        records nothing. A later successful capture of the same image entry
+        clears it.
+        
+        Args:
+            url: URL that failed
+            options: Options that key the record; these should include
+                everything caller-specific that can make a capture fail,
+                such as wait_for and its timeout
+            error: Exception class name, e.g. 'NavigationError'
+            message: Error message to repeat to callers
+            image_options: Options keying the image entry the capture would
+                have stored (default: ``options``)
+        """
+        if not (browser_config.cache_enabled and browser_config.cache_failures):
+            return
+        
+        ttls = browser_config.failure_ttls
+        ttl = ttls.get(error, ttls.get('default', 0))
+        if ttl <= 0:
+            return
+        
+        try:
+            self._execute(
+                "INSERT OR REPLACE INTO failures (key, url, error, message, expires_at, image_key) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.get_cache_key(url, options), url, error, message, time.time() + ttl,
+                 self.get_cache_key(url, options if image_options is None else image_options))
+            )
+            logger.debug(f"Recorded {error} for {url} for {ttl}s")
+        except CacheError as e:
+            logger.warning(f"Failed to record capture failure: {e}")
+    
+    def revalidate(
+        self,
+        url: str,
+        options: Optional[Dict[str, Any]] = None,
+        read: bool = False
+    ) -> Optional[CacheEntry]:
+        """
+        Renew an entry whose page has not changed since it was captured.
+        
+        Callers use this in place of a recapture when ``cache_revalidate``
+        is set: the stored ETag and Last-Modified are sent as a conditional
+        GET, or the document body is compared by hash. If the document is
+        unchanged the entry's TTL starts over and it is returned; otherwise
+        None, and the caller renders as usual.
+        
+        Args:
+            url: Captured URL
+            options: Capture options that key the entry
+            read: Also return the image bytes
+        """
+        if not (browser_config.cache_enabled and browser_config.cache_revalidate):
+            return None
+        
+        cache_key = self.get_cache_key(url, options)
+        rows = self._execute(
+            "SELECT filename, etag, last_modified, body_hash, size, cost FROM entries WHERE key = ?",
+            (cache_key,)
+        )
+        if not rows:
+            return None
+        
+        filename, etag, last_modified, body_hash, size, cost = rows[0]
+        cache_path = self.cache_dir / filename
+        if not cache_path.exists():
+            return None
+        if not document_unchanged(url, etag, last_modified, body_hash):
+            return None
+        
+        now = time.time()
+        self._execute("UPDATE entries SET created_at = ? WHERE key = ?", (now, cache_key))
+        self._touch(cache_key)
+        logger.info(f"Page unchanged, extended cached screenshot of {url}")
+        self._count('revalidations')
+        
+        entry = CacheEntry(path=cache_path)
+        if read:
+            try:
+                entry.data = cache_path.read_bytes()
+            except FileNotFoundError:
+                return None
+            self.memory.put(cache_key, entry.data, now + browser_config.cache_ttl_hours * 3600, cost)
+        # The render it avoids costs about what the original capture did
+        self._count_hit(False, size, cost)
+        return entry
+    
+    def _blob_filename(self, digest: str) -> str:
+        """Index filename (relative to cache_dir) of the blob with this SHA-256."""
+        return f"{digest[:2]}/{digest}.png"
+    
+    def save_to_cache(
+        self,
+        url: str,
+        screenshot_path: Path,
+        options: Optional[Dict[str, Any]] = None,
+        cost: float = 0.0,
+        validators: Optional[Dict[str, str]] = None
+    ) -> Path:
+        """
+        Save screenshot to cache.
+        
+        ``cost`` is the seconds the capture took; the 'gds' eviction policy
+        keeps expensive captures longer. ``validators`` are the main
+        document's etag, last_modified and body_hash, used by ``revalidate``.
+        """
         if not browser_config.cache_enabled:
             return screenshot_path
-            
+        
         cache_key = self.get_cache_key(url, options)
-        cache_filename = f"{cache_key}.png"
-        cache_path = self.cache_dir / cache_filename
         
-        # Copy to cache
         try:
-            import shutil
-            shutil.copy2(screenshot_path, cache_path)
-            
-            # Update metadata
-            self.metadata[cache_key] = {
-                'url': url,
-                'filename': cache_filename,
-                'timestamp': datetime.now().isoformat(),
-                'options': options or {}
-            }
-            self._save_metadata()
+            digest = hashlib.sha256()
+            with open(screenshot_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            cache_filename = self._blob_filename(digest.hexdigest())
+            cache_path = self.cache_dir / cache_filename
             
-            logger.debug(f"Saved to cache: {url}")
+            with self._exclusive():
+                # Identical images are stored once
+                if not cache_path.exists():
+                    cache_path.parent.mkdir(exist_ok=True)
+                    _place_file(Path(screenshot_path), cache_path, browser_config.cache_delivery)
+                self._record(
+                    cache_key, url, cache_filename, options,
+                    cache_path.stat().st_size, cost, validators
+                )
             return cache_path
-            
+        
         except Exception as e:
             logger.error(f"Failed to save to cache: {e}")
             # Return original path if caching fails
             return screenshot_path
     
+    def save_bytes_to_cache(
+        self,
+        url: str,
+        data: bytes,
+        options: Optional[Dict[str, Any]] = None,
+        cost: float = 0.0,
+        validators: Optional[Dict[str, str]] = None
+    ) -> Optional[Path]:
+        """Save in-memory screenshot bytes to cache."""
+        if not browser_config.cache_enabled:
+            return None
+        
+        cache_key = self.get_cache_key(url, options)
+        cache_filename = self._blob_filename(hashlib.sha256(data).hexdigest())
+        cache_path = self.cache_dir / cache_filename
+        
+        try:
+            with self._exclusive():
+                if not cache_path.exists():
+                    cache_path.parent.mkdir(exist_ok=True)
+                    self._write_atomic(cache_path, lambda tmp: tmp.write_bytes(data))
+                self._record(cache_key, url, cache_filename, options, len(data), cost, validators)
+            self.memory.put(cache_key, data, time.time() + browser_config.cache_ttl_hours * 3600, cost)
+            return cache_path
+        
+        except Exception as e:
+            logger.error(f"Failed to save to cache: {e}")
+            return None
+    
+    def deliver(self, cache_path: Path, output_path: Union[str, Path]) -> Path:
+        """
+        Place a cached screenshot at ``output_path`` without rewriting its data.
+        
+        Uses ``browser_config.cache_delivery``: 'hardlink' shares the cached
+        file itself (do not edit delivered files in place), 'reflink' shares
+        blocks copy-on-write where supported, 'copy' always copies.
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        _place_file(cache_path, output_path, browser_config.cache_delivery)
+        return output_path
+    
+    def _record(
+        self,
+        cache_key: str,
+        url: str,
+        cache_filename: str,
+        options: Optional[Dict[str, Any]],
+        size: int,
+        cost: float,
+        validators: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Index a file just written to the cache. Caller holds ``_exclusive``."""
+        now = time.time()
+        validators = validators or {}
+        previous = self._execute("SELECT filename, hits, size FROM entries WHERE key = ?", (cache_key,))
+        # A file no entry references yet adds to the byte total
+        new_file = not self._execute("SELECT 1 FROM entries WHERE filename = ? LIMIT 1", (cache_filename,))
+        self._execute(
+            "INSERT OR REPLACE INTO entries "
+            "(key, url, filename, created_at, options, size, last_access, cost, priority, hits, "
+            "etag, last_modified, body_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (cache_key, url, cache_filename, now, json.dumps(options or {}, sort_keys=True),
+             size, now, cost, self._priority(now, size, cost),
+             # A recapture keeps the popularity that refresh-ahead is based on
+             previous[0][1] if previous else 0,
+             validators.get('etag'), validators.get('last_modified'), validators.get('body_hash'))
+        )
+        self._adjust_totals(entries=0 if previous else 1, size=size if new_file else 0)
+        if previous and previous[0][0] != cache_filename:
+            self._release_files({previous[0][0]: previous[0][2]})
+        # Failures of this entry's captures, whatever waits they used
+        self._execute("DELETE FROM failures WHERE image_key = ?", (cache_key,))
+        
+        logger.debug(f"Saved to cache: {url}")
+        self._enforce_budget(keep=cache_key)
+    
+    def _inflation(self) -> float:
+        """GreedyDual-Size inflation value L."""
+        rows = self._execute("SELECT value FROM settings WHERE name = 'gds_inflation'")
+        return rows[0][0] if rows else 0.0
+    
+    def _priority(self, now: float, size: int, cost: float) -> float:
+        """
+        Eviction priority of an entry used at ``now``; lowest is evicted first.
+        
+        'lru' uses the access time. 'gds' (GreedyDual-Size) uses the
+        inflation value L plus cost per byte, so small, slow-to-capture
+        images outlive large, cheap ones; L rises to each evicted priority,
+        letting recently used entries outrank stale ones.
+        """
+        if browser_config.cache_eviction != "gds":
+            return now
+        # Unknown costs count as one second; sizes are in megabytes
+        return self._inflation() + (cost or 1.0) / max(size / 1e6, 1e-6)
+    
+    def _touch(self, cache_key: str, hits: int = 1) -> None:
+        """Record hits for eviction ordering and refresh-ahead."""
+        now = time.time()
+        if browser_config.cache_eviction == "gds":
+            # Same formula as _priority, evaluated against the stored size and cost
+            priority, params = (
+                "? + (CASE WHEN cost > 0 THEN cost ELSE 1.0 END) / MAX(size / 1e6, 1e-6)",
+                (self._inflation(),)
+            )
+        else:
+            priority, params = "?", (now,)
+        self._execute(
+            f"UPDATE entries SET hits = hits + ?, last_access = ?, priority = {priority} WHERE key = ?",
+            (hits, now) + params + (cache_key,)
+        )
+    
+    def _flush_memory_hits(self) -> None:
+        """Write hits served from memory to the index."""
+        with self._lock:
+            if not self._memory_hits:
+                return
+            pending, self._memory_hits = self._memory_hits, {}
+            for cache_key, hits in pending.items():
+                self._touch(cache_key, hits)
+    
+    def _over_budget(self) -> bool:
+        """Whether the cache exceeds ``max_cache_entries`` or ``max_cache_bytes``."""
+        entries, size = self._totals()
+        if browser_config.max_cache_entries and entries > browser_config.max_cache_entries:
+            return True
+        return bool(browser_config.max_cache_bytes) and size > browser_config.max_cache_bytes
+    
+    def _enforce_budget(self, keep: Optional[str] = None) -> None:
+        """Evict lowest-priority entries until within budget. Caller holds ``_exclusive``."""
+        if not (browser_config.max_cache_entries or browser_config.max_cache_bytes):
+            return
+        
+        evicted = 0
+        while self._over_budget():
+            victims = self._execute(
+                "SELECT key, filename, priority, size FROM entries WHERE key != ? "
+                "ORDER BY priority LIMIT 1",
+                (keep or "",)
+            )
+            if not victims:
+                break
+            key, filename, priority, size = victims[0]
+            self._execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._adjust_totals(entries=-1)
+            self.memory.discard(key)
+            self._release_files({filename: size})
+            if browser_config.cache_eviction == "gds":
+                self._execute(
+                    "INSERT OR REPLACE INTO settings (name, value) VALUES ('gds_inflation', ?)",
+                    (priority,)
+                )
+            evicted += 1
+        
+        if evicted:
+            self._count('evictions', evicted)
+            logger.debug(f"Evicted {evicted} cache entries to stay within budget")
+    
+    def _release_files(self, files: Dict[str, int]) -> None:
+        """
+        Delete cache files no longer referenced by any entry. Caller holds ``_exclusive``.
+        
+        Args:
+            files: Sizes of candidate files, by index filename
+        """
+        for filename, size in files.items():
+            if self._execute("SELECT 1 FROM entries WHERE filename = ? LIMIT 1", (filename,)):
+                continue
+            self._adjust_totals(size=-size)
+            try:
+                (self.cache_dir / filename).unlink()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to delete cache file: {e}")
+    
     def cleanup_old_cache(self, force: bool = False):
         """Remove expired cache entries."""
-        now = datetime.now()
-        expired_keys = []
-        
         ttl_multiplier = 1 if force else 2
-        max_age = timedelta(hours=browser_config.cache_ttl_hours * ttl_multiplier)
-        
-        for key, entry in self.metadata.items():
-            cached_time = datetime.fromisoformat(entry['timestamp'])
-            if now - cached_time > max_age:
-                expired_keys.append(key)
-                
-                # Delete file
-                cache_path = self.cache_dir / entry['filename']
-                if cache_path.exists():
-                    try:
-                        cache_path.unlink()
-                    except Exception as e:
-                        logger.warning(f"Failed to delete cache file: {e}")
+        max_age_hours = browser_config.cache_ttl_hours * ttl_multiplier
+        if not force:
+            # Keep entries still servable under stale-while-revalidate
+            max_age_hours = max(max_age_hours, browser_config.cache_ttl_hours + browser_config.cache_stale_hours)
+        cutoff = time.time() - max_age_hours * 3600
         
-        # Remove from metadata
-        for key in expired_keys:
-            del self.metadata[key]
+        with self._exclusive():
+            # Uses the created_at index rather than scanning every entry
+            expired = self._execute(
+                "SELECT key, filename, size FROM entries WHERE created_at < ?", (cutoff,)
+            )
+            
+            # Remove from index, then delete files no live entry shares
+            self._execute("DELETE FROM entries WHERE created_at < ?", (cutoff,))
+            self._adjust_totals(entries=-len(expired))
+            self._release_files({filename: size for _, filename, size in expired})
+            self._execute("DELETE FROM failures WHERE expires_at < ?", (time.time(),))
         
-        if expired_keys:
-            self._save_metadata()
-            logger.info(f"Cleaned up {len(expired_keys)} expired cache entries")
+        if expired:
+            self._count('expired', len(expired))
+            logger.info(f"Cleaned up {len(expired)} expired cache entries")
     
     def clear_cache(self):
         """Clear all cache entries."""
-        # Delete all cache files
-        for cache_file in self.cache_dir.glob("*.png"):
-            try:
-                cache_file.unlink()
-            except Exception as e:
-                logger.warning(f"Failed to delete {cache_file}: {e}")
-        
-        # Clear metadata
-        self.metadata.clear()
-        self._save_metadata()
+        with self._exclusive():
+            # Delete all cache files
+            for cache_file in self.cache_dir.rglob("*.png"):
+                try:
+                    cache_file.unlink()
+                except Exception as e:
+                    logger.warning(f"Failed to delete {cache_file}: {e}")
+            
+            # Clear index
+            self._execute("DELETE FROM entries")
+            self._execute("DELETE FROM failures")
+            self._recount_totals()
+            self.memory.clear()
         logger.info("Cleared all cache")
     
     def get_cache_stats(self) -> Dict[str, Any]:
-        """Get cache statistics."""
-        total_size = sum(f.stat().st_size for f in self.cache_dir.glob("*.png"))
+        """
+        Get cache statistics.
+        
+        Constant-time: totals are kept up to date on every insert and
+        removal, oldest and newest are single seeks on the created_at index,
+        and counters (hits, misses, bytes and seconds saved, ...) are held
+        in memory. Totals cover every process sharing ``cache_dir``;
+        counters cover this process since start or ``reset_stats``.
+        """
+        entries, total_size = self._totals()
+        oldest, newest = self._execute(
+            "SELECT (SELECT MIN(created_at) FROM entries), (SELECT MAX(created_at) FROM entries)"
+        )[0]
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters['hits'] + counters['stale_hits'] + counters['misses'] + counters['failure_hits']
         
         return {
-            'total_entries': len(self.metadata),
+            'total_entries': entries,
             'total_size_mb': total_size / (1024 * 1024),
+            'total_bytes': total_size,
             'cache_dir': str(self.cache_dir),
-            'oldest_entry': min(
-                (datetime.fromisoformat(e['timestamp']) for e in self.metadata.values()),
-                default=None
-            ),
-            'newest_entry': max(
-                (datetime.fromisoformat(e['timestamp']) for e in self.metadata.values()),
-                default=None
-            )
+            'oldest_entry': datetime.fromtimestamp(oldest) if oldest is not None else None,
+            'newest_entry': datetime.fromtimestamp(newest) if newest is not None else None,
+            'memory_entries': len(self.memory),
+            'memory_bytes': self.memory.size,
+            **counters,
+            'hit_rate': (counters['hits'] + counters['stale_hits']) / lookups if lookups else 0.0,
         }
+    
+    def reset_stats(self) -> None:
+        """Zero this process's hit, miss and savings counters."""
+        with self._lock:
+            self._counters = dict.fromkeys(_COUNTERS, 0)
+    
+    def close(self) -> None:
+        """Close the index database; the next use reopens it."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
 
 
 # Global cache instance
-screenshot_cache = ScreenshotCache()
\ No newline at end of file
+screenshot_cache = ScreenshotCache()
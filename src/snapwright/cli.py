@@ -4,18 +4,109 @@
 import argparse
 import sys
 from pathlib import Path
+from typing import List
 
-from . import capture_screenshot, batch_screenshots, __version__
+# Subsystems are imported where used: ``snapwright --version`` and captures
+# sent to a running daemon never load Playwright
+from . import __version__
+from .exceptions import DaemonError
+
+
+def daemon_main(argv: List[str]) -> None:
+    """Entry point for ``snapwright daemon``."""
+    parser = argparse.ArgumentParser(
+        prog="snapwright daemon",
+        description="Keep warm browsers running so CLI captures skip browser startup"
+    )
+    parser.add_argument(
+        "action",
+        choices=["start", "stop", "status"],
+        help="start (in the foreground), stop or query the daemon"
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        help="Unix socket path (default: $SNAPWRIGHT_SOCKET or a per-user runtime path)"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        help="Browser-owning threads (default: ACTOR_THREADS)"
+    )
+    
+    args = parser.parse_args(argv)
+    
+    from .daemon import DaemonClient, serve_daemon
+    
+    try:
+        if args.action == "start":
+            print("Starting snapwright daemon...")
+            serve_daemon(args.socket, threads=args.threads)
+        elif args.action == "stop":
+            DaemonClient(args.socket, timeout=5).shutdown()
+            print("Daemon stopped")
+        else:
+            stats = DaemonClient(args.socket, timeout=5).stats()
+            print(f"Daemon running (pid {stats['pid']}, up {stats['uptime']:.0f}s, "
+                  f"{stats['requests_served']} captures served)")
+            cache = stats.get('cache')
+            if cache:
+                print(f"Cache: {cache['total_entries']} entries, {cache['total_size_mb']:.1f} MB, "
+                      f"hit rate {cache['hit_rate']:.0%}, {cache['seconds_saved']:.0f}s of capture saved")
+    except DaemonError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def serve_main(argv: List[str]) -> None:
+    """Entry point for ``snapwright serve``."""
+    parser = argparse.ArgumentParser(
+        prog="snapwright serve",
+        description="Serve screenshots and extraction over HTTP from pooled browsers"
+    )
+    parser.add_argument(
+        "--host",
+        help="Interface to bind (default: SERVE_HOST or 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        help="Port to listen on (default: SERVE_PORT or 8700)"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        help="Pooled browsers, each running one capture at a time (default: ACTOR_THREADS)"
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        help="Requests waiting for a browser before answering 503 (default: SERVE_MAX_QUEUE)"
+    )
+    
+    args = parser.parse_args(argv)
+    
+    from .server import serve
+    
+    print("Starting snapwright service...")
+    serve(args.host, args.port, threads=args.threads, max_queue=args.max_queue)
 
 
 def main():
     """Main CLI entry point."""
+    if sys.argv[1:2] == ["daemon"]:
+        return daemon_main(sys.argv[2:])
+    if sys.argv[1:2] == ["serve"]:
+        return serve_main(sys.argv[2:])
+    
     parser = argparse.ArgumentParser(
         description="Capture website screenshots using Playwright",
         epilog="Examples:\n"
                "  snapwright https://example.com\n"
                "  snapwright https://example.com --output screenshot.png\n"
-               "  snapwright --batch urls.txt --output-dir screenshots/",
+               "  snapwright --batch urls.txt --output-dir screenshots/\n"
+               "  snapwright daemon start\n"
+               "  snapwright serve --port 8700",
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     
@@ -98,6 +189,13 @@ def main():
         help="Delay between batch captures (ms, default: 1000)"
     )
     
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for batch mode, each with its own browser (default: 1)"
+    )
+    
     # Cache options
     parser.add_argument(
         "--no-cache",
@@ -106,6 +204,13 @@ def main():
         help="Disable cache"
     )
     
+    parser.add_argument(
+        "--no-daemon",
+        action="store_false",
+        dest="use_daemon",
+        help="Capture in this process even if a snapwright daemon is running"
+    )
+    
     # Device options
     parser.add_argument(
         "--mobile",
@@ -115,8 +220,7 @@ def main():
     
     parser.add_argument(
         "--device",
-        choices=["iPhone 12", "iPad", "Pixel 5"],
-        help="Specific device to emulate"
+        help="Device to emulate, any Playwright device name (e.g. \"iPhone 12\", \"Pixel 5\")"
     )
     
     args = parser.parse_args()
@@ -149,13 +253,26 @@ def main():
             
             print(f"Processing {len(urls)} URLs...")
             
-            results = batch_screenshots(
-                urls,
-                output_dir=args.output_dir,
-                full_page=args.full_page,
-                use_cache=args.use_cache,
-                delay_between=args.delay
-            )
+            if args.workers > 1:
+                from .parallel import parallel_batch_screenshots
+                
+                results = parallel_batch_screenshots(
+                    urls,
+                    output_dir=args.output_dir,
+                    full_page=args.full_page,
+                    use_cache=args.use_cache,
+                    workers=args.workers
+                )
+            else:
+                from .core import batch_screenshots
+                
+                results = batch_screenshots(
+                    urls,
+                    output_dir=args.output_dir,
+                    full_page=args.full_page,
+                    use_cache=args.use_cache,
+                    delay_between=args.delay
+                )
             
             # Print results
             success_count = sum(1 for path in results.values() if path)
@@ -169,9 +286,7 @@ def main():
             # Single URL mode
             print(f"Capturing: {args.url}")
             
-            path = capture_screenshot(
-                args.url,
-                output_path=args.output,
+            options = dict(
                 full_page=args.full_page,
                 selector=args.selector,
                 wait_for=args.wait_for,
@@ -182,6 +297,23 @@ def main():
                 device_name=args.device
             )
             
+            from .daemon import DaemonClient, daemon_available
+            
+            path = None
+            captured = False
+            if args.use_daemon and daemon_available():
+                # A running daemon already has a warm browser
+                try:
+                    path = DaemonClient().capture_screenshot(args.url, output_path=args.output, **options)
+                    captured = True
+                except DaemonError as e:
+                    print(f"Daemon unavailable, capturing locally: {e}", file=sys.stderr)
+            
+            if not captured:
+                from .core import capture_screenshot
+                
+                path = capture_screenshot(args.url, output_path=args.output, **options)
+            
             if path:
                 print(f"Screenshot saved to: {path}")
             else:
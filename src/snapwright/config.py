@@ -2,7 +2,26 @@
 
 import os
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Optional, Literal, cast
+
+# Seconds a failed capture is remembered, per exception class ('default' for
+# the rest; 'CaptureFailed' is a capture that ran out of retries)
+DEFAULT_FAILURE_TTLS = {
+    "NavigationError": 900,  # DNS failures, refused connections
+    "TimeoutError": 300,
+    "ElementNotFoundError": 300,
+    "CaptureFailed": 300,
+    "default": 60,
+}
+
+# Query parameters dropped from URLs before caching (shell-style patterns)
+DEFAULT_TRACKING_PARAMS = [
+    "utm_*", "gclid", "dclid", "gbraid", "wbraid", "fbclid", "msclkid",
+    "yclid", "mc_cid", "mc_eid", "_ga", "_gl", "igshid",
+]
+
+# Page load states accepted by Playwright's goto(wait_until=...)
+WaitUntil = Literal["commit", "domcontentloaded", "load", "networkidle"]
 
 
 @dataclass
@@ -19,18 +38,58 @@ class BrowserConfig:
     cache_enabled: bool = True
     cache_dir: str = "cache/screenshots"
     cache_ttl_hours: int = 6
+    cache_delivery: str = "reflink"  # How cached files reach output paths: hardlink, reflink or copy
+    max_cache_bytes: int = 0  # Evict beyond this many bytes of images (0 = unbounded)
+    max_cache_entries: int = 0  # Evict beyond this many entries (0 = unbounded)
+    cache_eviction: str = "lru"  # "lru" or "gds" (GreedyDual-Size: weighs size and capture cost)
+    memory_cache_mb: int = 0  # In-process cache of hot screenshot bytes (0 = off)
+    cache_stale_hours: int = 0  # Serve entries this long past TTL while recapturing in the background (0 = off)
+    cache_refresh_ahead: float = 0.0  # Recapture popular entries in this last fraction of their TTL (0 = off)
+    cache_refresh_min_hits: int = 3  # Hits that make an entry popular enough to refresh ahead
+    cache_revalidate: bool = False  # Extend expired entries whose HTML document is unchanged (ETag/Last-Modified/hash)
+    canonicalize_urls: bool = True  # Key the cache and dedupe batches by canonical URL (see urls.canonicalize_url)
+    tracking_params: list = field(default_factory=lambda: list(DEFAULT_TRACKING_PARAMS))
+    cache_failures: bool = True  # Fail fast on URLs whose capture failed recently
+    failure_ttls: dict = field(default_factory=lambda: dict(DEFAULT_FAILURE_TTLS))
+    
+    # Extraction
+    static_extract: bool = False  # Try a plain HTTP fetch and HTML parse before the browser (needs selectolax)
+    static_domain_ttl: int = 3600  # Seconds a domain whose pages need the browser skips the static path
+    http_pool_size: int = 4  # Idle keep-alive connections kept per host for static fetches
     
     # Resource limits
-    max_contexts: int = 3
+    max_contexts: int = 3  # Per emulation profile
+    max_profiles: int = 4  # Emulation profiles kept warm (LRU)
     max_retries: int = 2
+    max_concurrency: int = 8  # Pages in flight for async batches
+    batch_workers: int = 0  # Worker processes for parallel batches (0 = CPU count)
+    worker_max_captures: int = 200  # Captures before a worker relaunches its browser
+    actor_threads: int = 2  # Browser-owning threads in a BrowserActorPool
+    page_pool_size: int = 4  # Idle pages kept ready per context
+    page_max_uses: int = 50  # Captures before a pooled page is recycled
+    context_max_age: int = 1800  # Seconds before a context is recycled (0 = never)
+    context_max_uses: int = 500  # Pages before a context is recycled (0 = never)
+    warm_standby: bool = False  # Keep a spare browser ready to replace a crashed one
+    max_crash_requeues: int = 2  # Times a capture is retried after a browser crash
+    
+    # Memory watchdog (Chromium process tree RSS, Linux only)
+    memory_check_interval: int = 30  # Seconds between samples (0 = off)
+    memory_soft_limit_mb: int = 0  # Recycle contexts above this (0 = off)
+    memory_hard_limit_mb: int = 0  # Recycle the whole browser above this (0 = off)
+    
+    # HTTP service (snapwright serve)
+    serve_host: str = "127.0.0.1"
+    serve_port: int = 8700
+    serve_max_queue: int = 32  # Requests waiting for a browser before 503s
     
     # Behavior
-    wait_until: str = "networkidle"  # or "load", "domcontentloaded"
+    wait_until: WaitUntil = "networkidle"  # or "load", "domcontentloaded", "commit"
     ignore_https_errors: bool = True
     
     # Paths
     downloads_dir: str = "temp/downloads"
     default_output_dir: str = "screenshots"
+    daemon_socket: str = ""  # Empty = $XDG_RUNTIME_DIR/snapwright.sock or /tmp
     
     # Browser launch args
     browser_args: list = field(default_factory=lambda: [
@@ -53,10 +112,57 @@ class BrowserConfig:
             cache_enabled=os.getenv("SCREENSHOT_CACHE", "true").lower() == "true",
             cache_dir=os.getenv("CACHE_DIR", "cache/screenshots"),
             cache_ttl_hours=int(os.getenv("CACHE_TTL_HOURS", "6")),
+            cache_delivery=os.getenv("CACHE_DELIVERY", "reflink"),
+            max_cache_bytes=int(os.getenv("MAX_CACHE_BYTES", "0")),
+            max_cache_entries=int(os.getenv("MAX_CACHE_ENTRIES", "0")),
+            cache_eviction=os.getenv("CACHE_EVICTION", "lru"),
+            memory_cache_mb=int(os.getenv("MEMORY_CACHE_MB", "0")),
+            cache_stale_hours=int(os.getenv("CACHE_STALE_HOURS", "0")),
+            cache_refresh_ahead=float(os.getenv("CACHE_REFRESH_AHEAD", "0")),
+            cache_refresh_min_hits=int(os.getenv("CACHE_REFRESH_MIN_HITS", "3")),
+            cache_revalidate=os.getenv("CACHE_REVALIDATE", "false").lower() == "true",
+            canonicalize_urls=os.getenv("CANONICALIZE_URLS", "true").lower() == "true",
+            tracking_params=[
+                param.strip()
+                for param in os.getenv("TRACKING_PARAMS", ",".join(DEFAULT_TRACKING_PARAMS)).split(",")
+                if param.strip()
+            ],
+            cache_failures=os.getenv("CACHE_FAILURES", "true").lower() == "true",
+            failure_ttls={
+                **DEFAULT_FAILURE_TTLS,
+                **{
+                    name.strip(): int(ttl)
+                    for name, _, ttl in (
+                        item.partition("=") for item in os.getenv("FAILURE_TTLS", "").split(",")
+                    )
+                    if name.strip()
+                }
+            },
+            static_extract=os.getenv("STATIC_EXTRACT", "false").lower() == "true",
+            static_domain_ttl=int(os.getenv("STATIC_DOMAIN_TTL", "3600")),
+            http_pool_size=int(os.getenv("HTTP_POOL_SIZE", "4")),
             max_contexts=int(os.getenv("MAX_BROWSER_CONTEXTS", "3")),
+            max_profiles=int(os.getenv("MAX_EMULATION_PROFILES", "4")),
             max_retries=int(os.getenv("MAX_RETRIES", "2")),
-            wait_until=os.getenv("WAIT_UNTIL", "networkidle"),
+            max_concurrency=int(os.getenv("MAX_CONCURRENCY", "8")),
+            batch_workers=int(os.getenv("BATCH_WORKERS", "0")),
+            worker_max_captures=int(os.getenv("WORKER_MAX_CAPTURES", "200")),
+            actor_threads=int(os.getenv("ACTOR_THREADS", "2")),
+            page_pool_size=int(os.getenv("PAGE_POOL_SIZE", "4")),
+            page_max_uses=int(os.getenv("PAGE_MAX_USES", "50")),
+            context_max_age=int(os.getenv("CONTEXT_MAX_AGE", "1800")),
+            context_max_uses=int(os.getenv("CONTEXT_MAX_USES", "500")),
+            warm_standby=os.getenv("WARM_STANDBY_BROWSER", "false").lower() == "true",
+            max_crash_requeues=int(os.getenv("MAX_CRASH_REQUEUES", "2")),
+            memory_check_interval=int(os.getenv("MEMORY_CHECK_INTERVAL", "30")),
+            memory_soft_limit_mb=int(os.getenv("MEMORY_SOFT_LIMIT_MB", "0")),
+            memory_hard_limit_mb=int(os.getenv("MEMORY_HARD_LIMIT_MB", "0")),
+            serve_host=os.getenv("SERVE_HOST", "127.0.0.1"),
+            serve_port=int(os.getenv("SERVE_PORT", "8700")),
+            serve_max_queue=int(os.getenv("SERVE_MAX_QUEUE", "32")),
+            wait_until=cast(WaitUntil, os.getenv("WAIT_UNTIL", "networkidle")),
             ignore_https_errors=os.getenv("IGNORE_HTTPS_ERRORS", "true").lower() == "true",
+            daemon_socket=os.getenv("SNAPWRIGHT_SOCKET", ""),
         )
     
     def update(self, **kwargs):
@@ -4,13 +4,19 @@ import logging
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, Union, List
+from typing import Optional, Dict, Any, Union, List, Tuple
 
-from playwright.sync_api import Page, Error as PlaywrightError
+from playwright.sync_api import Page, Response, Error as PlaywrightError
 
-from .browser_manager import browser_manager
-from .cache import screenshot_cache
+from .browser_manager import BrowserManager, browser_manager
+from .cache import CacheEntry, screenshot_cache, detach_output
 from .config import browser_config
+from .extract import SelectorSpec, compile_selectors, extract_values, merge_extracted
+from .refresh import schedule_refresh
+from .responses import ResponseCapture, ResponsePattern
+from .revalidate import document_validators
+from .static import extract_static
+from .urls import dedupe_urls
 from .exceptions import (
     BrowserError, TimeoutError, NavigationError, 
     ElementNotFoundError, ScreenshotError
@@ -18,6 +24,62 @@ from .exceptions import (
 
 logger = logging.getLogger(__name__)
 
+# Exceptions a cached failure can be raised again as, by class name
+_FAILURE_TYPES = {
+    error.__name__: error
+    for error in (BrowserError, TimeoutError, NavigationError, ElementNotFoundError, ScreenshotError)
+}
+
+
+def _cached_failure(url: str, entry: CacheEntry) -> None:
+    """
+    Fail fast on a capture that failed recently.
+    
+    Raises the recorded exception again; captures that ran out of retries
+    (which return None rather than raising) return None.
+    """
+    retry_in = max(entry.retry_at - time.time(), 0)
+    logger.info(f"Skipping {url}: capture failed recently ({entry.error}), retrying in {retry_in:.0f}s")
+    error = _FAILURE_TYPES.get(entry.error or "")
+    if error is not None:
+        raise error(f"{entry.message} (cached failure, retrying in {retry_in:.0f}s)")
+    return None
+
+
+def _cache_options(
+    full_page: bool,
+    selector: Optional[str],
+    mobile: bool,
+    device_name: Optional[str],
+) -> Dict[str, Any]:
+    """Build the options dict that keys a screenshot in the cache."""
+    return {
+        'full_page': full_page,
+        'selector': selector,
+        'mobile': mobile,
+        'device_name': device_name
+    }
+
+
+def _failure_options(
+    cache_options: Dict[str, Any],
+    wait_for: Optional[Union[str, List[str]]],
+    wait_timeout: int,
+    extra_wait: int,
+) -> Dict[str, Any]:
+    """
+    Build the options dict that keys a failed capture.
+    
+    Waits are part of it: a caller whose ``wait_for`` timed out must not
+    make captures of the same page without that wait fail too.
+    """
+    return {
+        **cache_options,
+        'wait_for': wait_for,
+        'wait_timeout': wait_timeout,
+        'extra_wait': extra_wait
+    }
+
 
 def capture_screenshot(
     url: str,
@@ -30,6 +92,7 @@ def capture_screenshot(
     extra_wait: int = 0,
     mobile: bool = False,
     device_name: Optional[str] = None,
+    manager: Optional[BrowserManager] = None,
 ) -> Optional[Path]:
     """
     Capture a screenshot of a website or specific element.
@@ -44,11 +107,12 @@ def capture_screenshot(
         use_cache: Use cached screenshot if available
         extra_wait: Additional wait time after page load (ms)
         mobile: Use mobile viewport
-        device_name: Specific device to emulate (e.g., "iPhone 12")
+        device_name: Device from Playwright's registry to emulate (e.g., "iPhone 12")
+        manager: Browser manager to use (default: the shared singleton)
     
     Returns:
         Path to screenshot file, or None if failed
-        
+    
     Examples:
         # Simple full page screenshot
         capture_screenshot("https://example.com")
@@ -64,22 +128,27 @@ def capture_screenshot(
     """
     
     # Check cache first
-    cache_options = {
-        'full_page': full_page,
-        'selector': selector,
-        'mobile': mobile,
-        'device_name': device_name
-    }
+    cache_options = _cache_options(full_page, selector, mobile, device_name)
+    failure_options = _failure_options(cache_options, wait_for, wait_timeout, extra_wait)
     
     if use_cache:
-        cached = screenshot_cache.get_cached_path(url, cache_options)
-        if cached:
-            logger.info(f"Using cached screenshot for {url}")
-            if output_path and str(cached) != str(output_path):
-                import shutil
-                shutil.copy2(cached, output_path)
-                return Path(output_path)
-            return cached
+        entry = (
+            screenshot_cache.lookup(url, cache_options, failure_options=failure_options)
+            or screenshot_cache.revalidate(url, cache_options)
+        )
+        if entry and entry.error:
+            _cached_failure(url, entry)
+            return None
+        if entry:
+            logger.info(f"Using {'stale ' if entry.stale else ''}cached screenshot for {url}")
+            if entry.refresh:
+                schedule_refresh(
+                    url, cache_options,
+                    wait_for=wait_for, wait_timeout=wait_timeout, extra_wait=extra_wait
+                )
+            if output_path and entry.path and str(entry.path) != str(output_path):
+                return screenshot_cache.deliver(entry.path, output_path)
+            return entry.path
     
     # Generate output path if not provided
     if output_path is None:
@@ -89,43 +158,177 @@ def capture_screenshot(
         output_path = Path(output_path)
     
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    # Never render into a file hardlinked to a cached copy
+    detach_output(output_path)
+    
+    started = time.monotonic()
+    rendered = _render_screenshot(
+        url, output_path, full_page, selector, wait_for, wait_timeout,
+        extra_wait, mobile, device_name, manager,
+        failure_key=failure_options if use_cache else None, cache_options=cache_options
+    )
+    if rendered is None:
+        return None
+    
+    # Save to cache, with the capture time as its eviction cost
+    if use_cache:
+        screenshot_cache.save_to_cache(
+            url, output_path, cache_options,
+            cost=time.monotonic() - started, validators=rendered[1]
+        )
+    
+    return output_path
+
+
+def capture_screenshot_bytes(
+    url: str,
+    full_page: bool = True,
+    selector: Optional[str] = None,
+    wait_for: Optional[Union[str, List[str]]] = None,
+    wait_timeout: int = 5000,
+    use_cache: bool = True,
+    extra_wait: int = 0,
+    mobile: bool = False,
+    device_name: Optional[str] = None,
+    manager: Optional[BrowserManager] = None,
+) -> Optional[bytes]:
+    """
+    Capture a screenshot and return the PNG bytes without writing an output file.
+    
+    Takes the same options as ``capture_screenshot``. Captures are still
+    stored in the screenshot cache when ``use_cache`` is set, and hot
+    entries are served from memory when ``memory_cache_mb`` is set.
+    
+    Returns:
+        PNG image bytes, or None if failed
+    """
+    cache_options = _cache_options(full_page, selector, mobile, device_name)
+    failure_options = _failure_options(cache_options, wait_for, wait_timeout, extra_wait)
+    
+    if use_cache:
+        entry = (
+            screenshot_cache.lookup(url, cache_options, read=True, failure_options=failure_options)
+            or screenshot_cache.revalidate(url, cache_options, read=True)
+        )
+        if entry and entry.error:
+            _cached_failure(url, entry)
+            return None
+        if entry:
+            logger.info(f"Using {'stale ' if entry.stale else ''}cached screenshot for {url}")
+            if entry.refresh:
+                schedule_refresh(
+                    url, cache_options,
+                    wait_for=wait_for, wait_timeout=wait_timeout, extra_wait=extra_wait
+                )
+            return entry.data
+    
+    started = time.monotonic()
+    rendered = _render_screenshot(
+        url, None, full_page, selector, wait_for, wait_timeout,
+        extra_wait, mobile, device_name, manager,
+        failure_key=failure_options if use_cache else None, cache_options=cache_options
+    )
+    if rendered is None:
+        return None
+    
+    data, validators = rendered
+    if use_cache:
+        screenshot_cache.save_bytes_to_cache(
+            url, data, cache_options,
+            cost=time.monotonic() - started, validators=validators
+        )
+    
+    return data
+
+
+def refresh_screenshot(
+    url: str,
+    full_page: bool = True,
+    selector: Optional[str] = None,
+    mobile: bool = False,
+    device_name: Optional[str] = None,
+    wait_for: Optional[Union[str, List[str]]] = None,
+    wait_timeout: int = 5000,
+    extra_wait: int = 0,
+    manager: Optional[BrowserManager] = None,
+) -> Optional[bytes]:
+    """
+    Recapture ``url`` and replace its cache entry, ignoring any cached copy.
+    
+    Used for background refreshes; returns the new PNG bytes, or None if failed.
+    With ``cache_revalidate`` set, an unchanged page only renews the entry.
+    """
+    cache_options = _cache_options(full_page, selector, mobile, device_name)
+    entry = screenshot_cache.revalidate(url, cache_options, read=True)
+    if entry:
+        return entry.data
+    
+    started = time.monotonic()
+    rendered = _render_screenshot(
+        url, None, full_page, selector, wait_for, wait_timeout,
+        extra_wait, mobile, device_name, manager,
+        failure_key=_failure_options(cache_options, wait_for, wait_timeout, extra_wait),
+        cache_options=cache_options
+    )
+    if rendered is None:
+        return None
+    
+    data, validators = rendered
+    screenshot_cache.save_bytes_to_cache(
+        url, data, cache_options,
+        cost=time.monotonic() - started, validators=validators
+    )
+    return data
+
+
+def _render_screenshot(
+    url: str,
+    output_path: Optional[Path],
+    full_page: bool,
+    selector: Optional[str],
+    wait_for: Optional[Union[str, List[str]]],
+    wait_timeout: int,
+    extra_wait: int,
+    mobile: bool,
+    device_name: Optional[str],
+    manager: Optional[BrowserManager],
+    failure_key: Optional[Dict[str, Any]] = None,
+    cache_options: Optional[Dict[str, Any]] = None,
+) -> Optional[Tuple[bytes, Dict[str, str]]]:
+    """
+    Render ``url`` on a pooled page, with retries and crash requeues.
+    
+    Writes the PNG to ``output_path`` when given. Returns the PNG bytes and
+    the main document's validators (see ``document_validators``), or None
+    once retries are exhausted. Failures are recorded in the cache under
+    the options ``failure_key`` when given, tied to the image entry keyed
+    by ``cache_options`` so that a successful capture clears them.
+    """
+    if manager is None:
+        manager = browser_manager
+    
+    path = str(output_path) if output_path else None
     
     # Capture screenshot
-    page = None
-    for attempt in range(browser_config.max_retries):
+    attempt = 0
+    requeues = 0
+    while attempt < browser_config.max_retries:
+        page = None
+        generation = None
+        succeeded = False
         try:
-            # Get browser context
-            context = browser_manager.get_context()
-            
-            # Configure for mobile if requested
-            if mobile or device_name:
-                # Close and recreate context with device emulation
-                devices = {
-                    "iPhone 12": {"width": 390, "height": 844, "deviceScaleFactor": 3},
-                    "iPad": {"width": 820, "height": 1180, "deviceScaleFactor": 2},
-                    "Pixel 5": {"width": 393, "height": 851, "deviceScaleFactor": 2.75},
-                }
-                
-                if device_name and device_name in devices:
-                    device = devices[device_name]
-                else:
-                    device = {"width": 375, "height": 667, "deviceScaleFactor": 2}
-                
-                page = context.new_page(
-                    viewport={'width': device['width'], 'height': device['height']},
-                    device_scale_factor=device['deviceScaleFactor'],
-                    is_mobile=True,
-                    has_touch=True
-                )
-            else:
-                page = context.new_page()
+            # Mobile and device captures use contexts built for their profile
+            profile = manager.resolve_profile(mobile, device_name)
+            page = manager.checkout_page(profile)
+            generation = manager.generation
             
             # Navigate to URL
             logger.info(f"Navigating to {url}")
             try:
-                page.goto(url, wait_until=browser_config.wait_until, timeout=browser_config.timeout)
+                response = page.goto(url, wait_until=browser_config.wait_until, timeout=browser_config.timeout)
             except PlaywrightError as e:
                 raise NavigationError(f"Failed to navigate to {url}: {e}")
+            validators = _response_validators(response)
             
             # Wait for specific element(s) if requested
             if wait_for:
@@ -147,109 +350,196 @@ def capture_screenshot(
                     # Screenshot specific element
                     element = page.query_selector(selector)
                     if element:
-                        element.screenshot(path=str(output_path))
+                        data = element.screenshot(path=path)
                     else:
                         raise ElementNotFoundError(f"Selector '{selector}' not found")
                 else:
                     # Full page or viewport screenshot
-                    page.screenshot(
-                        path=str(output_path),
+                    data = page.screenshot(
+                        path=path,
                         full_page=full_page
                     )
             except PlaywrightError as e:
                 raise ScreenshotError(f"Failed to capture screenshot: {e}")
             
-            logger.info(f"Screenshot saved to {output_path}")
+            if path:
+                logger.info(f"Screenshot saved to {output_path}")
             
-            # Save to cache
-            if use_cache:
-                screenshot_cache.save_to_cache(url, output_path, cache_options)
+            succeeded = True
+            return data, validators
+        
+        except Exception as e:
+            # A browser crash is not the URL's fault: requeue the capture on
+            # the relaunched browser without spending a retry
+            if (
+                generation is not None
+                and requeues < browser_config.max_crash_requeues
+                and manager.crashed_since(generation)
+            ):
+                requeues += 1
+                logger.warning(f"Browser crashed while capturing {url}, requeuing ({requeues})")
+                continue
             
-            return output_path
+            if isinstance(e, BrowserError):
+                # Re-raise our custom exceptions
+                if failure_key is not None:
+                    screenshot_cache.record_failure(
+                        url, failure_key, type(e).__name__, str(e), image_options=cache_options
+                    )
+                raise
             
-        except BrowserError:
-            # Re-raise our custom exceptions
-            raise
-        except Exception as e:
-            logger.warning(f"Screenshot attempt {attempt + 1} failed: {e}")
-            if attempt == browser_config.max_retries - 1:
-                logger.error(f"Failed to capture screenshot after {browser_config.max_retries} attempts")
+            attempt += 1
+            logger.warning(f"Screenshot attempt {attempt} failed: {e}")
+            if attempt == browser_config.max_retries:
+                message = f"Failed to capture screenshot after {browser_config.max_retries} attempts"
+                logger.error(message)
+                if failure_key is not None:
+                    screenshot_cache.record_failure(
+                        url, failure_key, "CaptureFailed", f"{message}: {e}", image_options=cache_options
+                    )
                 return None
         
         finally:
             if page:
-                try:
-                    page.close()
-                except:
-                    pass
+                # Pages in an unknown state after a failure are not reused
+                manager.checkin_page(page, discard=not succeeded)
+    
+    # Only reached when max_retries allows no attempts at all
+    raise ScreenshotError(f"No capture attempts allowed for {url} (max_retries={browser_config.max_retries})")
+
+
+def _response_validators(response: Optional[Response]) -> Dict[str, str]:
+    """Revalidation validators of a main document response, if any."""
+    if response is None:
+        return {}
+    try:
+        body = response.body()
+    except Exception:
+        body = None  # Redirected or bodiless documents only keep their headers
+    try:
+        return document_validators(response.headers, body)
+    except Exception:
+        return {}
+
+
+def _extract_result(url: str, error: Optional[str] = None) -> Dict[str, Any]:
+    """A ``browse_and_extract`` result with nothing extracted yet, or for a failed job."""
+    return {
+        'url': url,
+        'timestamp': datetime.now().isoformat(),
+        'extracted': {},
+        'screenshot': None,
+        'error': error,
+        'engine': 'browser',
+        'responses': {}
+    }
 
 
 def browse_and_extract(
     url: str,
-    extract_selectors: Dict[str, str],
+    extract_selectors: Dict[str, SelectorSpec],
     screenshot: bool = False,
     screenshot_path: Optional[Path] = None,
     wait_for: Optional[str] = None,
-    wait_timeout: int = 5000
+    wait_timeout: int = 5000,
+    manager: Optional[BrowserManager] = None,
+    static: Optional[bool] = None,
+    capture_responses: Optional[Dict[str, ResponsePattern]] = None
 ) -> Dict[str, Any]:
     """
     Browse a website and extract data from specific elements.
     
     Args:
         url: Website URL
-        extract_selectors: Dict mapping names to CSS selectors
+        extract_selectors: Dict mapping names to selectors. A CSS selector
+            ending in "@name" reads that attribute; a dict such as
+            {"selector": "input", "property": "value", "all": True} reads a
+            DOM property and always returns a list. Plain CSS selectors run
+            in a single page.evaluate call; Playwright selectors (text=,
+            xpath=, >>, :has-text(), ...) keep their Playwright meaning.
         screenshot: Also take a screenshot
         screenshot_path: Where to save screenshot
         wait_for: Wait for selector before extracting
-        wait_timeout: Timeout for wait_for
+        wait_timeout: Timeout for wait_for, and for capture_responses
+            patterns still unmatched after navigation
+        manager: Browser manager to use (default: the shared singleton)
+        static: Try a plain HTTP fetch and HTML parse first, using the
+            browser only if that finds nothing (default:
+            browser_config.static_extract; ignored with screenshot=True
+            or capture_responses)
+        capture_responses: Dict mapping names to URL patterns of the
+            page's own XHR/fetch responses to return (see
+            snapwright.responses). With no selectors, screenshot or
+            wait_for, the call returns as soon as every pattern matched
+            instead of waiting for the page to settle.
     
     Returns:
-        Dict with extracted data and optional screenshot path
-        
+        Dict with extracted data, captured response bodies, optional
+        screenshot path and the engine ('static' or 'browser') that
+        produced it
+    
     Example:
         data = browse_and_extract(
             "https://example.com/weather",
             {
                 "temperature": ".temp-value",
                 "condition": ".weather-condition",
-                "humidity": ".humidity-value"
+                "humidity": ".humidity-value",
+                "radar": "img.radar@src"
             },
             screenshot=True
         )
+        
+        # JSON the page fetches itself, without waiting for it to render
+        data = browse_and_extract(
+            "https://example.com/shop",
+            {},
+            capture_responses={"products": "*/api/products*"}
+        )
+        products = data['responses']['products']
     """
-    result = {
-        'url': url,
-        'timestamp': datetime.now().isoformat(),
-        'extracted': {},
-        'screenshot': None,
-        'error': None
-    }
+    result = _extract_result(url)
+    
+    if static is None:
+        static = browser_config.static_extract
+    if static and not screenshot and not capture_responses:
+        extracted = extract_static(url, extract_selectors, wait_for=wait_for)
+        if extracted is not None:
+            result['extracted'] = extracted
+            result['engine'] = 'static'
+            return result
+    
+    if manager is None:
+        manager = browser_manager
     
     page = None
+    capture = None
     try:
-        context = browser_manager.get_context()
-        page = context.new_page()
+        wait_until = browser_config.wait_until
+        if capture_responses:
+            capture = ResponseCapture(capture_responses)
+            if not (extract_selectors or screenshot or wait_for):
+                # Only responses wanted: they are awaited below, not the render
+                wait_until = "commit"
+        
+        page = manager.checkout_page()
+        if capture:
+            page.on("response", capture.on_response)
         
         # Navigate
-        page.goto(url, wait_until=browser_config.wait_until, timeout=browser_config.timeout)
+        page.goto(url, wait_until=wait_until, timeout=browser_config.timeout)
+        
+        if capture:
+            capture.wait(page, wait_timeout)
         
         # Wait for content if specified
         if wait_for:
             page.wait_for_selector(wait_for, timeout=wait_timeout)
         
-        # Extract data
-        for name, selector in extract_selectors.items():
-            try:
-                elements = page.query_selector_all(selector)
-                if elements:
-                    if len(elements) == 1:
-                        result['extracted'][name] = elements[0].text_content().strip()
-                    else:
-                        result['extracted'][name] = [el.text_content().strip() for el in elements]
-                else:
-                    result['extracted'][name] = None
-            except Exception as e:
-                result['extracted'][name] = f"Error: {str(e)}"
+        # Plain CSS selectors are extracted in one round trip
+        specs, errors = compile_selectors(extract_selectors)
+        values = extract_values(page, specs) if specs else {}
+        result['extracted'] = merge_extracted(extract_selectors, values, errors)
         
         # Take screenshot if requested
         if screenshot:
@@ -258,6 +548,9 @@ def browse_and_extract(
             
             page.screenshot(path=str(screenshot_path), full_page=True)
             result['screenshot'] = str(screenshot_path)
+        
+        if capture:
+            result['responses'] = capture.bodies()
     
     except Exception as e:
         result['error'] = str(e)
@@ -265,10 +558,10 @@ def browse_and_extract(
     
     finally:
         if page:
-            try:
-                page.close()
-            except:
-                pass
+            if capture:
+                # Pages are pooled; the next user must not feed this capture
+                page.remove_listener("response", capture.on_response)
+            manager.checkin_page(page, discard=result['error'] is not None)
     
     return result
 
@@ -284,6 +577,9 @@ def batch_screenshots(
     """
     Capture screenshots of multiple URLs efficiently.
     
+    URLs that canonicalize to the same page (see ``canonicalize_url``) are
+    captured once, from the first of them as given, and share a screenshot.
+    
     Args:
         urls: List of URLs to capture
         output_dir: Directory for screenshots
@@ -302,13 +598,16 @@ def batch_screenshots(
     
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    results = {}
+    results: Dict[str, Optional[Path]] = {url: None for url in urls}
+    groups = dedupe_urls(urls)
     
-    for i, url in enumerate(urls):
+    for i, inputs in enumerate(groups.values()):
+        # Dedupe on the canonical form but load the URL as given
+        url = inputs[0]
         filename = f"{name_prefix}_{i:03d}_{int(time.time())}.png"
         output_path = output_dir / filename
         
-        logger.info(f"Capturing {i+1}/{len(urls)}: {url}")
+        logger.info(f"Capturing {i+1}/{len(groups)}: {url}")
         
         screenshot_path = capture_screenshot(
             url,
@@ -317,10 +616,11 @@ def batch_screenshots(
             use_cache=use_cache
         )
         
-        results[url] = screenshot_path
+        for original in inputs:
+            results[original] = screenshot_path
         
         # Delay between captures to be respectful
-        if i < len(urls) - 1 and delay_between > 0:
+        if i < len(groups) - 1 and delay_between > 0:
             time.sleep(delay_between / 1000)
     
     return results
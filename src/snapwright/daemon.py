@@ -0,0 +1,273 @@
+"""Persistent daemon that keeps warm browsers behind a Unix domain socket.
+
+Start it once:
+    snapwright daemon start
+
+Later ``snapwright URL`` invocations find the socket and have the daemon
+capture for them, skipping Playwright and Chromium startup.
+
+Protocol: the client sends one JSON object per connection, terminated by a
+newline, and reads one JSON line back:
+    {"op": "capture", "url": "...", "options": {...}}
+    -> {"ok": true, "path": "/abs/path.png"}
+    -> {"ok": false, "error": "...", "type": "NavigationError"}
+"""
+
+import io
+import json
+import logging
+import os
+import signal
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import FrameType
+from typing import Optional, Dict, Any, Union, TYPE_CHECKING
+
+from . import exceptions
+from .cache import screenshot_cache
+from .config import browser_config
+from .exceptions import BrowserError, DaemonError
+
+if TYPE_CHECKING:
+    from .actor import BrowserActorPool
+
+logger = logging.getLogger(__name__)
+
+# Capture options a client may forward to the daemon
+CAPTURE_OPTIONS = {
+    "full_page", "selector", "wait_for", "wait_timeout",
+    "use_cache", "extra_wait", "mobile", "device_name",
+}
+
+
+def default_socket_path() -> Path:
+    """Socket path from config, else a per-user path in the runtime directory."""
+    if browser_config.daemon_socket:
+        return Path(browser_config.daemon_socket)
+    runtime_dir = os.getenv("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "snapwright.sock"
+    return Path(tempfile.gettempdir()) / f"snapwright-{os.getuid()}.sock"
+
+
+def _read_message(sock_file: io.BufferedIOBase) -> Dict[str, Any]:
+    """Read one newline-terminated JSON message."""
+    line = sock_file.readline()
+    if not line:
+        raise DaemonError("Connection closed before a message was received")
+    message: Dict[str, Any] = json.loads(line)
+    return message
+
+
+def _write_message(sock_file: io.BufferedIOBase, message: Dict[str, Any]) -> None:
+    """Write one newline-terminated JSON message."""
+    sock_file.write(json.dumps(message, default=str).encode() + b"\n")
+    sock_file.flush()
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server that hands captures to an actor pool."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, pool: "BrowserActorPool"):
+        self.pool = pool
+        self.started_at = time.time()
+        self.requests_served = 0
+        super().__init__(str(socket_path), _DaemonHandler)
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    """Handles a single request/response exchange."""
+
+    server: _DaemonServer
+
+    def handle(self) -> None:
+        try:
+            request = _read_message(self.rfile)
+            response = self._dispatch(request)
+        except BrowserError as e:
+            response = {"ok": False, "error": str(e), "type": type(e).__name__}
+        except Exception as e:
+            logger.exception("Daemon request failed")
+            response = {"ok": False, "error": str(e), "type": "BrowserError"}
+
+        try:
+            _write_message(self.wfile, response)
+        except OSError as e:
+            logger.debug(f"Client went away before the response was sent: {e}")
+
+    def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid()}
+
+        if op == "capture":
+            options = {
+                k: v for k, v in request.get("options", {}).items() if k in CAPTURE_OPTIONS
+            }
+            path = self.server.pool.capture_screenshot(
+                request["url"],
+                output_path=request.get("output_path"),
+                **options
+            )
+            self.server.requests_served += 1
+            return {"ok": True, "path": str(path) if path else None}
+
+        if op == "stats":
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "uptime": time.time() - self.server.started_at,
+                "requests_served": self.server.requests_served,
+                "cache": screenshot_cache.get_cache_stats(),
+            }
+
+        if op == "shutdown":
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return {"ok": True}
+
+        raise DaemonError(f"Unknown daemon operation: {op!r}")
+
+
+def _socket_in_use(socket_path: Path) -> bool:
+    """Whether a live daemon is listening on ``socket_path``."""
+    try:
+        DaemonClient(socket_path, timeout=1).ping()
+        return True
+    except DaemonError:
+        return False
+
+
+def serve_daemon(socket_path: Optional[Union[str, Path]] = None, threads: Optional[int] = None) -> None:
+    """
+    Run the daemon in the foreground until SIGTERM, SIGINT or a shutdown request.
+
+    Args:
+        socket_path: Unix socket to listen on (default: default_socket_path())
+        threads: Browser-owning threads (default: browser_config.actor_threads)
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonError("The snapwright daemon requires Unix domain sockets")
+
+    socket_path = Path(socket_path) if socket_path else default_socket_path()
+    if socket_path.exists():
+        if _socket_in_use(socket_path):
+            raise DaemonError(f"A daemon is already listening on {socket_path}")
+        socket_path.unlink()  # Stale socket from a daemon that died
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Imported here so clients never load Playwright
+    from .actor import BrowserActorPool
+
+    pool = BrowserActorPool(threads=threads)
+    # Launch the browsers now so the first request is already warm
+    pool.prewarm()
+
+    old_umask = os.umask(0o177)  # Socket only accessible to this user
+    try:
+        server = _DaemonServer(socket_path, pool)
+    finally:
+        os.umask(old_umask)
+
+    def handle_signal(signum: int, frame: Optional[FrameType]) -> None:
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, handle_signal)
+        signal.signal(signal.SIGINT, handle_signal)
+
+    logger.info(f"snapwright daemon listening on {socket_path}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        pool.shutdown()
+        try:
+            socket_path.unlink()
+        except FileNotFoundError:
+            pass
+        logger.info("snapwright daemon stopped")
+
+
+class DaemonClient:
+    """Client for a running snapwright daemon."""
+
+    def __init__(self, socket_path: Optional[Union[str, Path]] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            socket_path: Daemon socket (default: default_socket_path())
+            timeout: Socket timeout in seconds (default: no timeout)
+        """
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+        self.timeout = timeout
+
+    def request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one request and return the response, raising on errors."""
+        if not hasattr(socket, "AF_UNIX"):
+            raise DaemonError("Unix domain sockets are not available on this platform")
+
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(str(self.socket_path))
+                with sock.makefile("rwb") as sock_file:
+                    _write_message(sock_file, message)
+                    response = _read_message(sock_file)
+        except (OSError, ValueError) as e:
+            raise DaemonError(f"Daemon not reachable at {self.socket_path}: {e}")
+
+        if not response.get("ok"):
+            # Re-raise as the same snapwright exception type where possible
+            error_type = getattr(exceptions, response.get("type", ""), BrowserError)
+            if not (isinstance(error_type, type) and issubclass(error_type, BrowserError)):
+                error_type = BrowserError
+            raise error_type(response.get("error", "Daemon request failed"))
+        return response
+
+    def ping(self) -> bool:
+        """Check that the daemon is alive."""
+        return bool(self.request({"op": "ping"})["ok"])
+
+    def stats(self) -> Dict[str, Any]:
+        """Get daemon uptime and request counters."""
+        return self.request({"op": "stats"})
+
+    def shutdown(self) -> None:
+        """Ask the daemon to stop."""
+        self.request({"op": "shutdown"})
+
+    def capture_screenshot(
+        self,
+        url: str,
+        output_path: Optional[Union[str, Path]] = None,
+        **options: Any
+    ) -> Optional[Path]:
+        """
+        Capture a screenshot through the daemon.
+
+        Takes the same options as ``capture_screenshot``. Relative paths are
+        resolved against this process's working directory, not the daemon's.
+        """
+        if output_path is None:
+            output_path = Path(browser_config.default_output_dir) / f"screenshot_{int(time.time())}.png"
+
+        response = self.request({
+            "op": "capture",
+            "url": url,
+            "output_path": str(Path(output_path).resolve()),
+            "options": options,
+        })
+        return Path(response["path"]) if response["path"] else None
+
+
+def daemon_available(socket_path: Optional[Union[str, Path]] = None) -> bool:
+    """Cheap check for a daemon socket, without connecting."""
+    if not hasattr(socket, "AF_UNIX"):
+        return False
+    return (Path(socket_path) if socket_path else default_socket_path()).exists()
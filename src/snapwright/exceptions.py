@@ -28,4 +28,9 @@ class ScreenshotError(BrowserError):
 
 class CacheError(BrowserError):
     """Raised when cache operations fail."""
+    pass
+
+
+class DaemonError(BrowserError):
+    """Raised when the snapwright daemon cannot be reached or fails."""
     pass
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""Selector specs for ``browse_and_extract`` and the in-page script that runs them.
+
+Each extraction names a selector and what to read from the matches:
+
+    "h1"                                   -> text content (stripped)
+    "a.next@href"                          -> the ``href`` attribute
+    {"selector": "input", "property": "value"}
+                                           -> the DOM property ``value``
+    {"selector": "li", "all": True}        -> always a list, even for one match
+
+Plain CSS selectors are compiled into one argument for ``EXTRACT_SCRIPT``,
+so they cost a single ``page.evaluate`` round trip no matter how many
+elements match. Selectors in Playwright's own syntax (``text=Sign in``,
+``xpath=//h1``, ``nav >> a``, ``li:has-text("Sale")``) are run through a
+locator each, so they match exactly as they would in Playwright.
+"""
+
+import re
+from typing import Any, Dict, List, Tuple, Union
+
+from playwright.async_api import Page as AsyncPage
+from playwright.sync_api import Page, Error as PlaywrightError
+
+SelectorSpec = Union[str, Dict[str, Any]]
+
+# Trailing "@name" on a CSS string spec; CSS itself never uses "@" outside quotes.
+# Playwright selectors can ("text=a@b.com", "xpath=//a/@href"), so they need the dict form.
+_ATTRIBUTE_SUFFIX = re.compile(r"^(?P<selector>.+?)@(?P<attribute>[A-Za-z_][\w:.-]*)$")
+
+# Playwright-only syntax: engine prefixes (text=, xpath=, css=, internal:role=, ...),
+# the // XPath and quoted-text shorthands, ">>" chains and Playwright's pseudo-classes
+_PLAYWRIGHT_SELECTOR = re.compile(
+    r"^(?:[A-Za-z_][\w-]*(?::[\w-]+)*=|//|\.\.|['\"])"
+    r"|>>"
+    r"|:(?:has-text|text|text-is|text-matches|visible|nth-match|left-of|right-of|above|below|near)\b"
+)
+
+# Reads one matched element, as text, an attribute or a DOM property
+_READ = """(el, spec) => {
+        if (spec.attribute !== null) return el.getAttribute(spec.attribute);
+        if (spec.property !== null) {
+            const value = el[spec.property];
+            return value === undefined ? null : value;
+        }
+        return (el.textContent || "").trim();
+    }"""
+
+# Runs in the page: returns {name: value | [values] | null | {"error": msg}}.
+# Like Playwright's CSS engine it also matches inside open shadow roots.
+EXTRACT_SCRIPT = """
+(specs) => {
+    const read = """ + _READ + """;
+    const shadowRoots = (root, found) => {
+        const walker = document.createTreeWalker(root, NodeFilter.SHOW_ELEMENT);
+        for (let el = walker.nextNode(); el; el = walker.nextNode()) {
+            if (el.shadowRoot) {
+                found.push(el.shadowRoot);
+                shadowRoots(el.shadowRoot, found);
+            }
+        }
+        return found;
+    };
+    const roots = shadowRoots(document, [document]);
+    const extracted = {};
+    for (const spec of specs) {
+        try {
+            const values = roots.flatMap(
+                (root) => Array.from(root.querySelectorAll(spec.selector), (el) => read(el, spec))
+            );
+            if (values.length === 0) extracted[spec.name] = spec.all ? [] : null;
+            else if (values.length === 1 && !spec.all) extracted[spec.name] = values[0];
+            else extracted[spec.name] = values;
+        } catch (e) {
+            extracted[spec.name] = {error: String(e && e.message || e)};
+        }
+    }
+    return extracted;
+}
+"""
+
+# Runs on a locator's matches: returns [value, ...]
+READ_SCRIPT = """
+(elements, spec) => {
+    const read = """ + _READ + """;
+    return elements.map((el) => read(el, spec));
+}
+"""
+
+
+def is_css_selector(selector: str) -> bool:
+    """Whether ``selector`` is plain CSS, without Playwright-only syntax."""
+    return _PLAYWRIGHT_SELECTOR.search(selector) is None
+
+
+def spec_value(spec: Dict[str, Any], found: List[Any]) -> Any:
+    """Shape the values read from a spec's matches: one value, a list or None."""
+    if not found:
+        return [] if spec["all"] else None
+    if len(found) == 1 and not spec["all"]:
+        return found[0]
+    return found
+
+
+def extract_values(page: Page, specs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Evaluate compiled specs on a live page.
+
+    Plain CSS selectors all run in one ``page.evaluate`` round trip.
+    Selectors using Playwright's own syntax (``text=``, ``xpath=``, ``>>``,
+    ``:has-text()``, ``:visible``, ...) each go through
+    ``page.locator(...).evaluate_all`` so they keep Playwright's semantics.
+
+    Returns:
+        {name: value | [values] | None | {"error": msg}}, for ``merge_extracted``
+    """
+    css_specs = [spec for spec in specs if is_css_selector(spec["selector"])]
+    values = page.evaluate(EXTRACT_SCRIPT, css_specs) if css_specs else {}
+    for spec in specs:
+        if is_css_selector(spec["selector"]):
+            continue
+        try:
+            found = page.locator(spec["selector"]).evaluate_all(READ_SCRIPT, spec)
+        except PlaywrightError as e:
+            values[spec["name"]] = {"error": str(e)}
+            continue
+        values[spec["name"]] = spec_value(spec, found)
+    return values
+
+
+async def extract_values_async(page: AsyncPage, specs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """``extract_values`` for an async Playwright page."""
+    css_specs = [spec for spec in specs if is_css_selector(spec["selector"])]
+    values = await page.evaluate(EXTRACT_SCRIPT, css_specs) if css_specs else {}
+    for spec in specs:
+        if is_css_selector(spec["selector"]):
+            continue
+        try:
+            found = await page.locator(spec["selector"]).evaluate_all(READ_SCRIPT, spec)
+        except PlaywrightError as e:
+            values[spec["name"]] = {"error": str(e)}
+            continue
+        values[spec["name"]] = spec_value(spec, found)
+    return values
+
+
+def parse_selector(name: str, spec: SelectorSpec) -> Dict[str, Any]:
+    """
+    Normalize one selector spec.
+
+    Args:
+        name: Key the value is returned under
+        spec: Selector string, optionally ending in "@attribute" when it
+            is plain CSS, or a dict with 'selector' and at most one of
+            'attribute'/'property', plus 'all' to always return a list
+
+    Returns:
+        Dict with name, selector, attribute, property and all
+
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    if isinstance(spec, str):
+        match = _ATTRIBUTE_SUFFIX.match(spec.strip()) if is_css_selector(spec) else None
+        if match:
+            spec = {"selector": match.group("selector").strip(), "attribute": match.group("attribute")}
+        else:
+            spec = {"selector": spec}
+    if not isinstance(spec, dict):
+        raise ValueError(f"Selector for {name!r} must be a string or an object, not {type(spec).__name__}")
+
+    selector = spec.get("selector")
+    if not isinstance(selector, str) or not selector.strip():
+        raise ValueError(f"Selector for {name!r} is missing a 'selector'")
+    attribute = spec.get("attribute")
+    prop = spec.get("property")
+    if attribute is not None and prop is not None:
+        raise ValueError(f"Selector for {name!r} can read an attribute or a property, not both")
+
+    return {
+        "name": name,
+        "selector": selector.strip(),
+        "attribute": attribute,
+        "property": prop,
+        "all": bool(spec.get("all", False)),
+    }
+
+
+def compile_selectors(extract_selectors: Dict[str, SelectorSpec]) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+    """
+    Compile a name -> spec mapping into the argument for ``EXTRACT_SCRIPT``.
+
+    Returns:
+        (specs, errors): parsed specs to evaluate, and a name -> error
+        message dict for specs that could not be parsed
+    """
+    specs: List[Dict[str, Any]] = []
+    errors: Dict[str, str] = {}
+    for name, spec in extract_selectors.items():
+        try:
+            specs.append(parse_selector(name, spec))
+        except ValueError as e:
+            errors[name] = str(e)
+    return specs, errors
+
+
+def merge_extracted(
+    extract_selectors: Dict[str, SelectorSpec],
+    values: Dict[str, Any],
+    errors: Dict[str, str]
+) -> Dict[str, Any]:
+    """
+    Build the ``extracted`` dict in the caller's key order.
+
+    Per-selector failures become "Error: ..." strings, as they always have.
+    """
+    extracted: Dict[str, Any] = {}
+    for name in extract_selectors:
+        if name in errors:
+            extracted[name] = f"Error: {errors[name]}"
+            continue
+        value = values.get(name)
+        if isinstance(value, dict) and set(value) == {"error"}:
+            value = f"Error: {value['error']}"
+        extracted[name] = value
+    return extracted
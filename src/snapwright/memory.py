@@ -0,0 +1,99 @@
+"""Memory sampling of the Chromium process tree via /proc."""
+
+import os
+from pathlib import Path
+from typing import Optional, Dict, List
+
+PROC = Path("/proc")
+
+
+def _read_ppid(pid: int) -> Optional[int]:
+    """Parent PID from /proc/<pid>/stat, or None if the process is gone."""
+    try:
+        stat = (PROC / str(pid) / "stat").read_text()
+    except OSError:
+        return None
+    # The command name may contain spaces and parentheses; fields resume
+    # after the last ')'
+    fields = stat[stat.rindex(")") + 2:].split()
+    return int(fields[1])
+
+
+def _read_rss(pid: int) -> int:
+    """Resident set size of a process in bytes."""
+    try:
+        statm = (PROC / str(pid) / "statm").read_text().split()
+    except OSError:
+        return 0
+    return int(statm[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _classify(pid: int) -> str:
+    """Chromium role of a process: browser, renderer, gpu, utility or driver."""
+    try:
+        cmdline = (PROC / str(pid) / "cmdline").read_bytes().split(b"\0")
+    except OSError:
+        return "utility"
+
+    for arg in cmdline:
+        if arg.startswith(b"--type="):
+            role = arg[len(b"--type="):].decode(errors="replace")
+            if role == "renderer":
+                return "renderer"
+            if role == "gpu-process":
+                return "gpu"
+            return "utility"
+
+    executable = os.path.basename(cmdline[0].decode(errors="replace")) if cmdline[0] else ""
+    return "driver" if executable.startswith("node") else "browser"
+
+
+def _descendants(root_pid: int) -> List[int]:
+    """All descendant PIDs of ``root_pid``."""
+    children: Dict[int, List[int]] = {}
+    for entry in PROC.iterdir():
+        if not entry.name.isdigit():
+            continue
+        ppid = _read_ppid(int(entry.name))
+        if ppid is not None:
+            children.setdefault(ppid, []).append(int(entry.name))
+
+    found = []
+    stack = list(children.get(root_pid, ()))
+    while stack:
+        pid = stack.pop()
+        found.append(pid)
+        stack.extend(children.get(pid, ()))
+    return found
+
+
+def process_tree_memory(root_pid: Optional[int] = None) -> Optional[Dict[str, int]]:
+    """
+    Sum the RSS of a process tree, by Chromium role.
+
+    Given a ``root_pid`` (such as one ``BrowserManager``'s Playwright driver)
+    the figures cover that process and everything started under it. With
+    the default root they cover every process this Python process started:
+    all drivers and every Chromium browser, renderer and GPU process.
+
+    Returns:
+        Dict of bytes per role ('browser', 'renderer', 'gpu', 'utility',
+        'driver') plus 'total' and 'processes', or None where /proc is
+        unavailable (non-Linux)
+    """
+    if not PROC.is_dir():
+        return None
+
+    usage = {'browser': 0, 'renderer': 0, 'gpu': 0, 'utility': 0, 'driver': 0}
+    if root_pid is None:
+        pids = _descendants(os.getpid())
+    elif _read_ppid(root_pid) is None:
+        pids = []  # Already exited
+    else:
+        pids = [root_pid, *_descendants(root_pid)]
+    for pid in pids:
+        usage[_classify(pid)] += _read_rss(pid)
+
+    usage['total'] = sum(usage.values())
+    usage['processes'] = len(pids)
+    return usage
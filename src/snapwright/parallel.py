@@ -0,0 +1,140 @@
+"""Multi-process batch screenshots with one browser per worker."""
+
+import dataclasses
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional, Dict, Any, Union, List, Tuple
+
+from .browser_manager import browser_manager
+from .config import browser_config
+from .core import capture_screenshot
+from .exceptions import BrowserError
+from .urls import dedupe_urls
+
+logger = logging.getLogger(__name__)
+
+# Per-worker state, set up by _init_worker in each child process
+_max_captures = 0
+_captures_since_launch = 0
+
+
+def _init_worker(config_values: Dict[str, Any], max_captures: int) -> None:
+    """Apply the parent's configuration inside a freshly spawned worker."""
+    global _max_captures, _captures_since_launch
+    browser_config.update(**config_values)
+    _max_captures = max_captures
+    _captures_since_launch = 0
+
+
+def _capture_shard(
+    shard: List[Tuple[int, str]],
+    output_dir: Path,
+    full_page: bool,
+    use_cache: bool,
+    name_prefix: str,
+) -> Dict[str, Optional[Path]]:
+    """Capture one shard of URLs with this worker's own browser."""
+    global _captures_since_launch
+    results = {}
+
+    for i, url in shard:
+        filename = f"{name_prefix}_{i:03d}_{int(time.time())}.png"
+        try:
+            results[url] = capture_screenshot(
+                url,
+                output_path=output_dir / filename,
+                full_page=full_page,
+                use_cache=use_cache
+            )
+        except BrowserError as e:
+            logger.error(f"Failed to capture {url}: {e}")
+            results[url] = None
+
+        # Relaunch Chromium periodically to keep its memory bounded
+        _captures_since_launch += 1
+        if _max_captures and _captures_since_launch >= _max_captures:
+            logger.info(f"Recycling browser in worker {os.getpid()} after {_captures_since_launch} captures")
+            browser_manager.reset()
+            _captures_since_launch = 0
+
+    return results
+
+
+def parallel_batch_screenshots(
+    urls: List[str],
+    output_dir: Optional[Union[str, Path]] = None,
+    full_page: bool = True,
+    use_cache: bool = True,
+    workers: Optional[int] = None,
+    max_captures_per_worker: Optional[int] = None,
+    chunk_size: int = 10,
+    name_prefix: str = "screenshot"
+) -> Dict[str, Optional[Path]]:
+    """
+    Capture screenshots of multiple URLs across several worker processes.
+
+    URLs are split into shards of ``chunk_size`` and spread over ``workers``
+    processes. Each worker runs its own ``BrowserManager`` and Chromium, and
+    relaunches that browser after ``max_captures_per_worker`` captures.
+    URLs that canonicalize to the same page are captured once and share a
+    screenshot.
+
+    Args:
+        urls: List of URLs to capture
+        output_dir: Directory for screenshots
+        full_page: Capture full page for all
+        use_cache: Use cache if available
+        workers: Number of worker processes (default: browser_config.batch_workers)
+        max_captures_per_worker: Captures before a worker relaunches its browser
+            (default: browser_config.worker_max_captures, 0 disables recycling)
+        chunk_size: URLs handed to a worker at a time
+        name_prefix: Prefix for generated filenames
+
+    Returns:
+        Dict mapping URLs to screenshot paths
+    """
+    if output_dir is None:
+        output_dir = Path(browser_config.default_output_dir) / f"batch_{int(time.time())}"
+    else:
+        output_dir = Path(output_dir)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if workers is None:
+        workers = browser_config.batch_workers or os.cpu_count() or 1
+    if max_captures_per_worker is None:
+        max_captures_per_worker = browser_config.worker_max_captures
+
+    # Dedupe on the canonical form but load the first URL of each group as given
+    groups = {inputs[0]: inputs for inputs in dedupe_urls(urls).values()}
+    indexed = list(enumerate(groups))
+    shards = [indexed[i:i + chunk_size] for i in range(0, len(indexed), chunk_size)]
+    results: Dict[str, Optional[Path]] = {url: None for url in urls}
+
+    # Spawn rather than fork: a forked child would inherit the parent's
+    # Playwright connection, which cannot be shared across processes.
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(shards)) or 1,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(dataclasses.asdict(browser_config), max_captures_per_worker),
+    ) as executor:
+        futures = {
+            executor.submit(_capture_shard, shard, output_dir, full_page, use_cache, name_prefix): shard
+            for shard in shards
+        }
+
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                for url, path in future.result().items():
+                    for original in groups[url]:
+                        results[original] = path
+            except Exception as e:
+                logger.error(f"Worker failed on shard of {len(futures[future])} URLs: {e}")
+            logger.info(f"Completed shard {done}/{len(shards)}")
+
+    return results
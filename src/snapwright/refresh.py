@@ -0,0 +1,79 @@
+"""Background recapture for stale-while-revalidate and refresh-ahead.
+
+Cache lookups flag entries that are stale or popular and about to expire;
+callers hand them to ``schedule_refresh``, which recaptures them on a
+dedicated browser thread so the caller returns the cached image at once.
+"""
+
+import atexit
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, Set, TYPE_CHECKING
+
+from .cache import screenshot_cache
+
+if TYPE_CHECKING:
+    from .actor import BrowserActorPool
+
+logger = logging.getLogger(__name__)
+
+# Refreshes queued or running at once; further requests are dropped until
+# the backlog drains, the cached image keeps being served meanwhile
+MAX_PENDING_REFRESHES = 64
+
+_lock = threading.Lock()
+_pending: Set[str] = set()
+_pool: Optional["BrowserActorPool"] = None
+
+
+def _get_pool() -> "BrowserActorPool":
+    """The refresh browser pool, started on first use."""
+    global _pool
+    if _pool is None:
+        # Imported here: the actor pool imports core, which imports this module
+        from .actor import BrowserActorPool
+        _pool = BrowserActorPool(threads=1)
+        atexit.register(_pool.shutdown, wait=False)
+    return _pool
+
+
+def schedule_refresh(url: str, cache_options: Dict[str, Any], **render_options: Any) -> bool:
+    """
+    Recapture ``url`` into the cache in the background.
+
+    Args:
+        url: URL to recapture
+        cache_options: Options that key the cache entry (full_page, selector, mobile, device_name)
+        **render_options: wait_for, wait_timeout and extra_wait of the original request
+
+    Returns:
+        True if a refresh was queued, False if one is already pending or the backlog is full
+    """
+    cache_key = screenshot_cache.get_cache_key(url, cache_options)
+    with _lock:
+        if cache_key in _pending or len(_pending) >= MAX_PENDING_REFRESHES:
+            return False
+        _pending.add(cache_key)
+        pool = _get_pool()
+
+    from .core import refresh_screenshot
+
+    logger.info(f"Refreshing cached screenshot of {url} in the background")
+    future = pool.submit(refresh_screenshot, url, **cache_options, **render_options)
+    future.add_done_callback(lambda f: _finished(cache_key, url, f))
+    return True
+
+
+def _finished(cache_key: str, url: str, future: Future) -> None:
+    with _lock:
+        _pending.discard(cache_key)
+    error: Optional[BaseException] = future.exception()
+    if error is not None:
+        logger.warning(f"Background refresh of {url} failed: {error}")
+
+
+def pending_refreshes() -> int:
+    """Number of refreshes queued or running."""
+    with _lock:
+        return len(_pending)
@@ -0,0 +1,160 @@
+"""Capture of a page's own network responses during ``browse_and_extract``.
+
+Much page data arrives as JSON from XHR/fetch calls before it is rendered.
+``ResponseCapture`` listens to Playwright's ``response`` events and keeps
+the responses whose URLs match named patterns, so their parsed bodies can
+be returned directly instead of scraped back out of the DOM:
+
+    "*/api/products*"                        -> shell-style pattern on the full URL
+    "/api/products"                          -> substring (no wildcards)
+    re.compile(r"/api/v\\d+/search")          -> regular expression (search)
+    {"url": "*/api/page*", "all": True}      -> every match, as a list
+
+Redirects and CORS preflights are skipped. Bodies that are JSON are
+parsed; anything else is returned as text.
+"""
+
+import fnmatch
+import json
+import logging
+import re
+import time
+from typing import Dict, Any, Callable, List, Pattern, Tuple, Union
+
+from playwright.async_api import Page as AsyncPage, Response as AsyncResponse
+from playwright.sync_api import Page, Response, TimeoutError as PlaywrightTimeoutError
+
+logger = logging.getLogger(__name__)
+
+ResponsePattern = Union[str, Pattern, Dict[str, Any]]
+
+
+def _matcher(name: str, pattern: ResponsePattern) -> Tuple[Callable[[str], Any], bool]:
+    """Compile one pattern into (url -> bool, all)."""
+    collect_all = False
+    url_pattern: Any = pattern
+    if isinstance(pattern, dict):
+        collect_all = bool(pattern.get("all", False))
+        url_pattern = pattern.get("url")
+
+    if isinstance(url_pattern, re.Pattern):
+        return url_pattern.search, collect_all
+    if not isinstance(url_pattern, str) or not url_pattern:
+        raise ValueError(f"Response pattern for {name!r} must be a non-empty string or regex")
+    if any(char in url_pattern for char in "*?["):
+        return (lambda url: fnmatch.fnmatchcase(url, url_pattern)), collect_all
+    return (lambda url: url_pattern in url), collect_all
+
+
+class ResponseCapture:
+    """Collects the responses matching each named URL pattern."""
+
+    def __init__(self, patterns: Dict[str, ResponsePattern]):
+        """
+        Args:
+            patterns: Dict mapping names to URL patterns
+
+        Raises:
+            ValueError: If a pattern is malformed
+        """
+        self._matchers = {name: _matcher(name, pattern) for name, pattern in patterns.items()}
+        # Sync or async Responses, depending on the page they came from
+        self._matched: Dict[str, List[Any]] = {name: [] for name in patterns}
+
+    @property
+    def complete(self) -> bool:
+        """Whether every pattern has matched at least once."""
+        return all(self._matched.values())
+
+    def on_response(self, response: Union[Response, AsyncResponse]) -> None:
+        """``page.on("response")`` handler."""
+        if 300 <= response.status < 400 or response.request.method == "OPTIONS":
+            return
+        for name, (matches, collect_all) in self._matchers.items():
+            if (collect_all or not self._matched[name]) and matches(response.url):
+                self._matched[name].append(response)
+
+    def wait(self, page: Page, timeout: float) -> None:
+        """
+        Pump page events until every pattern matched or ``timeout`` ms pass.
+
+        Patterns still unmatched at the deadline are left empty.
+        """
+        deadline = time.monotonic() + timeout / 1000
+        while not self.complete:
+            remaining = (deadline - time.monotonic()) * 1000
+            if remaining <= 0:
+                break
+            try:
+                page.wait_for_event("response", timeout=remaining)
+            except PlaywrightTimeoutError:
+                break
+        self._log_missing(timeout)
+
+    async def wait_async(self, page: AsyncPage, timeout: float) -> None:
+        """``wait`` for an async Playwright page."""
+        deadline = time.monotonic() + timeout / 1000
+        while not self.complete:
+            remaining = (deadline - time.monotonic()) * 1000
+            if remaining <= 0:
+                break
+            try:
+                await page.wait_for_event("response", timeout=remaining)
+            except PlaywrightTimeoutError:
+                break
+        self._log_missing(timeout)
+
+    def _log_missing(self, timeout: float) -> None:
+        if not self.complete:
+            missing = [name for name, responses in self._matched.items() if not responses]
+            logger.debug(f"No response matched {missing} within {timeout} ms")
+
+    def bodies(self) -> Dict[str, Any]:
+        """
+        Parsed bodies by name: None if nothing matched, a list for 'all'
+        patterns, and "Error: ..." when a body could not be read.
+        """
+        return self._by_name({
+            name: [_read_body(response) for response in responses]
+            for name, responses in self._matched.items()
+        })
+
+    async def bodies_async(self) -> Dict[str, Any]:
+        """``bodies`` of responses captured from an async Playwright page."""
+        return self._by_name({
+            name: [await _read_body_async(response) for response in responses]
+            for name, responses in self._matched.items()
+        })
+
+    def _by_name(self, values: Dict[str, List[Any]]) -> Dict[str, Any]:
+        """One value per name, or a list for 'all' patterns."""
+        captured: Dict[str, Any] = {}
+        for name, found in values.items():
+            if self._matchers[name][1]:
+                captured[name] = found
+            else:
+                captured[name] = found[0] if found else None
+        return captured
+
+
+def _read_body(response: Response) -> Any:
+    try:
+        body = response.body()
+    except Exception as e:
+        return f"Error: {e}"
+    return _parse_body(body)
+
+
+async def _read_body_async(response: AsyncResponse) -> Any:
+    try:
+        body = await response.body()
+    except Exception as e:
+        return f"Error: {e}"
+    return _parse_body(body)
+
+
+def _parse_body(body: bytes) -> Any:
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body.decode("utf-8", errors="replace")
@@ -0,0 +1,94 @@
+"""Cheap checks of whether a page changed since it was captured.
+
+A capture records the main document's ``ETag`` and ``Last-Modified``
+headers and a SHA-256 of its body. When the cached screenshot expires,
+``document_unchanged`` asks the server with a conditional GET, and when
+no validator settles it, compares the body hash; only a changed document
+costs a browser render.
+
+Only the HTML document is checked. Pages whose content arrives through
+scripts or XHR can change while their document does not, which is why
+``cache_revalidate`` is off by default.
+"""
+
+import hashlib
+import logging
+import urllib.error
+import urllib.request
+from typing import Optional, Dict
+
+from .config import browser_config
+
+logger = logging.getLogger(__name__)
+
+# Sent with revalidation requests; some servers refuse urllib's default agent
+USER_AGENT = "Mozilla/5.0 (compatible; snapwright)"
+
+
+def document_validators(headers: Dict[str, str], body: Optional[bytes]) -> Dict[str, str]:
+    """
+    Validators worth storing for a captured document.
+
+    Args:
+        headers: Response headers of the main document (lowercase names)
+        body: Response body, if available
+
+    Returns:
+        Dict with any of 'etag', 'last_modified' and 'body_hash'
+    """
+    validators = {
+        'etag': headers.get('etag'),
+        'last_modified': headers.get('last-modified'),
+    }
+    if isinstance(body, bytes):
+        validators['body_hash'] = hashlib.sha256(body).hexdigest()
+    return {name: value for name, value in validators.items() if isinstance(value, str)}
+
+
+def document_unchanged(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    body_hash: Optional[str] = None,
+    timeout: Optional[float] = None
+) -> bool:
+    """
+    Whether ``url`` still serves the document a capture was taken of.
+
+    Args:
+        url: Captured URL
+        etag: ETag recorded at capture time
+        last_modified: Last-Modified recorded at capture time
+        body_hash: SHA-256 of the document body recorded at capture time
+        timeout: Request timeout in seconds (default: browser_config.timeout)
+
+    Returns:
+        True on a 304 or an identical body, False if it changed or could not be checked
+    """
+    if not (etag or last_modified or body_hash):
+        return False
+
+    headers = {'User-Agent': USER_AGENT}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    if timeout is None:
+        timeout = browser_config.timeout / 1000
+
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            if not body_hash:
+                # The server ignored the validators; nothing left to compare
+                return False
+            return hashlib.sha256(response.read()).hexdigest() == body_hash
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return True
+        logger.debug(f"Revalidation of {url} returned HTTP {e.code}")
+        return False
+    except Exception as e:
+        logger.debug(f"Revalidation of {url} failed: {e}")
+        return False
@@ -0,0 +1,317 @@
+"""HTTP capture service backed by pooled browsers.
+
+Start it with:
+    snapwright serve --port 8700
+
+Endpoints:
+    GET  /health                        -> JSON service and cache status
+    GET  /screenshot?url=...&mobile=1   -> image/png
+    POST /screenshot {"url": ..., ...}  -> image/png
+    POST /extract {"url": ..., "selectors": {...}, "responses": {...}, "wait_for": ..., "static": true} -> JSON
+
+Requests run on a ``BrowserActorPool``, one capture per browser-owning
+thread at a time. Up to ``serve_max_queue`` further requests wait for a
+browser; beyond that the service answers 503 instead of piling up work.
+Screenshots are returned in the response body and never written to
+``default_output_dir``.
+"""
+
+import json
+import logging
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import FrameType
+from typing import Optional, Dict, Any, Tuple, Callable
+from urllib.parse import urlsplit, parse_qs
+
+from .actor import BrowserActorPool
+from .cache import screenshot_cache
+from .config import browser_config
+from .exceptions import (
+    BrowserError, TimeoutError, NavigationError, ElementNotFoundError
+)
+
+logger = logging.getLogger(__name__)
+
+# Screenshot options accepted from clients, with their query-string parsers
+SCREENSHOT_OPTIONS: Dict[str, Callable[[str], Any]] = {
+    "full_page": lambda v: v.lower() in ("1", "true", "yes"),
+    "selector": str,
+    "wait_for": str,
+    "wait_timeout": int,
+    "use_cache": lambda v: v.lower() in ("1", "true", "yes"),
+    "extra_wait": int,
+    "mobile": lambda v: v.lower() in ("1", "true", "yes"),
+    "device_name": str,
+}
+
+# HTTP status per snapwright exception, most specific first
+ERROR_STATUS = [
+    (ElementNotFoundError, 404),
+    (TimeoutError, 504),
+    (NavigationError, 502),
+    (BrowserError, 500),
+]
+
+
+class _BadRequest(Exception):
+    """Client sent a request the service cannot act on."""
+
+
+class CaptureServer(ThreadingHTTPServer):
+    """HTTP server that admits a bounded number of requests onto a browser pool."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        pool: BrowserActorPool,
+        max_queue: Optional[int] = None
+    ) -> None:
+        """
+        Args:
+            address: (host, port) to listen on
+            pool: Browser pool that runs the captures
+            max_queue: Requests allowed to wait for a browser (default: browser_config.serve_max_queue)
+        """
+        self.pool = pool
+        self.max_queue = browser_config.serve_max_queue if max_queue is None else max_queue
+        self._slots = threading.BoundedSemaphore(pool.size + self.max_queue)
+        self._stats_lock = threading.Lock()
+        self.started_at = time.time()
+        self.in_flight = 0
+        self.requests_served = 0
+        self.requests_rejected = 0
+        super().__init__(address, _CaptureHandler)
+
+    def admit(self) -> bool:
+        """Take a slot for a request, or return False if the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self.requests_rejected += 1
+            return False
+        with self._stats_lock:
+            self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        """Give back a slot taken by ``admit``."""
+        with self._stats_lock:
+            self.in_flight -= 1
+            self.requests_served += 1
+        self._slots.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Service status for /health."""
+        with self._stats_lock:
+            return {
+                'ok': True,
+                'uptime': time.time() - self.started_at,
+                'browsers': self.pool.size,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'requests_served': self.requests_served,
+                'requests_rejected': self.requests_rejected,
+                'cache': screenshot_cache.get_cache_stats(),
+            }
+
+
+class _CaptureHandler(BaseHTTPRequestHandler):
+    """Routes requests to the browser pool."""
+
+    server: CaptureServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def do_GET(self) -> None:
+        parts = urlsplit(self.path)
+        if parts.path == "/health":
+            self._send_json(200, self.server.get_stats())
+        elif parts.path == "/screenshot":
+            query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+            self._handle(self._screenshot, lambda: self._query_options(query))
+        else:
+            self._send_json(404, {'error': f"Unknown endpoint: {parts.path}"})
+
+    def do_POST(self) -> None:
+        path = urlsplit(self.path).path
+        if path == "/screenshot":
+            self._handle(self._screenshot, self._read_json)
+        elif path == "/extract":
+            self._handle(self._extract, self._read_extract)
+        else:
+            self._send_json(404, {'error': f"Unknown endpoint: {path}"})
+
+    def _handle(
+        self,
+        endpoint: Callable[[Dict[str, Any]], None],
+        parse: Callable[[], Dict[str, Any]]
+    ) -> None:
+        """Parse, admit and run a request, mapping failures to HTTP errors."""
+        try:
+            request = parse()
+        except _BadRequest as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        if not self.server.admit():
+            self._send_json(
+                503,
+                {'error': "Capture queue is full"},
+                headers={'Retry-After': "1"}
+            )
+            return
+
+        try:
+            endpoint(request)
+        except BrowserError as e:
+            status = next(code for error, code in ERROR_STATUS if isinstance(e, error))
+            self._send_json(status, {'error': str(e), 'type': type(e).__name__})
+        except Exception as e:
+            logger.exception("Capture request failed")
+            self._send_json(500, {'error': str(e), 'type': type(e).__name__})
+        finally:
+            self.server.release()
+
+    def _screenshot(self, request: Dict[str, Any]) -> None:
+        url = request.pop("url")
+        data = self.server.pool.submit_capture_bytes(url, **request).result()
+        if data is None:
+            self._send_json(502, {'error': f"Failed to capture screenshot of {url}"})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _extract(self, request: Dict[str, Any]) -> None:
+        result = self.server.pool.submit_extract(
+            request["url"],
+            request["selectors"],
+            wait_for=request.get("wait_for"),
+            wait_timeout=request.get("wait_timeout", 5000),
+            static=request.get("static"),
+            capture_responses=request.get("responses")
+        ).result()
+        self._send_json(502 if result['error'] else 200, result)
+
+    def _query_options(self, query: Dict[str, str]) -> Dict[str, Any]:
+        """Screenshot options from a query string."""
+        if not query.get("url"):
+            raise _BadRequest("Missing 'url' parameter")
+
+        options: Dict[str, Any] = {"url": query["url"]}
+        for name, parse in SCREENSHOT_OPTIONS.items():
+            if name in query:
+                try:
+                    options[name] = parse(query[name])
+                except ValueError:
+                    raise _BadRequest(f"Invalid value for '{name}': {query[name]!r}")
+        return options
+
+    def _read_json(self) -> Dict[str, Any]:
+        """Request body as a JSON object with a 'url'."""
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            raise _BadRequest(f"Invalid JSON body: {e}")
+
+        if not isinstance(body, dict) or not body.get("url"):
+            raise _BadRequest("Request body must be a JSON object with a 'url'")
+
+        if urlsplit(self.path).path == "/screenshot":
+            # Only forward known capture options
+            return {k: v for k, v in body.items() if k == "url" or k in SCREENSHOT_OPTIONS}
+        return body
+
+    def _read_extract(self) -> Dict[str, Any]:
+        """Extraction request body, which must name its selectors."""
+        body = self._read_json()
+        selectors = body.setdefault("selectors", {})
+        responses = body.get("responses")
+        if not isinstance(selectors, dict) or responses is not None and not isinstance(responses, dict):
+            raise _BadRequest("'selectors' and 'responses' must be objects mapping names to patterns")
+        if not selectors and not responses:
+            raise _BadRequest("Request must name 'selectors' or 'responses' to extract")
+        if "wait_timeout" in body:
+            try:
+                body["wait_timeout"] = int(body["wait_timeout"])
+            except (TypeError, ValueError):
+                raise _BadRequest(f"Invalid value for 'wait_timeout': {body['wait_timeout']!r}")
+        return body
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def create_server(
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    threads: Optional[int] = None,
+    max_queue: Optional[int] = None,
+    prewarm: bool = True
+) -> CaptureServer:
+    """
+    Build a capture server and its browser pool without starting to serve.
+
+    Args:
+        host: Interface to bind (default: browser_config.serve_host)
+        port: Port to bind, 0 for any free port (default: browser_config.serve_port)
+        threads: Browsers in the pool (default: browser_config.actor_threads)
+        max_queue: Requests allowed to wait for a browser (default: browser_config.serve_max_queue)
+        prewarm: Launch the browsers before returning
+    """
+    pool = BrowserActorPool(threads=threads)
+    try:
+        if prewarm:
+            pool.prewarm()
+        return CaptureServer(
+            (host or browser_config.serve_host,
+             browser_config.serve_port if port is None else port),
+            pool,
+            max_queue=max_queue
+        )
+    except BaseException:
+        pool.shutdown()
+        raise
+
+
+def serve(
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    threads: Optional[int] = None,
+    max_queue: Optional[int] = None
+) -> None:
+    """Run the capture service in the foreground until SIGTERM or SIGINT."""
+    server = create_server(host, port, threads, max_queue)
+
+    def handle_signal(signum: int, frame: Optional[FrameType]) -> None:
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, handle_signal)
+        signal.signal(signal.SIGINT, handle_signal)
+
+    bound_host, bound_port = server.server_address[:2]
+    logger.info(f"snapwright serving on http://{bound_host!s}:{bound_port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        server.pool.shutdown()
+        logger.info("snapwright service stopped")
@@ -0,0 +1,402 @@
+"""Extraction from server-rendered HTML without a browser.
+
+``browse_and_extract`` can try this path first (``static_extract``): the
+document is fetched over pooled keep-alive connections and the same
+selector specs are evaluated with selectolax's Lexbor HTML parser, which
+costs a fraction of a page load in Chromium. The browser is used instead
+when:
+
+- a selector matches nothing, or ``wait_for`` is not in the document
+- the document looks like a client-side app (an empty ``#root``/``#app``
+  mount point, or a ``<noscript>`` asking for JavaScript)
+- a spec reads a DOM property that only exists in a live page, or uses
+  Playwright-only selector syntax (``text=``, ``>>``, ``:has-text()``, ...)
+- the fetch fails or the response is not a 2xx HTML document
+
+The first two mean the content is rendered by scripts, which is usually
+true of the whole site, so such domains go straight to the browser for
+``static_domain_ttl`` seconds before the static path is tried again.
+
+selectolax is optional (``pip install snapwright[static]``); without it
+every extraction uses the browser.
+"""
+
+import http.client
+import logging
+import re
+import ssl
+import threading
+import time
+import zlib
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from .config import browser_config
+from .extract import SelectorSpec, compile_selectors, is_css_selector, merge_extracted, spec_value
+from .revalidate import USER_AGENT
+
+try:
+    from selectolax.lexbor import LexborHTMLParser, LexborNode, SelectolaxError
+except ImportError:  # Optional dependency: the browser handles every extraction
+    LexborHTMLParser = None  # type: ignore[assignment,misc]
+
+logger = logging.getLogger(__name__)
+
+_MAX_REDIRECTS = 5
+_MAX_DOCUMENT_BYTES = 10 * 1024 * 1024
+
+# Mount points client-side frameworks render into
+_APP_ROOTS = "#root, #app, #__next, #__nuxt, #___gatsby, [data-reactroot], app-root"
+
+# Visible text below which a <noscript> JavaScript warning marks a JS-rendered page
+_MIN_STATIC_TEXT = 200
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+
+class HTTPPool:
+    """Keep-alive HTTP(S) connections reused across static fetches, per host."""
+
+    def __init__(self, max_idle: Optional[int] = None):
+        """
+        Args:
+            max_idle: Idle connections kept per host (default: browser_config.http_pool_size)
+        """
+        self.max_idle = max_idle
+        self._idle: Dict[Tuple[str, str], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, url: str, timeout: Optional[float] = None) -> Tuple[int, Dict[str, str], str, str]:
+        """
+        GET ``url``, following redirects.
+
+        Args:
+            url: Absolute http(s) URL
+            timeout: Socket timeout in seconds (default: browser_config.timeout)
+
+        Returns:
+            (status, headers with lowercase names, decoded body, final URL)
+
+        Raises:
+            OSError, http.client.HTTPException: If the request fails
+            ValueError: On a non-http(s) URL, too many redirects or an oversized body
+        """
+        if timeout is None:
+            timeout = browser_config.timeout / 1000
+
+        for _ in range(_MAX_REDIRECTS + 1):
+            status, headers, body = self._request(url, timeout)
+            location = headers.get('location')
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            return status, headers, _decode_body(headers, body), url
+        raise ValueError(f"Too many redirects fetching {url}")
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+    def _request(self, url: str, timeout: float) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
+            raise ValueError(f"Not an http(s) URL: {url}")
+        key = (parts.scheme, parts.netloc)
+        target = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        headers = {
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+            'Accept-Encoding': 'gzip, deflate',
+        }
+
+        conn, reused = self._checkout(key, timeout)
+        try:
+            conn.request("GET", target, headers=headers)
+            response = conn.getresponse()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            if not reused:
+                raise
+            # The server closed an idle keep-alive connection; retry on a new one
+            conn = self._connect(key, timeout)
+            try:
+                conn.request("GET", target, headers=headers)
+                response = conn.getresponse()
+            except Exception:
+                conn.close()
+                raise
+
+        try:
+            body = response.read(_MAX_DOCUMENT_BYTES + 1)
+        except Exception:
+            conn.close()
+            raise
+        if len(body) > _MAX_DOCUMENT_BYTES:
+            conn.close()
+            raise ValueError(f"Document larger than {_MAX_DOCUMENT_BYTES} bytes: {url}")
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._checkin(key, conn)
+        return response.status, {name.lower(): value for name, value in response.getheaders()}, body
+
+    def _checkout(self, key: Tuple[str, str], timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                conn = idle.pop()
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+        return self._connect(key, timeout), False
+
+    def _checkin(self, key: Tuple[str, str], conn: http.client.HTTPConnection) -> None:
+        max_idle = browser_config.http_pool_size if self.max_idle is None else self.max_idle
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _connect(self, key: Tuple[str, str], timeout: float) -> http.client.HTTPConnection:
+        scheme, netloc = key
+        if scheme == 'http':
+            return http.client.HTTPConnection(netloc, timeout=timeout)
+        context = ssl.create_default_context()
+        if browser_config.ignore_https_errors:
+            # Same trust decisions as the browser the fetch stands in for
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        return http.client.HTTPSConnection(netloc, timeout=timeout, context=context)
+
+
+class DomainModes:
+    """Remembers which domains render their content with scripts."""
+
+    def __init__(self) -> None:
+        self._needs_browser: Dict[str, float] = {}  # host -> time the static path is retried
+        self._lock = threading.Lock()
+
+    def use_static(self, url: str) -> bool:
+        """Whether extractions from ``url``'s domain should try the static path."""
+        host = _host(url)
+        with self._lock:
+            retry_at = self._needs_browser.get(host)
+            if retry_at is None:
+                return True
+            if time.time() >= retry_at:
+                del self._needs_browser[host]
+                return True
+            return False
+
+    def record(self, url: str, static_ok: bool) -> None:
+        """Learn from a static attempt: ``static_ok`` False sends the domain to the browser."""
+        host = _host(url)
+        with self._lock:
+            if static_ok:
+                self._needs_browser.pop(host, None)
+            elif browser_config.static_domain_ttl > 0:
+                self._needs_browser[host] = time.time() + browser_config.static_domain_ttl
+
+    def clear(self) -> None:
+        with self._lock:
+            self._needs_browser.clear()
+
+
+def _host(url: str) -> str:
+    try:
+        return (urlsplit(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+def _decode_body(headers: Dict[str, str], body: bytes) -> str:
+    """Decompress ``body`` and decode it with the declared charset."""
+    encoding = headers.get('content-encoding', '').lower()
+    if encoding in ('gzip', 'x-gzip', 'deflate'):
+        try:
+            body = zlib.decompress(body, zlib.MAX_WBITS | 32)  # gzip or zlib header
+        except zlib.error:
+            body = zlib.decompress(body, -zlib.MAX_WBITS)  # Raw deflate
+
+    charset = None
+    for param in headers.get('content-type', '').split(';')[1:]:
+        name, _, value = param.strip().partition('=')
+        if name.lower() == 'charset':
+            charset = value.strip('"\' ')
+    if not charset:
+        match = _META_CHARSET.search(body[:4096])
+        charset = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        return body.decode(charset, errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+class _NeedsBrowser(Exception):
+    """A spec that only a live page can answer."""
+
+
+def _read_node(node: "LexborNode", spec: Dict[str, Any], base_url: str) -> Any:
+    """One value, as ``EXTRACT_SCRIPT``'s ``read`` would return it."""
+    attributes = node.attributes
+    if spec['attribute'] is not None:
+        name = spec['attribute'].lower()
+        if name not in attributes:
+            return None
+        return attributes[name] or ""  # Valueless attributes are ""
+
+    prop = spec['property']
+    if prop is None:
+        return node.text().strip()
+    if prop == 'textContent':
+        return node.text()
+    if prop == 'innerHTML':
+        return "".join(child.html or "" for child in node.iter(include_text=True))
+    if prop == 'outerHTML':
+        return node.html or ""
+    if prop == 'tagName':
+        return (node.tag or "").upper()
+    if prop == 'id':
+        return attributes.get('id') or ""
+    if prop == 'className':
+        return attributes.get('class') or ""
+    if prop in ('href', 'src'):
+        value = attributes.get(prop)
+        return urljoin(base_url, value.strip()) if value is not None else ""
+    if prop in ('checked', 'disabled', 'selected', 'hidden'):
+        return prop in attributes
+    if prop == 'value' and node.tag == 'input':
+        return attributes.get('value') or ""
+    if prop == 'value' and node.tag == 'textarea':
+        return node.text()
+    raise _NeedsBrowser(prop)
+
+
+def evaluate_static(html: str, specs: List[Dict[str, Any]], base_url: str) -> Optional[Dict[str, Any]]:
+    """
+    Evaluate compiled selector specs against an HTML document.
+
+    Args:
+        html: Document source
+        specs: Specs from ``extract.compile_selectors``
+        base_url: URL the document was served from, for resolving href/src
+
+    Returns:
+        Values shaped like ``EXTRACT_SCRIPT``'s result, or None if a
+        selector or property needs a live page
+    """
+    if LexborHTMLParser is None:
+        return None
+    return _evaluate(LexborHTMLParser(html), specs, base_url)
+
+
+def looks_js_rendered(html: str) -> bool:
+    """Whether ``html`` is an app shell whose content is rendered by scripts."""
+    if LexborHTMLParser is None:
+        return False
+    return _js_rendered(LexborHTMLParser(html))
+
+
+def _evaluate(tree: "LexborHTMLParser", specs: List[Dict[str, Any]], base_url: str) -> Optional[Dict[str, Any]]:
+    base = tree.css_first("base[href]")
+    if base is not None:
+        base_url = urljoin(base_url, base.attributes.get('href') or "")
+
+    values = {}
+    try:
+        for spec in specs:
+            if not is_css_selector(spec['selector']):
+                raise _NeedsBrowser(spec['selector'])
+            found = [_read_node(node, spec, base_url) for node in tree.css(spec['selector'])]
+            values[spec['name']] = spec_value(spec, found)
+    except (_NeedsBrowser, SelectolaxError):
+        # Unsupported property, or a selector only the browser or Playwright accepts
+        return None
+    return values
+
+
+def _js_rendered(tree: "LexborHTMLParser") -> bool:
+    """``looks_js_rendered`` for a parsed tree; strips its scripts."""
+    for root in tree.css(_APP_ROOTS):
+        if root.child is None or not root.text().strip():
+            return True
+
+    noscript = " ".join(node.text() for node in tree.css("noscript")).lower()
+    tree.strip_tags(["script", "style", "noscript", "template"])
+    text = tree.body.text(separator=" ").strip() if tree.body is not None else ""
+    return "javascript" in noscript and len(text) < _MIN_STATIC_TEXT
+
+
+def extract_static(
+    url: str,
+    extract_selectors: Dict[str, SelectorSpec],
+    wait_for: Optional[str] = None,
+    pool: Optional[HTTPPool] = None,
+    domains: Optional[DomainModes] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Try an extraction without a browser.
+
+    Args:
+        url: Page URL
+        extract_selectors: Selector specs, as for ``browse_and_extract``
+        wait_for: Selector that must be present in the document
+        pool: Connection pool (default: the shared ``http_pool``)
+        domains: Per-domain decisions (default: the shared ``domain_modes``)
+
+    Returns:
+        The ``extracted`` dict, or None if the browser has to do it
+    """
+    if LexborHTMLParser is None:
+        logger.debug("selectolax is not installed; extracting with the browser")
+        return None
+    pool = pool or http_pool
+    domains = domains or domain_modes
+    if not domains.use_static(url):
+        return None
+
+    specs, errors = compile_selectors(extract_selectors)
+    try:
+        status, headers, html, final_url = pool.get(url)
+    except Exception as e:
+        logger.debug(f"Static fetch of {url} failed, using the browser: {e}")
+        return None
+    content_type = headers.get('content-type', 'text/html').lower()
+    if not 200 <= status < 300 or 'html' not in content_type:
+        logger.debug(f"Static fetch of {url} returned HTTP {status} {content_type}, using the browser")
+        return None
+
+    tree = LexborHTMLParser(html)
+    values = _evaluate(tree, specs, final_url)
+    if values is None:
+        return None
+    empty = [name for name, value in values.items() if value is None or value == []]
+    if wait_for:
+        if not is_css_selector(wait_for):
+            return None
+        try:
+            if tree.css_first(wait_for) is None:
+                empty.append(wait_for)
+        except SelectolaxError:
+            return None
+
+    if empty or _js_rendered(tree):
+        logger.debug(f"{url} looks script-rendered (nothing found for {empty}), using the browser")
+        domains.record(url, static_ok=False)
+        return None
+
+    domains.record(url, static_ok=True)
+    return merge_extracted(extract_selectors, values, errors)
+
+
+# Shared by every static extraction in the process
+http_pool = HTTPPool()
+domain_modes = DomainModes()
@@ -0,0 +1,76 @@
+"""URL canonicalization for cache keys and batch deduplication."""
+
+import fnmatch
+from typing import Optional, Dict, List, Iterable
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from .config import browser_config
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url: str, strip_params: Optional[Iterable[str]] = None) -> str:
+    """
+    Normalize ``url`` so equivalent spellings share one capture.
+
+    Lowercases the scheme and host, drops default ports, sorts query
+    parameters by name (repeated names keep their order), removes tracking
+    parameters and drops the fragment. Fragments that are client-side
+    routes (``#/path`` or ``#!path``) are kept, since they change what
+    the page renders. Anything that is not an absolute URL is returned
+    unchanged.
+
+    Args:
+        url: URL to normalize
+        strip_params: Query parameter names to remove, shell-style patterns
+            such as 'utm_*' allowed (default: browser_config.tracking_params)
+
+    Examples:
+        canonicalize_url("https://Example.com:443/?b=2&a=1&utm_source=x#top")
+        # -> "https://example.com/?a=1&b=2"
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+    if not parts.scheme or not parts.netloc:
+        return url
+
+    scheme = parts.scheme.lower()
+    host = parts.hostname or ""
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal
+    if port is not None and port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    userinfo = parts.netloc.rpartition("@")[0]
+    netloc = f"{userinfo}@{host}" if userinfo else host
+
+    patterns = [p.lower() for p in (browser_config.tracking_params if strip_params is None else strip_params)]
+    params = [
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not any(fnmatch.fnmatchcase(name.lower(), pattern) for pattern in patterns)
+    ]
+    params.sort(key=lambda param: param[0])
+
+    fragment = parts.fragment if parts.fragment.startswith(("/", "!")) else ""
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(params), fragment))
+
+
+def cache_url(url: str) -> str:
+    """``url`` as it keys the cache: canonical when ``canonicalize_urls`` is set."""
+    return canonicalize_url(url) if browser_config.canonicalize_urls else url
+
+
+def dedupe_urls(urls: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Group batch inputs that would capture the same page.
+
+    Returns:
+        Dict mapping each URL to capture (see ``cache_url``) to the inputs
+        it stands for, in first-seen order
+    """
+    groups: Dict[str, List[str]] = {}
+    for url in urls:
+        groups.setdefault(cache_url(url), []).append(url)
+    return groups
@@ -0,0 +1,75 @@
+"""Tests for the browser actor pool."""
+
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from snapwright.actor import BrowserActorPool
+from snapwright.exceptions import BrowserError, NavigationError
+
+
+@pytest.fixture
+def fake_managers():
+    """Replace BrowserManager with a recorder of owning threads."""
+    created = []
+
+    class FakeManager:
+        def __init__(self, shared=True):
+            assert shared is False
+            self.thread = threading.current_thread()
+            self.cleaned_up = False
+            created.append(self)
+
+        def cleanup(self):
+            self.cleaned_up = True
+
+    with patch('snapwright.actor.BrowserManager', FakeManager):
+        yield created
+
+
+class TestBrowserActorPool:
+    """Test job dispatch to browser-owning threads."""
+
+    def test_jobs_run_on_owning_thread(self, fake_managers):
+        """Test each job runs on the thread that owns its manager."""
+        def job(url, manager):
+            assert manager.thread is threading.current_thread()
+            return url.upper()
+
+        with BrowserActorPool(threads=2) as pool:
+            futures = [pool.submit(job, f"https://example{i}.com") for i in range(6)]
+            results = [f.result(timeout=5) for f in futures]
+
+        assert results == [f"HTTPS://EXAMPLE{i}.COM" for i in range(6)]
+        assert len(fake_managers) == 2
+        assert all(m.cleaned_up for m in fake_managers)
+
+    def test_capture_passes_manager(self, fake_managers):
+        """Test submit_capture forwards options and the actor's manager."""
+        with patch('snapwright.actor.capture_screenshot') as mock_capture:
+            mock_capture.return_value = "shot.png"
+            with BrowserActorPool(threads=1) as pool:
+                result = pool.capture_screenshot("https://example.com", full_page=False)
+
+        assert result == "shot.png"
+        mock_capture.assert_called_once_with(
+            "https://example.com", manager=fake_managers[0], full_page=False
+        )
+
+    def test_exception_propagates(self, fake_managers):
+        """Test job errors surface through the future."""
+        def job(manager):
+            raise NavigationError("boom")
+
+        with BrowserActorPool(threads=1) as pool:
+            with pytest.raises(NavigationError):
+                pool.submit(job).result(timeout=5)
+
+    def test_submit_after_shutdown(self, fake_managers):
+        """Test the pool rejects jobs once shut down."""
+        pool = BrowserActorPool(threads=1)
+        pool.shutdown()
+
+        with pytest.raises(BrowserError):
+            pool.submit(lambda manager: None)
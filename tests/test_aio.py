@@ -0,0 +1,170 @@
+"""Tests for the asyncio engine."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, Mock, patch
+
+from snapwright import aio
+from snapwright.cache import CacheEntry
+from snapwright.exceptions import NavigationError
+
+
+def make_manager(page):
+    """Build a fake AsyncBrowserManager whose pages are ``page``."""
+    manager = Mock()
+    manager.resolve_profile = AsyncMock(return_value=None)
+
+    @asynccontextmanager
+    async def fake_page(profile=None):
+        yield page
+
+    manager.page = fake_page
+    return manager
+
+
+class TestAsyncCapture:
+    """Test async screenshot capture."""
+
+    @patch('snapwright.aio.screenshot_cache')
+    def test_cache_hit_skips_browser(self, mock_cache, tmp_path):
+        """Test cache hit does not touch the manager."""
+        cached_path = tmp_path / "cached.png"
+        cached_path.touch()
+        mock_cache.lookup.return_value = CacheEntry(path=cached_path)
+        manager = Mock()
+
+        result = asyncio.run(aio.capture_screenshot("https://example.com", manager=manager))
+
+        assert result == cached_path
+        manager.page.assert_not_called()
+
+    @patch('snapwright.aio.screenshot_cache')
+    def test_capture_saves_to_cache(self, mock_cache, tmp_path):
+        """Test capture renders the page and stores it in the cache."""
+        mock_cache.lookup.return_value = None
+        mock_cache.revalidate.return_value = None
+        page = AsyncMock()
+        page.goto.return_value = Mock(headers={'etag': '"v1"'}, body=AsyncMock(return_value=b"<html>"))
+        output_path = tmp_path / "shot.png"
+
+        result = asyncio.run(aio.capture_screenshot(
+            "https://example.com",
+            output_path=output_path,
+            manager=make_manager(page)
+        ))
+
+        assert result == output_path
+        page.goto.assert_awaited_once()
+        page.screenshot.assert_awaited_once_with(path=str(output_path), full_page=True)
+        mock_cache.save_to_cache.assert_called_once()
+        assert mock_cache.save_to_cache.call_args.kwargs['validators']['etag'] == '"v1"'
+
+
+class TestAsyncBatch:
+    """Test concurrent batch capture."""
+
+    def test_batch_respects_concurrency(self, tmp_path):
+        """Test no more than ``concurrency`` captures run at once."""
+        urls = [f"https://example{i}.com" for i in range(10)]
+        in_flight = 0
+        peak = 0
+
+        async def fake_capture(url, output_path, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return output_path
+
+        with patch('snapwright.aio.capture_screenshot', side_effect=fake_capture):
+            results = asyncio.run(aio.batch_screenshots(
+                urls, output_dir=tmp_path, concurrency=3, manager=Mock()
+            ))
+
+        assert list(results) == urls
+        assert all(path is not None for path in results.values())
+        assert peak == 3
+
+    def test_batch_failure_maps_to_none(self, tmp_path):
+        """Test one failing URL does not abort the batch."""
+        async def fake_capture(url, output_path, **kwargs):
+            if "bad" in url:
+                raise NavigationError("boom")
+            return output_path
+
+        with patch('snapwright.aio.capture_screenshot', side_effect=fake_capture):
+            results = asyncio.run(aio.batch_screenshots(
+                ["https://good.com", "https://bad.com"], output_dir=tmp_path, manager=Mock()
+            ))
+
+        assert results["https://good.com"] is not None
+        assert results["https://bad.com"] is None
+
+    def test_batch_unexpected_error_maps_to_none(self, tmp_path):
+        """Test errors other than BrowserError do not abort the batch either."""
+        async def fake_capture(url, output_path, **kwargs):
+            if "bad" in url:
+                raise OSError("disk full")
+            return output_path
+
+        with patch('snapwright.aio.capture_screenshot', side_effect=fake_capture):
+            results = asyncio.run(aio.batch_screenshots(
+                ["https://good.com", "https://bad.com"], output_dir=tmp_path, manager=Mock()
+            ))
+
+        assert results["https://good.com"] is not None
+        assert results["https://bad.com"] is None
+
+
+class TestAsyncBrowserManager:
+    """Test page bookkeeping."""
+
+    def test_page_released_after_close(self):
+        """Test a page finishing after the manager closed does not fail."""
+        manager = aio.AsyncBrowserManager()
+        context = AsyncMock()
+        manager._acquire_context = AsyncMock(return_value=context)
+        manager._in_flight[context] = 1
+
+        async def run():
+            async with manager.page():
+                await manager.close()
+
+        asyncio.run(run())
+
+        assert manager._in_flight == {}
+
+
+class TestAsyncExtract:
+    """Test async browse and extract."""
+
+    def test_extracts_with_one_evaluate_and_locators(self):
+        """Test CSS specs share one evaluate and Playwright selectors use locators."""
+        page = AsyncMock()
+        page.evaluate.return_value = {"title": "Title"}
+        page.locator = Mock()
+        page.locator.return_value.evaluate_all = AsyncMock(return_value=["Contact us"])
+
+        result = asyncio.run(aio.browse_and_extract(
+            "https://example.com",
+            {"title": "h1", "contact": "text=Contact us"},
+            manager=make_manager(page)
+        ))
+
+        assert result['error'] is None
+        assert result['engine'] == 'browser'
+        assert result['extracted'] == {"title": "Title", "contact": "Contact us"}
+        assert [spec['name'] for spec in page.evaluate.call_args[0][1]] == ["title"]
+        page.locator.assert_called_once_with("text=Contact us")
+
+    def test_failure_becomes_error_result(self):
+        page = AsyncMock()
+        page.goto.side_effect = RuntimeError("net::ERR_NAME_NOT_RESOLVED")
+
+        result = asyncio.run(aio.browse_and_extract(
+            "https://example.invalid", {"title": "h1"}, manager=make_manager(page)
+        ))
+
+        assert result['error'] == "net::ERR_NAME_NOT_RESOLVED"
+        assert result['extracted'] == {}
@@ -0,0 +1,124 @@
+"""Tests for streaming batch extraction."""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+
+from snapwright.batch import batch_extract
+
+
+class FakeManager:
+    """AsyncBrowserManager stand-in that owns nothing; counts instances."""
+
+    instances = 0
+
+    def __init__(self):
+        FakeManager.instances += 1
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+async def _fake_extract(url, extract_selectors, manager, **kwargs):
+    """aio.browse_and_extract stand-in; URLs ending in 'slow' take longer."""
+    _fake_extract.in_flight += 1
+    _fake_extract.peak = max(_fake_extract.peak, _fake_extract.in_flight)
+    try:
+        await asyncio.sleep(0.2 if url.endswith("slow") else 0.01)
+    finally:
+        _fake_extract.in_flight -= 1
+    if url.endswith("crash"):
+        raise RuntimeError("browser crashed")
+    _fake_extract.finished += 1
+    return {
+        'url': url,
+        'extracted': {name: f"{url} {selector}" for name, selector in extract_selectors.items()},
+        'error': None,
+        'kwargs': kwargs,
+    }
+
+
+@pytest.fixture
+def fake_extract():
+    FakeManager.instances = 0
+    _fake_extract.in_flight = _fake_extract.peak = _fake_extract.finished = 0
+    with patch('snapwright.aio.AsyncBrowserManager', FakeManager), \
+            patch('snapwright.aio.browse_and_extract', side_effect=_fake_extract) as mock_extract:
+        yield mock_extract
+
+
+class TestBatchExtract:
+    """Test concurrency, streaming and JSONL output."""
+
+    def test_results_stream_in_completion_order(self, fake_extract):
+        """Test a slow page doesn't hold back the ones after it."""
+        urls = ["https://a.example.com/slow", "https://b.example.com", "https://c.example.com"]
+
+        results = list(batch_extract(urls, {"title": "h1"}, concurrency=2, wait_for="h1"))
+
+        assert sorted(r['url'] for r in results) == sorted(urls)
+        assert results[-1]['url'] == "https://a.example.com/slow"
+        assert results[0]['extracted'] == {"title": f"{results[0]['url']} h1"}
+        assert all(r['kwargs'] == {"wait_for": "h1"} for r in results)
+
+    def test_pages_share_one_browser(self, fake_extract):
+        """Test concurrency is pages in one browser, not one browser per slot."""
+        urls = [f"https://example.com/{i}" for i in range(12)]
+
+        results = list(batch_extract(urls, {"title": "h1"}, concurrency=4))
+
+        assert len(results) == 12
+        assert FakeManager.instances == 1
+        assert _fake_extract.peak == 4
+
+    def test_writes_jsonl(self, fake_extract, tmp_path):
+        """Test every result is written as one JSON line."""
+        output = tmp_path / "out.jsonl"
+        urls = [f"https://example.com/{i}" for i in range(5)]
+
+        for _ in batch_extract(urls, {"title": "h1"}, concurrency=2, output=output):
+            pass
+
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+        assert sorted(r['url'] for r in records) == urls
+
+    def test_failed_job_becomes_error_result(self, fake_extract):
+        results = list(batch_extract(["https://example.com/crash"], {"title": "h1"}, concurrency=1))
+
+        assert results[0]['url'] == "https://example.com/crash"
+        assert results[0]['error'] == "browser crashed"
+        assert results[0]['extracted'] == {}
+        assert results[0]['engine'] == 'browser'
+
+    def test_reads_urls_lazily(self, fake_extract):
+        """Test only a bounded window of the input is pulled ahead."""
+        pulled = []
+
+        def urls():
+            for i in range(100):
+                pulled.append(i)
+                yield f"https://example.com/{i}"
+
+        results = batch_extract(urls(), {"title": "h1"}, concurrency=2)
+        next(results)
+
+        assert len(pulled) <= 2 + 1
+        assert sum(1 for _ in results) == 99
+
+    def test_close_cancels_pending(self, fake_extract):
+        """Test closing the generator early cancels the pages in flight."""
+        results = batch_extract(
+            ["https://example.com/fast"] + [f"https://example.com/{i}/slow" for i in range(4)],
+            {"title": "h1"},
+            concurrency=5
+        )
+        next(results)
+        results.close()
+
+        assert _fake_extract.finished == 1
+        assert _fake_extract.in_flight == 0
@@ -0,0 +1,343 @@
+"""Tests for browser manager page and context handling."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+
+from snapwright.browser_manager import BrowserManager, EmulationProfile
+from snapwright.config import browser_config
+
+
+class FakePage:
+    """Minimal stand-in for a Playwright page."""
+
+    def __init__(self, context):
+        self.context = context
+        self.url = "about:blank"
+        self.closed = False
+
+    def goto(self, url, **kwargs):
+        self.url = url
+
+    def is_closed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+        self.context.pages.remove(self)
+
+
+class FakeContext:
+    """Minimal stand-in for a Playwright browser context."""
+
+    def __init__(self, **options):
+        self.options = options
+        self.pages = []
+        self.closed = False
+        self.handlers = {}
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    def close(self):
+        self.closed = True
+        for handler in self.handlers.get("close", []):
+            handler(self)
+
+
+@pytest.fixture
+def manager():
+    """A private manager wired to a fake browser."""
+    manager = BrowserManager(shared=False)
+    manager.browser = Mock()
+    manager.browser.new_context.side_effect = FakeContext
+    manager.playwright = Mock(devices={
+        "Pixel 5": {
+            "viewport": {"width": 393, "height": 727},
+            "device_scale_factor": 2.75,
+            "is_mobile": True,
+            "has_touch": True,
+            "user_agent": "Mozilla/5.0 (Linux; Android 11; Pixel 5)",
+        }
+    })
+    yield manager
+
+
+class TestPagePool:
+    """Test page checkout/checkin."""
+
+    def test_page_is_reused(self, manager):
+        """Test a checked-in page is handed out again."""
+        page = manager.checkout_page()
+        page.goto("https://example.com")
+        manager.checkin_page(page)
+
+        assert page.url == "about:blank"
+        assert manager.checkout_page() is page
+
+    def test_busy_page_not_shared(self, manager):
+        """Test two checkouts get different pages."""
+        first = manager.checkout_page()
+        second = manager.checkout_page()
+
+        assert first is not second
+
+    def test_discard_closes_page(self, manager):
+        """Test a discarded page is closed instead of pooled."""
+        page = manager.checkout_page()
+        manager.checkin_page(page, discard=True)
+
+        assert page.is_closed()
+        assert manager.checkout_page() is not page
+
+    def test_max_uses_recycles_page(self, manager):
+        """Test pages are closed after ``page_max_uses`` captures."""
+        browser_config.update(page_max_uses=2)
+        try:
+            page = manager.checkout_page()
+            manager.checkin_page(page)
+            assert manager.checkout_page() is page
+            manager.checkin_page(page)
+            assert page.is_closed()
+        finally:
+            browser_config.update(page_max_uses=50)
+
+    def test_unhealthy_page_dropped(self, manager):
+        """Test a pooled page that navigated away is not handed out."""
+        page = manager.checkout_page()
+        manager.checkin_page(page)
+        page.url = "https://stale.example.com"
+
+        assert manager.checkout_page() is not page
+        assert page.is_closed()
+
+    def test_prewarm(self, manager):
+        """Test prewarm fills every context's pool."""
+        manager.prewarm(pages_per_context=2)
+
+        assert len(manager.contexts) == browser_config.max_contexts
+        assert all(len(ctx.pages) == 2 for ctx in manager.contexts)
+
+
+class TestEmulationProfiles:
+    """Test contexts keyed by emulation profile."""
+
+    def test_device_from_registry(self, manager):
+        """Test device names resolve through Playwright's registry."""
+        profile = manager.resolve_profile(device_name="Pixel 5")
+
+        assert profile.viewport_width == 393
+        assert profile.is_mobile and profile.has_touch
+        assert profile.user_agent.startswith("Mozilla/5.0 (Linux; Android 11")
+
+    def test_unknown_device_falls_back(self, manager):
+        """Test unknown devices use the generic mobile profile."""
+        assert manager.resolve_profile(device_name="Nokia 3310") == EmulationProfile.generic_mobile()
+
+    def test_profiles_get_own_contexts(self, manager):
+        """Test mobile pages come from a context configured for mobile."""
+        desktop_page = manager.checkout_page()
+        mobile_page = manager.checkout_page(manager.resolve_profile(mobile=True))
+
+        assert desktop_page.context is not mobile_page.context
+        assert mobile_page.context.options["is_mobile"] is True
+        assert desktop_page.context.options["is_mobile"] is False
+
+    def test_profile_context_reused(self, manager):
+        """Test repeated mobile captures reuse the same context."""
+        profile = manager.resolve_profile(device_name="Pixel 5")
+        page = manager.checkout_page(profile)
+        manager.checkin_page(page)
+
+        assert manager.checkout_page(profile).context is page.context
+        assert len(manager.contexts) == 1
+
+    def test_lru_profile_evicted(self, manager):
+        """Test idle profiles beyond ``max_profiles`` are closed, oldest first."""
+        browser_config.update(max_profiles=2)
+        try:
+            profiles = [EmulationProfile(100 * i, 100) for i in range(1, 4)]
+            contexts = []
+            for profile in profiles:
+                page = manager.checkout_page(profile)
+                manager.checkin_page(page)
+                contexts.append(page.context)
+
+            assert contexts[0].closed
+            assert not contexts[1].closed and not contexts[2].closed
+            assert len(manager.contexts) == 2
+        finally:
+            browser_config.update(max_profiles=4)
+
+
+class TestContextLifecycle:
+    """Test context recycling and accounting."""
+
+    def test_idle_context_reused_not_leaked(self, manager):
+        """Test a context whose pages were all closed is reused, not dropped."""
+        page = manager.checkout_page()
+        manager.checkin_page(page, discard=True)
+
+        assert manager.checkout_page().context is page.context
+        assert manager.get_stats()['contexts_created'] == 1
+
+    def test_max_uses_recycles_context(self, manager):
+        """Test a context is closed after ``context_max_uses`` pages."""
+        browser_config.update(context_max_uses=2)
+        try:
+            first = manager.checkout_page()
+            manager.checkin_page(first)
+            second = manager.checkout_page()
+            manager.checkin_page(second)
+            third = manager.checkout_page()
+
+            assert first.context.closed
+            assert third.context is not first.context
+            assert manager.get_stats()['contexts_closed'] == 1
+        finally:
+            browser_config.update(context_max_uses=500)
+
+    def test_busy_context_retired_on_checkin(self, manager):
+        """Test an expired context with pages in flight closes when they return."""
+        browser_config.update(context_max_uses=1)
+        try:
+            busy = manager.checkout_page()
+            other = manager.checkout_page()
+
+            assert other.context is not busy.context
+            assert not busy.context.closed
+
+            manager.checkin_page(busy)
+            assert busy.context.closed
+        finally:
+            browser_config.update(context_max_uses=500)
+
+    def test_max_age_recycles_context(self, manager):
+        """Test a context older than ``context_max_age`` is replaced."""
+        page = manager.checkout_page()
+        manager.checkin_page(page)
+        manager._managed[page.context].created_at -= browser_config.context_max_age
+
+        assert manager.checkout_page().context is not page.context
+        assert page.context.closed
+
+    def test_externally_closed_context_forgotten(self, manager):
+        """Test a context closed by Playwright is dropped from the pool."""
+        page = manager.checkout_page()
+        page.context.close()
+
+        assert manager.get_stats()['live_contexts'] == 0
+        assert manager.checkout_page().context is not page.context
+
+    def test_stats(self, manager):
+        """Test live counters reflect busy and idle pages."""
+        busy = manager.checkout_page()
+        idle = manager.checkout_page()
+        manager.checkin_page(idle)
+
+        stats = manager.get_stats()
+        assert stats['live_contexts'] == 2
+        assert stats['busy_contexts'] == 1
+        assert stats['busy_pages'] == 1
+        assert stats['idle_pages'] == 1
+        assert stats['pages_created'] == 2
+        assert busy is not idle
+
+
+class TestCrashRecovery:
+    """Test relaunch after the browser disconnects."""
+
+    @pytest.fixture
+    def launches(self, manager):
+        """Replace browser launches with fresh fake browsers."""
+        browsers = []
+
+        def fake_launch():
+            browser = Mock()
+            browser.is_connected.return_value = True
+            browser.new_context.side_effect = FakeContext
+            browsers.append(browser)
+            return browser
+
+        manager.browser = None
+        with patch.object(manager, '_launch', side_effect=fake_launch):
+            yield browsers
+
+    def test_relaunch_after_crash(self, manager, launches):
+        """Test a disconnected browser is replaced on next use."""
+        first = manager.get_browser()
+        page = manager.checkout_page()
+        generation = manager.generation
+
+        first.is_connected.return_value = False
+        manager._on_disconnected(first)
+
+        assert manager.crashed_since(generation)
+        assert manager.get_browser() is not first
+        assert manager.get_stats()['live_contexts'] == 0
+        assert manager.get_stats()['browser_crashes'] == 1
+        manager.checkin_page(page)
+
+    def test_standby_promoted(self, manager, launches):
+        """Test the warm standby takes over and is replenished when idle."""
+        browser_config.update(warm_standby=True)
+        try:
+            primary = manager.get_browser()
+            standby = launches[1]
+
+            manager._on_disconnected(primary)
+            assert manager.get_browser() is standby
+            assert len(launches) == 2
+
+            page = manager.checkout_page()
+            manager.checkin_page(page)
+            assert len(launches) == 3
+            assert manager.get_stats()['standby_ready']
+        finally:
+            browser_config.update(warm_standby=False)
+
+    def test_no_crash_reported_while_connected(self, manager, launches):
+        """Test a healthy browser is not reported as crashed."""
+        manager.get_browser()
+
+        assert not manager.crashed_since(manager.generation)
+
+    def test_crash_records_pruned(self, manager, launches):
+        """Test a crash is forgotten once no page from that browser is out."""
+        first = manager.get_browser()
+        page = manager.checkout_page()
+        generation = manager.generation
+
+        manager._on_disconnected(first)
+        later = manager.checkout_page()
+        manager.checkin_page(later)
+        assert manager.crashed_since(generation)
+
+        manager.checkin_page(page)
+        assert not manager.crashed_since(generation)
+
+    def test_recycle_closes_idle_browser(self, manager, launches):
+        """Test a recycled browser without contexts is closed at once."""
+        first = manager.get_browser()
+
+        manager.recycle_browser()
+
+        first.close.assert_called_once()
+        assert manager.get_stats()['draining_browsers'] == 0
+        assert manager.get_browser() is not first
+
+    def test_recycle_waits_for_checked_out_pages(self, manager, launches):
+        """Test a recycled browser stays open until its pages come back."""
+        first = manager.get_browser()
+        page = manager.checkout_page()
+
+        manager.recycle_browser()
+        first.close.assert_not_called()
+
+        manager.checkin_page(page)
+        first.close.assert_called_once()
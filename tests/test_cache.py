@@ -0,0 +1,528 @@
+"""Tests for the screenshot cache."""
+
+import json
+import multiprocessing
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from snapwright.cache import MemoryCache, ScreenshotCache, detach_output
+from snapwright.config import browser_config
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    """Point the cache at a temporary directory."""
+    original = browser_config.cache_dir
+    browser_config.update(cache_dir=str(tmp_path / "cache"))
+    yield tmp_path / "cache"
+    browser_config.update(cache_dir=original)
+
+
+@pytest.fixture
+def cache(cache_dir):
+    """A cache backed by a fresh index."""
+    cache = ScreenshotCache()
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def png(tmp_path):
+    """A small file standing in for a screenshot."""
+    path = tmp_path / "shot.png"
+    path.write_bytes(b"\x89PNG fake")
+    return path
+
+
+class TestIndex:
+    """Test the SQLite metadata index."""
+
+    def test_save_and_hit(self, cache, png):
+        """Test a saved screenshot is found again."""
+        cached = cache.save_to_cache("https://example.com", png, {'full_page': True})
+
+        assert cache.get_cached_path("https://example.com", {'full_page': True}) == cached
+        assert cache.get_cached_path("https://example.com", {'full_page': False}) is None
+
+    def test_index_shared_between_instances(self, cache, cache_dir, png):
+        """Test entries are persisted, not held in one instance's memory."""
+        cache.save_to_cache("https://example.com", png)
+
+        other = ScreenshotCache()
+        try:
+            assert other.get_cached_path("https://example.com") is not None
+        finally:
+            other.close()
+
+    def test_orphaned_entry_removed(self, cache, png):
+        """Test an entry whose file disappeared is dropped."""
+        cache.save_to_cache("https://example.com", png).unlink()
+
+        assert cache.get_cached_path("https://example.com") is None
+        assert cache.get_cache_stats()['total_entries'] == 0
+
+    def test_cleanup_expired(self, cache, png):
+        """Test cleanup removes entries and files past the TTL."""
+        old = cache.save_to_cache("https://old.example.com", png)
+        cache.save_bytes_to_cache("https://new.example.com", b"\x89PNG new")
+        cache._execute(
+            "UPDATE entries SET created_at = ? WHERE url = ?",
+            (time.time() - browser_config.cache_ttl_hours * 3600 - 60, "https://old.example.com")
+        )
+
+        cache.cleanup_old_cache(force=True)
+
+        assert not old.exists()
+        assert cache.get_cache_stats()['total_entries'] == 1
+
+    def test_migrates_json_metadata(self, cache_dir, png):
+        """Test the legacy JSON index is imported once and retired."""
+        cache_dir.mkdir(parents=True)
+        (cache_dir / "abc.png").write_bytes(png.read_bytes())
+        (cache_dir / "cache_metadata.json").write_text(json.dumps({
+            "abc": {
+                'url': "https://example.com",
+                'filename': "abc.png",
+                'timestamp': (datetime.now() - timedelta(minutes=5)).isoformat(),
+                'options': {}
+            }
+        }))
+
+        cache = ScreenshotCache()
+        try:
+            assert cache.get_cache_stats()['total_entries'] == 1
+            assert not (cache_dir / "cache_metadata.json").exists()
+            assert (cache_dir / "cache_metadata.json.migrated").exists()
+        finally:
+            cache.close()
+
+
+class TestContentAddressedStore:
+    """Test deduplicated storage and delivery."""
+
+    def test_identical_images_stored_once(self, cache, cache_dir, png):
+        """Test two entries with the same image share one file."""
+        first = cache.save_to_cache("https://a.example.com", png)
+        second = cache.save_bytes_to_cache("https://b.example.com", png.read_bytes())
+
+        assert first == second
+        assert len(list(cache_dir.rglob("*.png"))) == 1
+
+    def test_shared_file_kept_until_unreferenced(self, cache, png, tmp_path):
+        """Test replacing one entry keeps a file still used by another."""
+        shared = cache.save_to_cache("https://a.example.com", png)
+        cache.save_to_cache("https://b.example.com", png)
+
+        cache.save_bytes_to_cache("https://a.example.com", b"\x89PNG other")
+        assert shared.exists()
+
+        cache.save_bytes_to_cache("https://b.example.com", b"\x89PNG other")
+        assert not shared.exists()
+
+    def test_hardlink_delivery(self, cache, png, tmp_path):
+        """Test hardlink delivery shares the cached file and detach breaks it."""
+        browser_config.update(cache_delivery="hardlink")
+        try:
+            cached = cache.save_bytes_to_cache("https://example.com", png.read_bytes())
+            output = cache.deliver(cached, tmp_path / "out" / "shot.png")
+
+            assert output.read_bytes() == png.read_bytes()
+            assert output.stat().st_ino == cached.stat().st_ino
+
+            detach_output(output)
+            assert not output.exists()
+            assert cached.exists()
+        finally:
+            browser_config.update(cache_delivery="reflink")
+
+    def test_reflink_delivery_is_independent(self, cache, png, tmp_path):
+        """Test the default delivery gives a separate file with the same content."""
+        cached = cache.save_bytes_to_cache("https://example.com", png.read_bytes())
+        output = cache.deliver(cached, tmp_path / "shot-copy.png")
+
+        output.write_bytes(b"edited")
+        assert cached.read_bytes() == png.read_bytes()
+
+
+@pytest.fixture
+def budget():
+    """Apply cache budget settings for one test."""
+    def apply(**settings):
+        browser_config.update(**settings)
+    yield apply
+    browser_config.update(max_cache_bytes=0, max_cache_entries=0, cache_eviction="lru")
+
+
+class TestEviction:
+    """Test size-bounded eviction."""
+
+    def test_lru_evicts_least_recently_used(self, cache, budget):
+        """Test the entry not read for longest goes first."""
+        budget(max_cache_entries=2)
+        cache.save_bytes_to_cache("https://a.example.com", b"a")
+        cache.save_bytes_to_cache("https://b.example.com", b"b")
+        cache.get_cached_path("https://a.example.com")
+
+        cache.save_bytes_to_cache("https://c.example.com", b"c")
+
+        assert cache.get_cached_path("https://a.example.com") is not None
+        assert cache.get_cached_path("https://b.example.com") is None
+        assert cache.get_cached_path("https://c.example.com") is not None
+
+    def test_byte_budget(self, cache, cache_dir, budget):
+        """Test total image bytes stay within ``max_cache_bytes``."""
+        budget(max_cache_bytes=250)
+        for i in range(5):
+            cache.save_bytes_to_cache(f"https://{i}.example.com", bytes([i]) * 100)
+
+        assert sum(f.stat().st_size for f in cache_dir.rglob("*.png")) <= 250
+        assert cache.get_cached_path("https://4.example.com") is not None
+
+    def test_newest_entry_kept_even_if_oversized(self, cache, budget):
+        """Test an entry larger than the budget is not evicted by its own insert."""
+        budget(max_cache_bytes=10)
+
+        assert cache.save_bytes_to_cache("https://big.example.com", b"x" * 100).exists()
+
+    def test_greedy_dual_size_keeps_costly_small_entries(self, cache, budget):
+        """Test GreedyDual-Size evicts large cheap captures before small slow ones."""
+        budget(max_cache_entries=2, cache_eviction="gds")
+        cache.save_bytes_to_cache("https://slow.example.com", b"s" * 100, cost=20.0)
+        cache.save_bytes_to_cache("https://cheap.example.com", b"c" * 10000, cost=0.5)
+
+        cache.save_bytes_to_cache("https://new.example.com", b"n" * 100, cost=5.0)
+
+        assert cache.get_cached_path("https://slow.example.com") is not None
+        assert cache.get_cached_path("https://cheap.example.com") is None
+
+    def test_upgrades_older_index(self, cache_dir, png):
+        """Test an index without eviction columns is upgraded and backfilled."""
+        cache_dir.mkdir(parents=True)
+        (cache_dir / "old.png").write_bytes(png.read_bytes())
+        db = sqlite3.connect(str(cache_dir / "cache_index.sqlite3"))
+        db.execute(
+            "CREATE TABLE entries (key TEXT PRIMARY KEY, url TEXT NOT NULL, filename TEXT NOT NULL, "
+            "created_at REAL NOT NULL, options TEXT NOT NULL)"
+        )
+        db.execute("INSERT INTO entries VALUES ('k', 'https://example.com', 'old.png', ?, '{}')", (time.time(),))
+        db.commit()
+        db.close()
+
+        cache = ScreenshotCache()
+        try:
+            size, last_access = cache._execute("SELECT size, last_access FROM entries")[0]
+            assert size == png.stat().st_size
+            assert last_access > 0
+        finally:
+            cache.close()
+
+
+class TestMemoryCache:
+    """Test the in-process cache of hot screenshot bytes."""
+
+    def test_bounded_by_bytes(self):
+        """Test least recently used bytes are dropped beyond the limit."""
+        memory = MemoryCache(max_bytes=250)
+        expires = time.time() + 60
+        memory.put("a", b"a" * 100, expires)
+        memory.put("b", b"b" * 100, expires)
+        memory.get("a")
+        memory.put("c", b"c" * 100, expires)
+
+        assert memory.get("b") is None
+        assert memory.get("a") and memory.get("c")
+        assert memory.size == 200
+
+    def test_expired_entry_dropped(self):
+        """Test entries are not served past their expiry."""
+        memory = MemoryCache(max_bytes=100)
+        memory.put("a", b"a", time.time() - 1)
+
+        assert memory.get("a") is None
+        assert len(memory) == 0
+
+    def test_hit_skips_index_and_disk(self, cache):
+        """Test a memory hit makes no index query and no file read."""
+        browser_config.update(memory_cache_mb=1)
+        try:
+            cache.save_bytes_to_cache("https://example.com", b"\x89PNG hot")
+
+            with patch.object(cache, '_execute', side_effect=AssertionError("index queried")), \
+                    patch('pathlib.Path.read_bytes', side_effect=AssertionError("file read")), \
+                    patch('pathlib.Path.exists', side_effect=AssertionError("file stat")):
+                assert cache.get_cached_bytes("https://example.com") == b"\x89PNG hot"
+        finally:
+            browser_config.update(memory_cache_mb=0)
+
+    def test_disk_hit_promoted(self, cache, png):
+        """Test bytes read from disk are kept in memory for the next caller."""
+        browser_config.update(memory_cache_mb=1)
+        try:
+            cache.save_to_cache("https://example.com", png)
+            assert len(cache.memory) == 0
+
+            assert cache.get_cached_bytes("https://example.com") == png.read_bytes()
+            assert len(cache.memory) == 1
+        finally:
+            browser_config.update(memory_cache_mb=0)
+
+    def test_disabled_by_default(self, cache):
+        """Test nothing is held in memory unless configured."""
+        cache.save_bytes_to_cache("https://example.com", b"\x89PNG")
+
+        assert len(cache.memory) == 0
+        assert cache.get_cached_bytes("https://example.com") == b"\x89PNG"
+
+
+def age_entry(cache, url, seconds):
+    """Move an entry's creation time ``seconds`` into the past."""
+    cache._execute(
+        "UPDATE entries SET created_at = created_at - ? WHERE url = ?", (seconds, url)
+    )
+
+
+class TestRevalidationModes:
+    """Test stale-while-revalidate and refresh-ahead flags."""
+
+    @pytest.fixture(autouse=True)
+    def modes(self):
+        browser_config.update(cache_stale_hours=1, cache_refresh_ahead=0.1, cache_refresh_min_hits=2)
+        yield
+        browser_config.update(cache_stale_hours=0, cache_refresh_ahead=0.0, cache_refresh_min_hits=3)
+
+    def test_stale_entry_served_for_refresh(self, cache):
+        """Test an expired entry inside the stale window is returned flagged."""
+        cache.save_bytes_to_cache("https://example.com", b"\x89PNG")
+        age_entry(cache, "https://example.com", browser_config.cache_ttl_hours * 3600 + 60)
+
+        entry = cache.lookup("https://example.com")
+
+        assert entry.stale and entry.refresh
+        assert cache.get_cached_path("https://example.com") is None
+
+    def test_past_stale_window_is_a_miss(self, cache):
+        """Test entries beyond TTL plus the stale window are not served."""
+        cache.save_bytes_to_cache("https://example.com", b"\x89PNG")
+        age_entry(cache, "https://example.com", (browser_config.cache_ttl_hours + 1) * 3600 + 60)
+
+        assert cache.lookup("https://example.com") is None
+
+    def test_refresh_ahead_only_for_popular_entries(self, cache):
+        """Test entries near expiry are refreshed once they have enough hits."""
+        cache.save_bytes_to_cache("https://example.com", b"\x89PNG")
+        age_entry(cache, "https://example.com", browser_config.cache_ttl_hours * 3600 * 0.95)
+
+        first = cache.lookup("https://example.com")
+        second = cache.lookup("https://example.com")
+
+        assert not first.stale and not first.refresh
+        assert second.refresh
+
+    def test_hits_survive_recapture(self, cache):
+        """Test a refreshed entry keeps its popularity."""
+        cache.save_bytes_to_cache("https://example.com", b"\x89PNG old")
+        cache.lookup("https://example.com")
+        cache.save_bytes_to_cache("https://example.com", b"\x89PNG new")
+
+        assert cache._execute("SELECT hits FROM entries")[0][0] == 1
+
+
+class TestConditionalRevalidation:
+    """Test renewing expired entries whose page is unchanged."""
+
+    @pytest.fixture(autouse=True)
+    def enabled(self):
+        browser_config.update(cache_revalidate=True)
+        yield
+        browser_config.update(cache_revalidate=False)
+
+    def test_unchanged_page_extends_ttl(self, cache):
+        """Test a revalidated entry is served and fresh again."""
+        cache.save_bytes_to_cache("https://example.com", b"\x89PNG", validators={'etag': '"v1"'})
+        age_entry(cache, "https://example.com", browser_config.cache_ttl_hours * 3600 + 60)
+
+        with patch('snapwright.cache.document_unchanged', return_value=True) as unchanged:
+            entry = cache.revalidate("https://example.com", read=True)
+
+        unchanged.assert_called_once_with("https://example.com", '"v1"', None, None)
+        assert entry.data == b"\x89PNG"
+        assert cache.get_cached_path("https://example.com") is not None
+
+    def test_changed_page_is_a_miss(self, cache):
+        """Test a changed page leaves the entry expired."""
+        cache.save_bytes_to_cache("https://example.com", b"\x89PNG", validators={'body_hash': "abc"})
+        age_entry(cache, "https://example.com", browser_config.cache_ttl_hours * 3600 + 60)
+
+        with patch('snapwright.cache.document_unchanged', return_value=False):
+            assert cache.revalidate("https://example.com") is None
+
+        assert cache.get_cached_path("https://example.com") is None
+
+    def test_disabled_by_default(self, cache):
+        """Test no request is made unless cache_revalidate is set."""
+        browser_config.update(cache_revalidate=False)
+        cache.save_bytes_to_cache("https://example.com", b"\x89PNG", validators={'etag': '"v1"'})
+
+        with patch('snapwright.cache.document_unchanged') as unchanged:
+            assert cache.revalidate("https://example.com") is None
+
+        unchanged.assert_not_called()
+
+
+class TestNegativeCache:
+    """Test records of failed captures."""
+
+    def test_failure_served_until_ttl(self, cache):
+        """Test a recorded failure is returned by lookup while fresh."""
+        cache.record_failure("https://dead.example.com", {}, "NavigationError", "net::ERR_NAME_NOT_RESOLVED")
+
+        entry = cache.lookup("https://dead.example.com", {})
+
+        assert entry.error == "NavigationError"
+        assert entry.retry_at - time.time() == pytest.approx(browser_config.failure_ttls['NavigationError'], abs=5)
+        assert cache.get_cached_path("https://dead.example.com", {}) is None
+
+        cache._execute("UPDATE failures SET expires_at = ?", (time.time() - 1,))
+        assert cache.lookup("https://dead.example.com", {}) is None
+
+    def test_ttl_per_error_type(self, cache):
+        """Test unlisted errors use the default TTL and a TTL of 0 records nothing."""
+        original = dict(browser_config.failure_ttls)
+        browser_config.update(failure_ttls={'ScreenshotError': 0, 'default': 30})
+        try:
+            cache.record_failure("https://a.example.com", {}, "ScreenshotError", "boom")
+            cache.record_failure("https://b.example.com", {}, "SomethingElse", "boom")
+        finally:
+            browser_config.update(failure_ttls=original)
+
+        assert cache.lookup("https://a.example.com", {}) is None
+        assert cache.lookup("https://b.example.com", {}).retry_at - time.time() <= 30
+
+    def test_success_clears_failure(self, cache):
+        """Test a successful capture clears failures recorded under the capture's wait options."""
+        from snapwright.core import _cache_options, _failure_options
+
+        url = "https://flaky.example.com"
+        cache_options = _cache_options(True, None, False, None)
+        failure_options = _failure_options(cache_options, ".late", 5000, 0)
+        cache.record_failure(url, failure_options, "TimeoutError", "slow", image_options=cache_options)
+        cache.save_bytes_to_cache(url, b"\x89PNG", cache_options)
+
+        entry = cache.lookup(url, cache_options, failure_options=failure_options)
+
+        assert entry.error is None and entry.path is not None
+        assert cache._execute("SELECT COUNT(*) FROM failures")[0][0] == 0
+
+        # Once the image expires the old failure must not come back
+        cache._execute("UPDATE entries SET created_at = 0")
+        assert cache.lookup(url, cache_options, failure_options=failure_options) is None
+
+
+class TestStats:
+    """Test running totals and counters."""
+
+    def test_totals_follow_inserts_and_removals(self, cache):
+        """Test totals match the index without rescanning it."""
+        cache.save_bytes_to_cache("https://a.example.com", b"\x89PNG aaaa")
+        cache.save_bytes_to_cache("https://b.example.com", b"\x89PNG aaaa")  # Shares a's file
+        cache.save_bytes_to_cache("https://c.example.com", b"\x89PNG cc")
+        cache.save_bytes_to_cache("https://c.example.com", b"\x89PNG c")  # Replaces its file
+
+        stats = cache.get_cache_stats()
+        assert stats['total_entries'] == 3
+        assert stats['total_bytes'] == len(b"\x89PNG aaaa") + len(b"\x89PNG c")
+
+        age_entry(cache, "https://a.example.com", browser_config.cache_ttl_hours * 3600 + 60)
+        cache.cleanup_old_cache(force=True)
+        stats = cache.get_cache_stats()
+        assert stats['total_entries'] == 2
+        assert stats['total_bytes'] == len(b"\x89PNG aaaa") + len(b"\x89PNG c")
+        assert stats['expired'] == 1
+
+        cache.clear_cache()
+        assert cache._totals() == (0, 0)
+
+    def test_totals_computed_for_older_index(self, cache, cache_dir):
+        """Test an index without totals gets them on open."""
+        cache.save_bytes_to_cache("https://a.example.com", b"\x89PNG a")
+        cache._execute("DELETE FROM settings")
+
+        other = ScreenshotCache()
+        try:
+            assert other._totals() == (1, len(b"\x89PNG a"))
+        finally:
+            other.close()
+
+    def test_hit_and_miss_counters(self, cache):
+        """Test lookups are counted with the capture work they saved."""
+        cache.save_bytes_to_cache("https://example.com", b"\x89PNG", cost=2.5)
+
+        cache.lookup("https://example.com")
+        cache.lookup("https://missing.example.com")
+        age_entry(cache, "https://example.com", browser_config.cache_ttl_hours * 3600 + 60)
+        browser_config.update(cache_stale_hours=1)
+        try:
+            cache.lookup("https://example.com")
+        finally:
+            browser_config.update(cache_stale_hours=0)
+
+        stats = cache.get_cache_stats()
+        assert (stats['hits'], stats['stale_hits'], stats['misses']) == (1, 1, 1)
+        assert stats['bytes_saved'] == 2 * len(b"\x89PNG")
+        assert stats['seconds_saved'] == pytest.approx(5.0)
+        assert stats['hit_rate'] == pytest.approx(2 / 3)
+
+        cache.reset_stats()
+        assert cache.get_cache_stats()['hits'] == 0
+
+    def test_evictions_counted(self, cache, budget):
+        """Test budget evictions are counted."""
+        budget(max_cache_entries=1)
+        cache.save_bytes_to_cache("https://a.example.com", b"\x89PNG a")
+        cache.save_bytes_to_cache("https://b.example.com", b"\x89PNG b")
+
+        assert cache.get_cache_stats()['evictions'] == 1
+
+
+def _save_entries(cache_dir, prefix, count):
+    """Worker process: save ``count`` entries into a shared cache."""
+    browser_config.update(cache_dir=cache_dir)
+    cache = ScreenshotCache()
+    for i in range(count):
+        cache.save_bytes_to_cache(f"https://{prefix}{i}.example.com", b"\x89PNG " + bytes([i]))
+    cache.close()
+
+
+class TestMultiProcess:
+    """Test processes sharing one cache directory."""
+
+    def test_concurrent_writers_lose_nothing(self, cache, cache_dir):
+        """Test entries written by several processes are all kept."""
+        context = multiprocessing.get_context("spawn")
+        workers = [
+            context.Process(target=_save_entries, args=(str(cache_dir), prefix, 20))
+            for prefix in ("a", "b", "c")
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+
+        assert all(worker.exitcode == 0 for worker in workers)
+        assert cache.get_cache_stats()['total_entries'] == 60
+        assert cache.get_cached_path("https://b7.example.com").read_bytes() == b"\x89PNG \x07"
+
+    def test_failed_write_leaves_no_partial_file(self, cache, cache_dir):
+        """Test a write that fails midway leaves neither the file nor temp files."""
+        def broken_write(tmp):
+            tmp.write_bytes(b"\x89PN")
+            raise OSError("disk full")
+
+        with pytest.raises(OSError):
+            cache._write_atomic(cache_dir / "entry.png", broken_write)
+
+        assert list(cache_dir.glob("*.png")) == []
@@ -8,11 +8,14 @@ from snapwright import (
     screenshot,
     capture_screenshot,
     browse_and_extract,
-    batch_screenshots
+    batch_screenshots,
+    capture_screenshot_bytes
 )
+from snapwright.cache import CacheEntry
 from snapwright.exceptions import (
     BrowserError,
     TimeoutError,
+    NavigationError,
     ElementNotFoundError
 )
 
@@ -57,24 +60,23 @@ class TestCaptureScreenshot:
         cached_path = tmp_path / "cached.png"
         cached_path.touch()
         
-        mock_cache.get_cached_path.return_value = cached_path
+        mock_cache.lookup.return_value = CacheEntry(path=cached_path)
         
         result = capture_screenshot("https://example.com", use_cache=True)
         
         assert result == cached_path
-        mock_browser.get_context.assert_not_called()
+        mock_browser.checkout_page.assert_not_called()
     
     @patch('snapwright.core.browser_manager')
     @patch('snapwright.core.screenshot_cache')
     def test_capture_with_cache_miss(self, mock_cache, mock_browser, tmp_path):
         """Test screenshot with cache miss."""
-        mock_cache.get_cached_path.return_value = None
+        mock_cache.lookup.return_value = None
+        mock_cache.revalidate.return_value = None
         
-        # Mock page and context
+        # Mock pooled page
         mock_page = Mock()
-        mock_context = Mock()
-        mock_context.new_page.return_value = mock_page
-        mock_browser.get_context.return_value = mock_context
+        mock_browser.checkout_page.return_value = mock_page
         
         output_path = tmp_path / "new.png"
         result = capture_screenshot(
@@ -84,21 +86,22 @@ class TestCaptureScreenshot:
         )
         
         # Verify browser interaction
-        mock_browser.get_context.assert_called_once()
+        mock_browser.checkout_page.assert_called_once()
         mock_page.goto.assert_called_once()
         mock_page.screenshot.assert_called_once()
-        mock_page.close.assert_called_once()
+        mock_browser.checkin_page.assert_called_once_with(mock_page, discard=False)
     
     @patch('snapwright.core.browser_manager')
-    def test_capture_with_selector(self, mock_browser):
+    @patch('snapwright.core.screenshot_cache')
+    def test_capture_with_selector(self, mock_cache, mock_browser):
         """Test element screenshot."""
+        mock_cache.lookup.return_value = None
+        mock_cache.revalidate.return_value = None
         mock_element = Mock()
         mock_page = Mock()
         mock_page.query_selector.return_value = mock_element
         
-        mock_context = Mock()
-        mock_context.new_page.return_value = mock_page
-        mock_browser.get_context.return_value = mock_context
+        mock_browser.checkout_page.return_value = mock_page
         
         capture_screenshot("https://example.com", selector=".test-element")
         
@@ -106,12 +109,13 @@ class TestCaptureScreenshot:
         mock_element.screenshot.assert_called_once()
     
     @patch('snapwright.core.browser_manager')
-    def test_capture_with_wait_for(self, mock_browser):
+    @patch('snapwright.core.screenshot_cache')
+    def test_capture_with_wait_for(self, mock_cache, mock_browser):
         """Test waiting for element."""
+        mock_cache.lookup.return_value = None
+        mock_cache.revalidate.return_value = None
         mock_page = Mock()
-        mock_context = Mock()
-        mock_context.new_page.return_value = mock_page
-        mock_browser.get_context.return_value = mock_context
+        mock_browser.checkout_page.return_value = mock_page
         
         capture_screenshot(
             "https://example.com",
@@ -120,6 +124,107 @@ class TestCaptureScreenshot:
         )
         
         mock_page.wait_for_selector.assert_called_with(".dynamic-content", timeout=5000)
+    
+    @patch('snapwright.core.browser_manager')
+    @patch('snapwright.core.screenshot_cache')
+    def test_capture_requeued_after_crash(self, mock_cache, mock_browser, tmp_path):
+        """Test a capture interrupted by a browser crash is retried transparently."""
+        from playwright.sync_api import Error as PlaywrightError
+        
+        mock_cache.lookup.return_value = None
+        mock_cache.revalidate.return_value = None
+        mock_page = Mock()
+        mock_page.goto.side_effect = [PlaywrightError("Target closed"), None]
+        mock_browser.checkout_page.return_value = mock_page
+        mock_browser.crashed_since.return_value = True
+        
+        output_path = tmp_path / "new.png"
+        result = capture_screenshot("https://example.com", output_path=output_path)
+        
+        assert result == output_path
+        assert mock_page.goto.call_count == 2
+    
+    @patch('snapwright.core.browser_manager')
+    @patch('snapwright.core.screenshot_cache')
+    def test_no_attempts_allowed(self, mock_cache, mock_browser, tmp_path):
+        """Test a capture with max_retries of 0 raises rather than returning nothing."""
+        from snapwright.config import browser_config
+        from snapwright.exceptions import ScreenshotError
+        
+        mock_cache.lookup.return_value = None
+        mock_cache.revalidate.return_value = None
+        original = browser_config.max_retries
+        browser_config.update(max_retries=0)
+        try:
+            with pytest.raises(ScreenshotError):
+                capture_screenshot("https://example.com", output_path=tmp_path / "new.png")
+        finally:
+            browser_config.update(max_retries=original)
+        
+        mock_browser.checkout_page.assert_not_called()
+    
+    @patch('snapwright.core.browser_manager')
+    @patch('snapwright.core.screenshot_cache')
+    def test_capture_bytes_writes_no_file(self, mock_cache, mock_browser):
+        """Test in-memory capture returns PNG bytes and caches them."""
+        mock_cache.lookup.return_value = None
+        mock_cache.revalidate.return_value = None
+        mock_page = Mock()
+        mock_page.screenshot.return_value = b"png-bytes"
+        mock_browser.checkout_page.return_value = mock_page
+        
+        result = capture_screenshot_bytes("https://example.com", full_page=False)
+        
+        assert result == b"png-bytes"
+        mock_page.screenshot.assert_called_once_with(path=None, full_page=False)
+        mock_cache.save_bytes_to_cache.assert_called_once()
+    
+    @patch('snapwright.core.schedule_refresh')
+    @patch('snapwright.core.browser_manager')
+    @patch('snapwright.core.screenshot_cache')
+    def test_stale_hit_refreshes_in_background(self, mock_cache, mock_browser, mock_refresh, tmp_path):
+        """Test a stale entry is returned at once and recaptured in the background."""
+        cached_path = tmp_path / "cached.png"
+        mock_cache.lookup.return_value = CacheEntry(path=cached_path, stale=True, refresh=True)
+        
+        result = capture_screenshot("https://example.com", extra_wait=500)
+        
+        assert result == cached_path
+        mock_browser.checkout_page.assert_not_called()
+        mock_refresh.assert_called_once()
+        assert mock_refresh.call_args.kwargs['extra_wait'] == 500
+
+    @patch('snapwright.core.browser_manager')
+    @patch('snapwright.core.screenshot_cache')
+    def test_capture_stores_document_validators(self, mock_cache, mock_browser):
+        """Test the main document's ETag, Last-Modified and body hash are cached."""
+        mock_cache.lookup.return_value = None
+        mock_cache.revalidate.return_value = None
+        mock_page = Mock()
+        mock_page.goto.return_value.headers = {'etag': '"v1"', 'last-modified': "Mon, 01 Jan 2024 00:00:00 GMT"}
+        mock_page.goto.return_value.body.return_value = b"<html></html>"
+        mock_page.screenshot.return_value = b"png-bytes"
+        mock_browser.checkout_page.return_value = mock_page
+
+        capture_screenshot_bytes("https://example.com")
+
+        validators = mock_cache.save_bytes_to_cache.call_args.kwargs['validators']
+        assert validators['etag'] == '"v1"'
+        assert validators['last_modified'] == "Mon, 01 Jan 2024 00:00:00 GMT"
+        assert len(validators['body_hash']) == 64
+
+    @patch('snapwright.core.browser_manager')
+    @patch('snapwright.core.screenshot_cache')
+    def test_unchanged_page_skips_render(self, mock_cache, mock_browser, tmp_path):
+        """Test an expired entry whose page revalidates is served without a browser."""
+        cached_path = tmp_path / "cached.png"
+        mock_cache.lookup.return_value = None
+        mock_cache.revalidate.return_value = CacheEntry(path=cached_path)
+
+        result = capture_screenshot("https://example.com")
+
+        assert result == cached_path
+        mock_browser.checkout_page.assert_not_called()
 
 
 class TestBrowseAndExtract:
@@ -129,20 +234,8 @@ class TestBrowseAndExtract:
     def test_extract_single_elements(self, mock_browser):
         """Test extracting single elements."""
         mock_page = Mock()
-        mock_context = Mock()
-        mock_context.new_page.return_value = mock_page
-        mock_browser.get_context.return_value = mock_context
-        
-        # Mock elements
-        mock_title = Mock()
-        mock_title.text_content.return_value = "Test Title"
-        mock_content = Mock()
-        mock_content.text_content.return_value = "Test Content"
-        
-        mock_page.query_selector_all.side_effect = [
-            [mock_title],  # Single element for title
-            [mock_content]  # Single element for content
-        ]
+        mock_browser.checkout_page.return_value = mock_page
+        mock_page.evaluate.return_value = {"title": "Test Title", "content": "Test Content"}
         
         result = browse_and_extract(
             "https://example.com",
@@ -160,16 +253,8 @@ class TestBrowseAndExtract:
     def test_extract_multiple_elements(self, mock_browser):
         """Test extracting multiple elements."""
         mock_page = Mock()
-        mock_context = Mock()
-        mock_context.new_page.return_value = mock_page
-        mock_browser.get_context.return_value = mock_context
-        
-        # Mock multiple elements
-        mock_items = [Mock(), Mock(), Mock()]
-        for i, item in enumerate(mock_items):
-            item.text_content.return_value = f"Item {i+1}"
-        
-        mock_page.query_selector_all.return_value = mock_items
+        mock_browser.checkout_page.return_value = mock_page
+        mock_page.evaluate.return_value = {"items": ["Item 1", "Item 2", "Item 3"]}
         
         result = browse_and_extract(
             "https://example.com",
@@ -178,6 +263,93 @@ class TestBrowseAndExtract:
         
         assert len(result['extracted']['items']) == 3
         assert result['extracted']['items'] == ["Item 1", "Item 2", "Item 3"]
+    
+    @patch('snapwright.core.browser_manager')
+    def test_extract_in_one_round_trip(self, mock_browser):
+        """All selectors are sent to the page in a single evaluate call."""
+        mock_page = Mock()
+        mock_browser.checkout_page.return_value = mock_page
+        mock_page.evaluate.return_value = {
+            "title": "Title",
+            "links": ["/a", "/b"],
+            "query": "shoes",
+            "broken": {"error": "not a valid selector"},
+        }
+        
+        result = browse_and_extract(
+            "https://example.com",
+            {
+                "title": "h1",
+                "links": "a.result@href",
+                "query": {"selector": "input[name=q]", "property": "value"},
+                "broken": "a[",
+                "invalid": {"selector": "a", "attribute": "href", "property": "href"},
+            }
+        )
+        
+        mock_page.evaluate.assert_called_once()
+        specs = mock_page.evaluate.call_args[0][1]
+        assert [spec['name'] for spec in specs] == ["title", "links", "query", "broken"]
+        assert specs[1]['selector'] == "a.result" and specs[1]['attribute'] == "href"
+        assert specs[2]['property'] == "value"
+        mock_page.query_selector_all.assert_not_called()
+        
+        assert list(result['extracted']) == ["title", "links", "query", "broken", "invalid"]
+        assert result['extracted']['links'] == ["/a", "/b"]
+        assert result['extracted']['broken'] == "Error: not a valid selector"
+        assert result['extracted']['invalid'].startswith("Error: ")
+        assert result['error'] is None
+    
+    @patch('snapwright.core.browser_manager')
+    def test_playwright_selectors_use_locators(self, mock_browser):
+        """Selectors in Playwright syntax keep their meaning instead of going to querySelectorAll."""
+        mock_page = Mock()
+        mock_browser.checkout_page.return_value = mock_page
+        mock_page.evaluate.return_value = {"title": "Title"}
+        mock_page.locator.return_value.evaluate_all.return_value = ["Contact us"]
+        
+        result = browse_and_extract(
+            "https://example.com",
+            {"title": "h1", "contact": {"selector": "text=Contact us", "attribute": "href"}}
+        )
+        
+        specs = mock_page.evaluate.call_args[0][1]
+        assert [spec['name'] for spec in specs] == ["title"]
+        mock_page.locator.assert_called_once_with("text=Contact us")
+        assert mock_page.locator.return_value.evaluate_all.call_args[0][1]['attribute'] == "href"
+        assert result['extracted'] == {"title": "Title", "contact": "Contact us"}
+        assert result['error'] is None
+    
+    @patch('snapwright.core.browser_manager')
+    def test_capture_responses(self, mock_browser):
+        """Test matching XHR responses are returned without waiting for the render."""
+        mock_page = Mock()
+        mock_browser.checkout_page.return_value = mock_page
+        
+        api_response = Mock()
+        api_response.url = "https://example.com/api/products?page=1"
+        api_response.status = 200
+        api_response.request.method = "GET"
+        api_response.body.return_value = b'[{"id": 1}]'
+        
+        def goto(url, wait_until, timeout):
+            handler = mock_page.on.call_args[0][1]
+            handler(api_response)
+        mock_page.goto.side_effect = goto
+        
+        result = browse_and_extract(
+            "https://example.com",
+            {},
+            capture_responses={"products": "*/api/products*"}
+        )
+        
+        assert result['error'] is None
+        assert result['responses'] == {"products": [{"id": 1}]}
+        assert mock_page.goto.call_args[1]['wait_until'] == "commit"
+        mock_page.wait_for_event.assert_not_called()
+        mock_page.evaluate.assert_not_called()
+        # The pooled page must not keep feeding this capture
+        mock_page.remove_listener.assert_called_once_with("response", mock_page.on.call_args[0][1])
 
 
 class TestBatchScreenshots:
@@ -217,54 +389,125 @@ class TestBatchScreenshots:
         
         # Should sleep once (between the two captures)
         mock_sleep.assert_called_once_with(2.0)
+    
+    @patch('snapwright.core.capture_screenshot')
+    def test_batch_dedupes_equivalent_urls(self, mock_capture, tmp_path):
+        """Test URLs that canonicalize alike are captured once, from the URL as given."""
+        urls = [
+            "https://Example.com/?utm_source=x",
+            "https://example.com/",
+            "https://example.com#top",
+            "https://other.com"
+        ]
+        mock_capture.side_effect = [tmp_path / "shot1.png", tmp_path / "shot2.png"]
+        
+        results = batch_screenshots(urls, output_dir=tmp_path, delay_between=0)
+        
+        assert [c.args[0] for c in mock_capture.call_args_list] == [urls[0], urls[3]]
+        assert list(results) == urls
+        assert set(results.values()) == {tmp_path / "shot1.png", tmp_path / "shot2.png"}
+        assert results[urls[0]] == results[urls[2]]
 
 
 class TestErrorHandling:
     """Test error handling."""
     
     @patch('snapwright.core.browser_manager')
-    def test_navigation_error(self, mock_browser):
+    @patch('snapwright.core.screenshot_cache')
+    def test_navigation_error(self, mock_cache, mock_browser):
         """Test navigation error handling."""
         from playwright.sync_api import Error as PlaywrightError
         
+        mock_cache.lookup.return_value = None
+        mock_cache.revalidate.return_value = None
         mock_page = Mock()
         mock_page.goto.side_effect = PlaywrightError("Navigation failed")
         
-        mock_context = Mock()
-        mock_context.new_page.return_value = mock_page
-        mock_browser.get_context.return_value = mock_context
+        mock_browser.checkout_page.return_value = mock_page
         
         with pytest.raises(NavigationError):
             capture_screenshot("https://invalid-url.com")
+        
+        # Recorded so repeats fail fast
+        assert mock_cache.record_failure.call_args.args[2] == "NavigationError"
     
     @patch('snapwright.core.browser_manager')
-    def test_element_not_found(self, mock_browser):
+    @patch('snapwright.core.screenshot_cache')
+    def test_element_not_found(self, mock_cache, mock_browser):
         """Test element not found error."""
+        mock_cache.lookup.return_value = None
+        mock_cache.revalidate.return_value = None
         mock_page = Mock()
         mock_page.query_selector.return_value = None
         
-        mock_context = Mock()
-        mock_context.new_page.return_value = mock_page
-        mock_browser.get_context.return_value = mock_context
+        mock_browser.checkout_page.return_value = mock_page
         
         with pytest.raises(ElementNotFoundError):
             capture_screenshot("https://example.com", selector=".non-existent")
     
     @patch('snapwright.core.browser_manager')
-    def test_timeout_error(self, mock_browser):
+    @patch('snapwright.core.screenshot_cache')
+    def test_timeout_error(self, mock_cache, mock_browser):
         """Test timeout error."""
         from playwright.sync_api import Error as PlaywrightError
         
+        mock_cache.lookup.return_value = None
+        mock_cache.revalidate.return_value = None
         mock_page = Mock()
         mock_page.wait_for_selector.side_effect = PlaywrightError("Timeout")
         
-        mock_context = Mock()
-        mock_context.new_page.return_value = mock_page
-        mock_browser.get_context.return_value = mock_context
+        mock_browser.checkout_page.return_value = mock_page
         
         with pytest.raises(TimeoutError):
             capture_screenshot(
                 "https://example.com",
                 wait_for=".slow-element",
                 wait_timeout=1000
-            )
\ No newline at end of file
+            )
+    
+    @patch('snapwright.core.browser_manager')
+    @patch('snapwright.core.screenshot_cache')
+    def test_cached_failure_fails_fast(self, mock_cache, mock_browser):
+        """Test a recently failed URL raises its error again without a browser."""
+        mock_cache.lookup.return_value = CacheEntry(
+            path=None, error="NavigationError", message="net::ERR_NAME_NOT_RESOLVED"
+        )
+        
+        with pytest.raises(NavigationError, match="cached failure"):
+            capture_screenshot("https://dead.example.com")
+        
+        mock_browser.checkout_page.assert_not_called()
+    
+    @patch('snapwright.core.browser_manager')
+    def test_failed_wait_does_not_poison_plain_capture(self, mock_browser, tmp_path):
+        """Test a wait_for timeout is only replayed to captures with the same wait."""
+        from playwright.sync_api import Error as PlaywrightError
+        from snapwright.cache import ScreenshotCache
+        from snapwright.config import browser_config
+        
+        original = browser_config.cache_dir
+        browser_config.update(cache_dir=str(tmp_path / "cache"))
+        cache = ScreenshotCache()
+        try:
+            mock_page = Mock()
+            mock_page.wait_for_selector.side_effect = PlaywrightError("Timeout")
+            mock_page.screenshot.side_effect = lambda path, **kwargs: Path(path).write_bytes(b"\x89PNG")
+            mock_browser.checkout_page.return_value = mock_page
+            mock_browser.crashed_since.return_value = False
+            
+            with patch('snapwright.core.screenshot_cache', cache):
+                with pytest.raises(TimeoutError):
+                    capture_screenshot("https://example.com", wait_for=".never")
+                
+                # The same wait fails fast...
+                with pytest.raises(TimeoutError, match="cached failure"):
+                    capture_screenshot("https://example.com", wait_for=".never")
+                assert mock_browser.checkout_page.call_count == 1
+                
+                # ...but a capture without it still renders
+                result = capture_screenshot("https://example.com", output_path=tmp_path / "plain.png")
+                assert result == tmp_path / "plain.png"
+                assert mock_browser.checkout_page.call_count == 2
+        finally:
+            cache.close()
+            browser_config.update(cache_dir=original)
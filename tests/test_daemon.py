@@ -0,0 +1,145 @@
+"""Tests for the persistent daemon and its client."""
+
+import socket
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from snapwright.cache import ScreenshotCache
+from snapwright.config import browser_config
+from snapwright.daemon import DaemonClient, daemon_available, serve_daemon
+from snapwright.exceptions import DaemonError, NavigationError
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="requires Unix sockets")
+
+
+class FakePool:
+    """Actor pool stand-in that records captures instead of launching browsers."""
+
+    def __init__(self, threads=None):
+        self.captures = []
+
+    def prewarm(self):
+        pass
+
+    def capture_screenshot(self, url, **kwargs):
+        if "bad" in url:
+            raise NavigationError(f"Failed to navigate to {url}")
+        self.captures.append((url, kwargs))
+        return kwargs["output_path"]
+
+    def shutdown(self):
+        pass
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """A screenshot cache in a temporary directory."""
+    original = browser_config.cache_dir
+    browser_config.update(cache_dir=str(tmp_path / "cache"))
+    cache = ScreenshotCache()
+    browser_config.update(cache_dir=original)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def daemon(tmp_path, cache):
+    """Run a daemon with a fake pool on a temporary socket."""
+    socket_path = tmp_path / "d.sock"
+    pools = []
+
+    def make_pool(threads=None):
+        pools.append(FakePool(threads))
+        return pools[0]
+
+    with patch('snapwright.actor.BrowserActorPool', side_effect=make_pool), \
+            patch('snapwright.daemon.screenshot_cache', cache):
+        thread = threading.Thread(target=serve_daemon, args=(socket_path,), daemon=True)
+        thread.start()
+        for _ in range(100):
+            if socket_path.exists():
+                break
+            time.sleep(0.01)
+
+        yield DaemonClient(socket_path, timeout=5), pools
+
+        if socket_path.exists():
+            DaemonClient(socket_path, timeout=5).shutdown()
+        thread.join(timeout=5)
+
+
+class TestDaemon:
+    """Test daemon request handling."""
+
+    def test_capture_through_daemon(self, daemon, tmp_path):
+        """Test captures are forwarded with absolute output paths."""
+        client, pools = daemon
+
+        path = client.capture_screenshot(
+            "https://example.com", output_path=tmp_path / "out.png", full_page=False
+        )
+
+        assert path == tmp_path / "out.png"
+        url, kwargs = pools[0].captures[0]
+        assert url == "https://example.com"
+        assert kwargs["full_page"] is False
+        assert Path(kwargs["output_path"]).is_absolute()
+
+    def test_remote_error_type_preserved(self, daemon):
+        """Test daemon-side errors are re-raised as the same exception type."""
+        client, _ = daemon
+
+        with pytest.raises(NavigationError):
+            client.capture_screenshot("https://bad.example.com")
+
+    def test_stats_and_shutdown(self, daemon):
+        """Test status reporting and remote shutdown."""
+        client, _ = daemon
+        client.capture_screenshot("https://example.com")
+
+        assert client.stats()["requests_served"] == 1
+
+        client.shutdown()
+        for _ in range(100):
+            if not daemon_available(client.socket_path):
+                break
+            time.sleep(0.01)
+        assert not daemon_available(client.socket_path)
+
+
+class TestDaemonClient:
+    """Test client behaviour without a daemon."""
+
+    def test_unreachable_daemon(self, tmp_path):
+        """Test a missing daemon raises DaemonError."""
+        client = DaemonClient(tmp_path / "missing.sock", timeout=1)
+
+        assert not daemon_available(client.socket_path)
+        with pytest.raises(DaemonError):
+            client.ping()
+
+    def test_stale_socket_replaced(self, tmp_path):
+        """Test a leftover socket file from a dead daemon is removed on start."""
+        socket_path = tmp_path / "stale.sock"
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(socket_path))
+        stale.close()
+
+        with patch('snapwright.actor.BrowserActorPool', FakePool):
+            thread = threading.Thread(target=serve_daemon, args=(socket_path,), daemon=True)
+            thread.start()
+            client = DaemonClient(socket_path, timeout=5)
+            for _ in range(100):
+                try:
+                    assert client.ping()
+                    break
+                except DaemonError:
+                    time.sleep(0.01)
+            client.shutdown()
+            thread.join(timeout=5)
+
+        assert not thread.is_alive()
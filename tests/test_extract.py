@@ -0,0 +1,89 @@
+"""Tests for selector spec parsing."""
+
+import pytest
+
+from snapwright.extract import parse_selector, compile_selectors, is_css_selector, merge_extracted
+
+
+class TestParseSelector:
+    """Test normalizing selector specs."""
+
+    def test_plain_selector_reads_text(self):
+        spec = parse_selector("title", " h1.title ")
+        assert spec == {
+            "name": "title", "selector": "h1.title",
+            "attribute": None, "property": None, "all": False,
+        }
+
+    def test_attribute_suffix(self):
+        spec = parse_selector("link", "a.next @href")
+        assert spec["selector"] == "a.next"
+        assert spec["attribute"] == "href"
+
+    def test_attribute_selectors_are_not_suffixes(self):
+        spec = parse_selector("mail", "a[href^='mailto:x@example.com']")
+        assert spec["selector"] == "a[href^='mailto:x@example.com']"
+        assert spec["attribute"] is None
+
+    @pytest.mark.parametrize("selector", ["text=support@example.com", "xpath=//a/@href"])
+    def test_playwright_selectors_are_not_split(self, selector):
+        spec = parse_selector("x", selector)
+        assert spec["selector"] == selector
+        assert spec["attribute"] is None
+
+    def test_attribute_of_playwright_selector(self):
+        spec = parse_selector("link", {"selector": "text=Contact us", "attribute": "href"})
+        assert spec["selector"] == "text=Contact us"
+        assert spec["attribute"] == "href"
+
+    def test_dict_spec(self):
+        spec = parse_selector("checked", {"selector": "input", "property": "checked", "all": True})
+        assert spec["property"] == "checked"
+        assert spec["all"] is True
+
+    @pytest.mark.parametrize("bad", [
+        {"attribute": "href"},
+        {"selector": "  "},
+        {"selector": "a", "attribute": "href", "property": "href"},
+        ["a"],
+    ])
+    def test_malformed_specs(self, bad):
+        with pytest.raises(ValueError):
+            parse_selector("x", bad)
+
+
+class TestIsCssSelector:
+    """Test telling plain CSS from Playwright selector syntax."""
+
+    @pytest.mark.parametrize("selector", [
+        "h1", "a[href=x]", "input[type='text']", "div:has(> p)", "a:not(.x)", "p:nth-child(2)",
+    ])
+    def test_plain_css(self, selector):
+        assert is_css_selector(selector)
+
+    @pytest.mark.parametrize("selector", [
+        "text=Contact us", "xpath=//h1", "//h1", "css=h1", "internal:role=button", "'Sign in'",
+        "nav >> a", "li:has-text('Sale')", "button:visible", "a:text-is('Home')",
+    ])
+    def test_playwright_syntax(self, selector):
+        assert not is_css_selector(selector)
+
+
+class TestMergeExtracted:
+    """Test assembling the extracted dict."""
+
+    def test_errors_and_order(self):
+        selectors = {"a": "h1", "b": {"selector": ""}, "c": "p", "d": "div"}
+        specs, errors = compile_selectors(selectors)
+        assert [spec["name"] for spec in specs] == ["a", "c", "d"]
+
+        extracted = merge_extracted(
+            selectors,
+            {"d": None, "c": {"error": "bad selector"}, "a": "Hello"},
+            errors
+        )
+        assert list(extracted) == ["a", "b", "c", "d"]
+        assert extracted["a"] == "Hello"
+        assert extracted["b"].startswith("Error: ")
+        assert extracted["c"] == "Error: bad selector"
+        assert extracted["d"] is None
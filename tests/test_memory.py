@@ -0,0 +1,132 @@
+"""Tests for Chromium memory sampling and the watchdog."""
+
+import subprocess
+import sys
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from snapwright.browser_manager import BrowserManager
+from snapwright.config import browser_config
+from snapwright.memory import process_tree_memory
+
+from test_browser_manager import FakeContext
+
+MB = 1024 * 1024
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="requires /proc")
+def test_process_tree_memory_counts_children():
+    """Test child processes are found and their RSS summed."""
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(10)"])
+    try:
+        usage = process_tree_memory()
+    finally:
+        child.kill()
+        child.wait()
+
+    assert usage['processes'] >= 1
+    assert usage['total'] > 0
+    assert usage['total'] == sum(
+        usage[role] for role in ('browser', 'renderer', 'gpu', 'utility', 'driver')
+    )
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="requires /proc")
+def test_process_tree_memory_from_root():
+    """Test an explicit root counts itself and its own children only."""
+    root = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(10)"])
+    other = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(10)"])
+    try:
+        usage = process_tree_memory(root.pid)
+    finally:
+        for child in (root, other):
+            child.kill()
+            child.wait()
+
+    assert usage['processes'] == 1
+    assert usage['total'] > 0
+    assert process_tree_memory(root.pid)['processes'] == 0
+
+
+@pytest.fixture
+def manager():
+    """A private manager wired to a fake browser, with the watchdog armed."""
+    manager = BrowserManager(shared=False)
+    manager.browser = Mock()
+    manager.browser.new_context.side_effect = FakeContext
+    manager._driver_pid = 4242
+    browser_config.update(memory_check_interval=60, memory_soft_limit_mb=100, memory_hard_limit_mb=200)
+    manager._last_memory_check = time.monotonic()
+    yield manager
+    browser_config.update(memory_check_interval=30, memory_soft_limit_mb=0, memory_hard_limit_mb=0)
+
+
+def sample(total_mb):
+    return {'total': total_mb * MB, 'processes': 3}
+
+
+class TestMemoryWatchdog:
+    """Test threshold-driven recycling."""
+
+    @patch('snapwright.browser_manager.process_tree_memory', return_value=sample(150))
+    def test_soft_limit_recycles_contexts(self, mock_memory, manager):
+        """Test crossing the soft limit retires contexts but keeps the browser."""
+        browser = manager.browser
+        page = manager.checkout_page()
+        manager.checkin_page(page)
+
+        manager._last_memory_check = 0
+        new_page = manager.checkout_page()
+
+        assert page.context.closed
+        assert new_page.context is not page.context
+        assert manager.browser is browser
+        assert manager.get_stats()['memory_context_recycles'] == 1
+
+    @patch('snapwright.browser_manager.process_tree_memory', return_value=sample(250))
+    def test_hard_limit_drains_browser(self, mock_memory, manager):
+        """Test crossing the hard limit swaps browsers after in-flight pages return."""
+        old_browser = manager.browser
+        in_flight = manager.checkout_page()
+
+        new_browser = Mock()
+        new_browser.new_context.side_effect = FakeContext
+        manager._last_memory_check = 0
+        with patch.object(manager, '_launch', return_value=new_browser):
+            page = manager.checkout_page()
+
+        assert page.context is not in_flight.context
+        assert manager.browser is new_browser
+        old_browser.close.assert_not_called()
+
+        manager.checkin_page(in_flight)
+        old_browser.close.assert_called_once()
+        assert manager.get_stats()['draining_browsers'] == 0
+
+    @patch('snapwright.browser_manager.process_tree_memory', return_value=sample(50))
+    def test_stats_expose_figures(self, mock_memory, manager):
+        """Test the last sample and thresholds are reported."""
+        manager.sample_memory()
+        stats = manager.get_stats()
+
+        assert stats['memory']['total'] == 50 * MB
+        assert stats['memory_soft_limit_mb'] == 100
+        assert stats['memory_hard_limit_mb'] == 200
+
+    @patch('snapwright.browser_manager.process_tree_memory', return_value=sample(50))
+    def test_samples_own_driver_tree(self, mock_memory, manager):
+        """Test a manager measures its own driver's tree, not every browser in the process."""
+        manager.sample_memory()
+
+        mock_memory.assert_called_once_with(4242)
+
+    @patch('snapwright.browser_manager.process_tree_memory', return_value=sample(250))
+    def test_no_limits_skips_sampling(self, mock_memory, manager):
+        """Test /proc is not walked when there is nothing to enforce."""
+        browser_config.update(memory_soft_limit_mb=0, memory_hard_limit_mb=0)
+        manager._last_memory_check = 0
+        manager.checkin_page(manager.checkout_page())
+
+        mock_memory.assert_not_called()
@@ -0,0 +1,83 @@
+"""Tests for multi-process batch screenshots."""
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from snapwright import parallel
+from snapwright.exceptions import NavigationError
+
+
+class TestCaptureShard:
+    """Test the per-worker shard runner."""
+
+    @patch('snapwright.parallel.browser_manager')
+    @patch('snapwright.parallel.capture_screenshot')
+    def test_recycles_browser(self, mock_capture, mock_manager, tmp_path):
+        """Test the browser is relaunched every ``max_captures`` captures."""
+        mock_capture.side_effect = lambda url, output_path, **kwargs: output_path
+        parallel._init_worker({}, max_captures=2)
+
+        shard = [(i, f"https://example{i}.com") for i in range(5)]
+        results = parallel._capture_shard(shard, tmp_path, True, True, "shot")
+
+        assert len(results) == 5
+        assert mock_manager.reset.call_count == 2
+
+    @patch('snapwright.parallel.browser_manager')
+    @patch('snapwright.parallel.capture_screenshot')
+    def test_failure_maps_to_none(self, mock_capture, mock_manager, tmp_path):
+        """Test a failing URL does not abort the shard."""
+        mock_capture.side_effect = [NavigationError("boom"), tmp_path / "ok.png"]
+        parallel._init_worker({}, max_captures=0)
+
+        results = parallel._capture_shard(
+            [(0, "https://bad.com"), (1, "https://good.com")], tmp_path, True, True, "shot"
+        )
+
+        assert results == {"https://bad.com": None, "https://good.com": tmp_path / "ok.png"}
+        mock_manager.reset.assert_not_called()
+
+
+class TestParallelBatch:
+    """Test sharding and result merging."""
+
+    def test_merges_shards(self, tmp_path):
+        """Test every URL ends up in the merged result in input order."""
+        urls = [f"https://example{i}.com" for i in range(7)]
+        shards = []
+
+        def fake_shard(shard, output_dir, full_page, use_cache, name_prefix):
+            shards.append(shard)
+            return {url: output_dir / f"{i}.png" for i, url in shard}
+
+        def fake_executor(max_workers, mp_context, initializer, initargs):
+            return ThreadPoolExecutor(max_workers=max_workers)
+
+        with patch('snapwright.parallel.ProcessPoolExecutor', side_effect=fake_executor), \
+                patch('snapwright.parallel._capture_shard', side_effect=fake_shard):
+            results = parallel.parallel_batch_screenshots(
+                urls, output_dir=tmp_path, workers=2, chunk_size=3
+            )
+
+        assert list(results) == urls
+        assert results[urls[4]] == tmp_path / "4.png"
+        assert sorted(len(shard) for shard in shards) == [1, 3, 3]
+
+    def test_dedupes_but_loads_urls_as_given(self, tmp_path):
+        """Test equivalent URLs are captured once, from the first input, and share the result."""
+        urls = ["https://Example.com/?utm_source=x", "https://example.com/", "https://other.com"]
+        shards = []
+
+        def fake_shard(shard, output_dir, full_page, use_cache, name_prefix):
+            shards.append(shard)
+            return {url: output_dir / f"{i}.png" for i, url in shard}
+
+        def fake_executor(max_workers, mp_context, initializer, initargs):
+            return ThreadPoolExecutor(max_workers=max_workers)
+
+        with patch('snapwright.parallel.ProcessPoolExecutor', side_effect=fake_executor), \
+                patch('snapwright.parallel._capture_shard', side_effect=fake_shard):
+            results = parallel.parallel_batch_screenshots(urls, output_dir=tmp_path, workers=1)
+
+        assert [url for shard in shards for _, url in shard] == [urls[0], urls[2]]
+        assert results == {urls[0]: tmp_path / "0.png", urls[1]: tmp_path / "0.png", urls[2]: tmp_path / "1.png"}
@@ -0,0 +1,43 @@
+"""Tests for background cache refreshes."""
+
+from concurrent.futures import Future
+from unittest.mock import Mock, patch
+
+import pytest
+
+from snapwright import refresh
+
+
+@pytest.fixture
+def pool():
+    """Capture submitted refresh jobs instead of running a browser."""
+    pool = Mock()
+    pool.submit.side_effect = lambda *args, **kwargs: Future()
+    with patch('snapwright.refresh._get_pool', return_value=pool):
+        yield pool
+    refresh._pending.clear()
+
+
+class TestScheduleRefresh:
+    """Test refresh scheduling."""
+
+    def test_duplicate_refresh_not_queued(self, pool):
+        """Test one URL is refreshed once however many stale hits arrive."""
+        options = {'full_page': True, 'selector': None, 'mobile': False, 'device_name': None}
+
+        assert refresh.schedule_refresh("https://example.com", options)
+        assert not refresh.schedule_refresh("https://example.com", options)
+        assert pool.submit.call_count == 1
+        assert refresh.pending_refreshes() == 1
+
+    def test_pending_cleared_when_done(self, pool):
+        """Test a finished refresh lets the URL be refreshed again."""
+        futures = []
+        pool.submit.side_effect = lambda *args, **kwargs: futures.append(Future()) or futures[-1]
+        options = {'full_page': True, 'selector': None, 'mobile': False, 'device_name': None}
+
+        refresh.schedule_refresh("https://example.com", options)
+        futures[0].set_exception(RuntimeError("boom"))
+
+        assert refresh.pending_refreshes() == 0
+        assert refresh.schedule_refresh("https://example.com", options)
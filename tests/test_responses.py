@@ -0,0 +1,109 @@
+"""Tests for network response capture."""
+
+import asyncio
+import re
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+from snapwright.responses import ResponseCapture
+
+
+def fake_response(url, body=b"{}", status=200, method="GET"):
+    response = Mock()
+    response.url = url
+    response.status = status
+    response.request.method = method
+    response.body.return_value = body
+    return response
+
+
+class TestResponseCapture:
+    """Test matching responses and reading their bodies."""
+
+    def test_pattern_kinds(self):
+        """Test globs, substrings and regexes each match their response."""
+        capture = ResponseCapture({
+            "products": "*/api/products*",
+            "user": "/api/user",
+            "search": re.compile(r"/api/v\d+/search"),
+        })
+
+        capture.on_response(fake_response("https://shop.example.com/api/products?page=1", b'{"items": [1, 2]}'))
+        capture.on_response(fake_response("https://shop.example.com/api/user", b'{"name": "Ada"}'))
+        assert not capture.complete
+        capture.on_response(fake_response("https://shop.example.com/api/v2/search?q=x", b"plain text"))
+
+        assert capture.complete
+        assert capture.bodies() == {
+            "products": {"items": [1, 2]},
+            "user": {"name": "Ada"},
+            "search": "plain text",
+        }
+
+    def test_first_match_wins_unless_all(self):
+        capture = ResponseCapture({"first": "/api/page", "pages": {"url": "/api/page", "all": True}})
+
+        for page in (1, 2):
+            capture.on_response(fake_response(f"https://example.com/api/page{page}", f'{{"page": {page}}}'.encode()))
+
+        assert capture.bodies() == {"first": {"page": 1}, "pages": [{"page": 1}, {"page": 2}]}
+
+    def test_skips_redirects_and_preflights(self):
+        capture = ResponseCapture({"data": "/api/data"})
+
+        capture.on_response(fake_response("https://example.com/api/data", status=302))
+        capture.on_response(fake_response("https://example.com/api/data", method="OPTIONS"))
+
+        assert not capture.complete
+        assert capture.bodies() == {"data": None}
+
+    def test_unreadable_body(self):
+        capture = ResponseCapture({"data": "/api/data"})
+        response = fake_response("https://example.com/api/data")
+        response.body.side_effect = Exception("Response body is unavailable")
+        capture.on_response(response)
+
+        assert capture.bodies() == {"data": "Error: Response body is unavailable"}
+
+    def test_invalid_pattern(self):
+        with pytest.raises(ValueError):
+            ResponseCapture({"data": {"all": True}})
+
+    def test_wait_stops_when_complete(self):
+        """Test waiting ends as soon as the last pattern matches."""
+        capture = ResponseCapture({"a": "/a", "b": "/b"})
+        arriving = iter([fake_response("https://example.com/a"), fake_response("https://example.com/b")])
+        page = Mock()
+        page.wait_for_event.side_effect = lambda event, timeout: capture.on_response(next(arriving))
+
+        capture.wait(page, 5000)
+
+        assert capture.complete
+        assert page.wait_for_event.call_count == 2
+
+    def test_wait_gives_up_at_timeout(self):
+        capture = ResponseCapture({"a": "/a"})
+        page = Mock()
+        page.wait_for_event.side_effect = PlaywrightTimeoutError("Timeout 100ms exceeded")
+
+        capture.wait(page, 100)
+
+        assert capture.bodies() == {"a": None}
+
+    def test_async_page(self):
+        """Test waiting on and reading bodies from an async Playwright page."""
+        capture = ResponseCapture({"a": "/a", "all": {"url": "/b", "all": True}})
+        arriving = iter([fake_response("https://example.com/a", b'[1]'), fake_response("https://example.com/b")])
+        page = Mock()
+
+        async def wait_for_event(event, timeout):
+            response = next(arriving)
+            response.body = AsyncMock(return_value=response.body.return_value)
+            capture.on_response(response)
+        page.wait_for_event = wait_for_event
+
+        asyncio.run(capture.wait_async(page, 5000))
+
+        assert asyncio.run(capture.bodies_async()) == {"a": [1], "all": [{}]}
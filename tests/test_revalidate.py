@@ -0,0 +1,69 @@
+"""Tests for document revalidation."""
+
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from snapwright.revalidate import document_unchanged, document_validators
+
+BODY = b"<html><body>Hello</body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves BODY with ETag "v1", answering 304 to a matching If-None-Match."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+
+@pytest.fixture
+def origin():
+    """A local origin server."""
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+class TestDocumentUnchanged:
+    """Test conditional requests and body hashing."""
+
+    def test_matching_etag(self, origin):
+        """Test a 304 counts as unchanged."""
+        assert document_unchanged(origin, etag='"v1"')
+
+    def test_stale_etag_falls_back_to_hash(self, origin):
+        """Test a full response is compared against the stored body hash."""
+        digest = hashlib.sha256(BODY).hexdigest()
+
+        assert document_unchanged(origin, etag='"v0"', body_hash=digest)
+        assert not document_unchanged(origin, etag='"v0"', body_hash="0" * 64)
+
+    def test_unreachable_is_changed(self):
+        """Test failures mean the page must be recaptured."""
+        assert not document_unchanged("http://127.0.0.1:9/", etag='"v1"', timeout=1)
+
+    def test_nothing_to_compare(self, origin):
+        """Test entries without validators are never renewed."""
+        assert not document_unchanged(origin)
+
+
+def test_document_validators():
+    """Test headers and body become stored validators."""
+    validators = document_validators({'etag': '"v1"', 'content-type': "text/html"}, BODY)
+
+    assert validators == {'etag': '"v1"', 'body_hash': hashlib.sha256(BODY).hexdigest()}
@@ -0,0 +1,191 @@
+"""Tests for the HTTP capture service."""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import Future
+from unittest.mock import patch
+
+import pytest
+
+from snapwright.cache import ScreenshotCache
+from snapwright.config import browser_config
+from snapwright.exceptions import NavigationError
+from snapwright.server import CaptureServer
+
+PNG = b"\x89PNG\r\n\x1a\nfake"
+
+
+def resolved(value=None, error=None):
+    """A Future that is already done."""
+    future = Future()
+    if error:
+        future.set_exception(error)
+    else:
+        future.set_result(value)
+    return future
+
+
+class FakePool:
+    """Actor pool stand-in that answers without a browser."""
+
+    size = 1
+
+    def __init__(self):
+        self.captures = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def submit_capture_bytes(self, url, **kwargs):
+        self.release.wait(5)
+        if "bad" in url:
+            return resolved(error=NavigationError(f"Failed to navigate to {url}"))
+        self.captures.append((url, kwargs))
+        return resolved(PNG)
+
+    def submit_extract(self, url, selectors, **kwargs):
+        return resolved({'url': url, 'extracted': {name: "text" for name in selectors}, 'error': None})
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """A screenshot cache in a temporary directory."""
+    original = browser_config.cache_dir
+    browser_config.update(cache_dir=str(tmp_path / "cache"))
+    cache = ScreenshotCache()
+    browser_config.update(cache_dir=original)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def service(cache):
+    """Serve a fake pool on a free local port."""
+    pool = FakePool()
+    server = CaptureServer(("127.0.0.1", 0), pool, max_queue=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    with patch('snapwright.server.screenshot_cache', cache):
+        yield base, pool, server
+    pool.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+def fetch(url, body=None):
+    """Return (status, headers, body) for a GET, or a JSON POST when body is given."""
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+class TestScreenshotEndpoint:
+    """Test /screenshot."""
+
+    def test_get_streams_png(self, service):
+        """Test PNG bytes come back in the body with query options parsed."""
+        base, pool, _ = service
+
+        status, headers, body = fetch(f"{base}/screenshot?url=https://example.com&full_page=false&extra_wait=100")
+
+        assert status == 200
+        assert headers["Content-Type"] == "image/png"
+        assert body == PNG
+        assert pool.captures == [("https://example.com", {'full_page': False, 'extra_wait': 100})]
+
+    def test_post_ignores_unknown_options(self, service):
+        """Test JSON requests only forward capture options."""
+        base, pool, _ = service
+
+        status, _, body = fetch(f"{base}/screenshot", {"url": "https://example.com", "mobile": True, "output_path": "/etc/x"})
+
+        assert status == 200
+        assert pool.captures == [("https://example.com", {'mobile': True})]
+
+    def test_missing_url(self, service):
+        """Test a request without a URL is rejected."""
+        base, _, _ = service
+
+        assert fetch(f"{base}/screenshot")[0] == 400
+
+    def test_navigation_error_maps_to_502(self, service):
+        """Test capture errors become HTTP errors with the exception type."""
+        base, _, _ = service
+
+        status, _, body = fetch(f"{base}/screenshot?url=https://bad.example.com")
+
+        assert status == 502
+        assert json.loads(body)["type"] == "NavigationError"
+
+    def test_full_queue_rejected(self, service):
+        """Test requests beyond pool size plus queue get 503."""
+        base, pool, server = service
+        pool.release.clear()
+        blocked = threading.Thread(target=fetch, args=(f"{base}/screenshot?url=https://example.com",))
+        blocked.start()
+        while server.get_stats()['in_flight'] == 0:
+            time.sleep(0.01)
+
+        status, headers, _ = fetch(f"{base}/screenshot?url=https://example.com")
+
+        assert status == 503
+        assert headers["Retry-After"] == "1"
+        pool.release.set()
+        blocked.join(5)
+        assert server.get_stats()['requests_rejected'] == 1
+
+
+class TestExtractEndpoint:
+    """Test /extract and /health."""
+
+    def test_extract(self, service):
+        """Test extraction results are returned as JSON."""
+        base, _, _ = service
+
+        status, _, body = fetch(f"{base}/extract", {"url": "https://example.com", "selectors": {"title": "h1"}})
+
+        assert status == 200
+        assert json.loads(body)["extracted"] == {"title": "text"}
+
+    def test_extract_responses_only(self, service):
+        """Test an extraction may name only network responses."""
+        base, _, _ = service
+
+        status, _, _ = fetch(f"{base}/extract", {"url": "https://example.com", "responses": {"data": "/api/"}})
+
+        assert status == 200
+
+    def test_extract_requires_selectors(self, service):
+        """Test extraction without selectors is a bad request."""
+        base, _, _ = service
+
+        assert fetch(f"{base}/extract", {"url": "https://example.com"})[0] == 400
+
+    def test_extract_invalid_wait_timeout(self, service):
+        """Test a non-numeric wait_timeout is a bad request, not a server error."""
+        base, _, _ = service
+
+        status, _, body = fetch(
+            f"{base}/extract",
+            {"url": "https://example.com", "selectors": {"title": "h1"}, "wait_timeout": "soon"}
+        )
+
+        assert status == 400
+        assert "wait_timeout" in json.loads(body)["error"]
+
+    def test_health(self, service):
+        """Test the health endpoint reports pool capacity and cache stats."""
+        base, _, _ = service
+
+        status, _, body = fetch(f"{base}/health")
+
+        assert status == 200
+        assert json.loads(body)["browsers"] == 1
+        assert "hit_rate" in json.loads(body)["cache"]
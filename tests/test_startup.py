@@ -0,0 +1,51 @@
+"""Tests that importing snapwright is cheap and side-effect free."""
+
+import subprocess
+import sys
+
+import snapwright
+
+
+def run_python(code, cwd):
+    """Run ``code`` in a fresh interpreter and return its stdout."""
+    return subprocess.run(
+        [sys.executable, "-c", code], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def test_import_loads_nothing(tmp_path):
+    """Test the package import neither loads Playwright nor touches the disk."""
+    loaded = run_python(
+        "import sys, snapwright; print(sorted(m for m in sys.modules if 'playwright' in m))",
+        tmp_path
+    )
+
+    assert loaded.strip() == "[]"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_version_without_playwright(tmp_path):
+    """Test ``snapwright --version`` answers without loading Playwright."""
+    output = run_python(
+        "import sys\n"
+        "sys.modules['playwright'] = None  # Any import of it fails\n"
+        "sys.argv = ['snapwright', '--version']\n"
+        "from snapwright.cli import main\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass\n",
+        tmp_path
+    )
+
+    assert output.strip() == f"snapwright {snapwright.__version__}"
+
+
+def test_names_resolve_lazily():
+    """Test public names are still importable from the package."""
+    from snapwright import capture_screenshot, screenshot_cache
+    from snapwright.core import capture_screenshot as core_capture
+
+    assert capture_screenshot is core_capture
+    assert screenshot_cache is snapwright.screenshot_cache
+    assert set(snapwright.__all__) <= set(dir(snapwright))
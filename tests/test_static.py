@@ -0,0 +1,249 @@
+"""Tests for the static-HTML extraction path."""
+
+import gzip
+import importlib.util
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from snapwright.config import browser_config
+from snapwright.static import HTTPPool, DomainModes, extract_static, looks_js_rendered
+
+needs_selectolax = pytest.mark.skipif(
+    importlib.util.find_spec("selectolax") is None, reason="selectolax is not installed"
+)
+
+PAGES = {
+    "/article": (
+        "text/html; charset=utf-8",
+        """<html><head><base href="/docs/"></head><body>
+        <h1> Static title </h1>
+        <ul><li>One</li><li>Two</li></ul>
+        <a class="next" href="page2">Next</a>
+        <input name="q" value="shoes" checked>
+        </body></html>""".encode(),
+    ),
+    "/app": (
+        "text/html",
+        b'<html><body><h1>Shop</h1><div id="root"></div><script src="app.js"></script></body></html>',
+    ),
+    "/data.json": ("application/json", b'{"a": 1}'),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Serves PAGES, a redirect and a gzipped page; counts connections."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        if self.path == "/moved":
+            self.send_response(301)
+            self.send_header("Location", "/article")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/gzipped":
+            body = gzip.compress(PAGES["/article"][1])
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Encoding", "gzip")
+        elif self.path in PAGES:
+            content_type, body = PAGES[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+        else:
+            body = b"not found"
+            self.send_response(404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def origin():
+    """A local origin server; ``origin.server.connections`` counts TCP connections."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    class Origin(str):
+        pass
+
+    url = Origin(f"http://127.0.0.1:{server.server_address[1]}")
+    url.server = server
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool():
+    pool = HTTPPool()
+    yield pool
+    pool.close()
+
+
+class TestHTTPPool:
+    """Test pooled fetches."""
+
+    def test_reuses_connections(self, origin, pool):
+        """Test sequential fetches share one keep-alive connection."""
+        for _ in range(3):
+            status, headers, html, _ = pool.get(origin + "/article")
+            assert status == 200
+            assert "Static title" in html
+
+        assert origin.server.connections == 1
+
+    def test_follows_redirects(self, origin, pool):
+        """Test redirects are followed and the final URL returned."""
+        status, _, html, final_url = pool.get(origin + "/moved")
+
+        assert status == 200
+        assert final_url == origin + "/article"
+
+    def test_decompresses(self, origin, pool):
+        """Test gzip bodies are decoded."""
+        _, _, html, _ = pool.get(origin + "/gzipped")
+        assert "Static title" in html
+
+    def test_rejects_other_schemes(self, pool):
+        with pytest.raises(ValueError):
+            pool.get("file:///etc/passwd")
+
+
+@needs_selectolax
+class TestExtractStatic:
+    """Test extraction without a browser and the fallback decisions."""
+
+    def test_server_rendered_page(self, origin, pool):
+        """Test text, attributes and supported properties are read from HTML."""
+        extracted = extract_static(
+            origin + "/article",
+            {
+                "title": "h1",
+                "items": "li",
+                "next": "a.next@href",
+                "next_url": {"selector": "a.next", "property": "href"},
+                "query": {"selector": "input[name=q]", "property": "value"},
+                "checked": {"selector": "input", "property": "checked"},
+            },
+            pool=pool,
+            domains=DomainModes()
+        )
+
+        assert extracted == {
+            "title": "Static title",
+            "items": ["One", "Two"],
+            "next": "page2",
+            "next_url": origin + "/docs/page2",
+            "query": "shoes",
+            "checked": True,
+        }
+
+    def test_empty_selector_falls_back_and_is_learned(self, origin, pool):
+        """Test a miss sends the domain to the browser until the TTL passes."""
+        domains = DomainModes()
+
+        assert extract_static(origin + "/article", {"price": ".price"}, pool=pool, domains=domains) is None
+        assert not domains.use_static(origin + "/other")
+
+        with patch("snapwright.static.time.time", return_value=10 ** 12):
+            assert domains.use_static(origin + "/other")
+
+    def test_app_shell_falls_back(self, origin, pool):
+        """Test an empty framework mount point counts as JS-rendered."""
+        domains = DomainModes()
+
+        assert extract_static(origin + "/app", {"title": "h1"}, pool=pool, domains=domains) is None
+        assert not domains.use_static(origin + "/app")
+
+    def test_missing_wait_for_falls_back(self, origin, pool):
+        assert extract_static(
+            origin + "/article", {"title": "h1"}, wait_for=".comments", pool=pool, domains=DomainModes()
+        ) is None
+
+    def test_live_only_property_uses_browser_without_learning(self, origin, pool):
+        """Test specs the parser cannot answer don't mark the domain."""
+        domains = DomainModes()
+
+        assert extract_static(
+            origin + "/article",
+            {"width": {"selector": "h1", "property": "offsetWidth"}},
+            pool=pool,
+            domains=domains
+        ) is None
+        assert domains.use_static(origin + "/article")
+
+    def test_playwright_selector_uses_browser_without_learning(self, origin, pool):
+        """Test text=, >> and the like are left to Playwright."""
+        domains = DomainModes()
+
+        assert extract_static(origin + "/article", {"next": "text=Next"}, pool=pool, domains=domains) is None
+        assert extract_static(
+            origin + "/article", {"title": "h1"}, wait_for="text=Static", pool=pool, domains=domains
+        ) is None
+        assert domains.use_static(origin + "/article")
+
+    @pytest.mark.parametrize("path", ["/data.json", "/missing"])
+    def test_non_html_responses_use_browser(self, origin, pool, path):
+        assert extract_static(origin + path, {"title": "h1"}, pool=pool, domains=DomainModes()) is None
+
+    def test_noscript_shell(self):
+        """Test a <noscript> JavaScript warning on a near-empty page."""
+        assert looks_js_rendered(
+            "<html><body><noscript>Please enable JavaScript.</noscript><h1>Hi</h1></body></html>"
+        )
+        assert not looks_js_rendered(
+            "<html><body><noscript>Please enable JavaScript.</noscript>"
+            f"<article>{'Plenty of text. ' * 30}</article></body></html>"
+        )
+
+
+@needs_selectolax
+class TestBrowseAndExtractStatic:
+    """Test browse_and_extract's use of the static path."""
+
+    @patch('snapwright.core.browser_manager')
+    def test_static_result_skips_browser(self, mock_browser, origin):
+        from snapwright.core import browse_and_extract
+
+        with patch("snapwright.static.domain_modes", DomainModes()):
+            result = browse_and_extract(origin + "/article", {"title": "h1"}, static=True)
+
+        assert result['engine'] == 'static'
+        assert result['extracted'] == {"title": "Static title"}
+        mock_browser.checkout_page.assert_not_called()
+
+    @patch('snapwright.core.browser_manager')
+    def test_falls_back_to_browser(self, mock_browser, origin):
+        from snapwright.core import browse_and_extract
+
+        mock_browser.checkout_page.return_value.evaluate.return_value = {"title": "Rendered"}
+        with patch("snapwright.static.domain_modes", DomainModes()):
+            result = browse_and_extract(origin + "/app", {"title": "h1"}, static=True)
+
+        assert result['engine'] == 'browser'
+        assert result['extracted'] == {"title": "Rendered"}
+
+    @patch('snapwright.core.extract_static')
+    @patch('snapwright.core.browser_manager')
+    def test_off_by_default(self, mock_browser, mock_static):
+        from snapwright.core import browse_and_extract
+
+        assert not browser_config.static_extract
+        mock_browser.checkout_page.return_value.evaluate.return_value = {"title": "Rendered"}
+        browse_and_extract("https://example.com", {"title": "h1"})
+
+        mock_static.assert_not_called()
@@ -0,0 +1,69 @@
+"""Tests for URL canonicalization."""
+
+import pytest
+
+from snapwright.cache import ScreenshotCache
+from snapwright.config import browser_config
+from snapwright.urls import canonicalize_url, dedupe_urls
+
+
+class TestCanonicalizeUrl:
+    """Test canonical URL forms."""
+
+    @pytest.mark.parametrize("url, expected", [
+        ("https://Example.COM", "https://example.com/"),
+        ("HTTPS://example.com:443/Path", "https://example.com/Path"),
+        ("http://example.com:8080/", "http://example.com:8080/"),
+        ("https://example.com/?b=2&a=1&b=1", "https://example.com/?a=1&b=2&b=1"),
+        ("https://example.com/?utm_source=x&id=7&fbclid=y&UTM_Medium=z", "https://example.com/?id=7"),
+        ("https://example.com/page#section", "https://example.com/page"),
+        ("https://example.com/#/dashboard", "https://example.com/#/dashboard"),
+        ("https://user@Example.com/", "https://user@example.com/"),
+        ("https://[::1]:8443/", "https://[::1]:8443/"),
+    ])
+    def test_forms(self, url, expected):
+        assert canonicalize_url(url) == expected
+
+    def test_not_absolute_left_alone(self):
+        """Test strings that are not absolute URLs pass through."""
+        assert canonicalize_url("example.com/page") == "example.com/page"
+        assert canonicalize_url("about:blank") == "about:blank"
+
+    def test_custom_strip_params(self):
+        """Test the parameters to strip can be given explicitly."""
+        assert canonicalize_url("https://example.com/?ref=a&utm_source=b", strip_params=["ref"]) == \
+            "https://example.com/?utm_source=b"
+
+
+class TestDedupe:
+    """Test grouping of equivalent inputs."""
+
+    def test_groups_in_first_seen_order(self):
+        groups = dedupe_urls(["https://b.com/?utm_campaign=1", "https://a.com", "https://B.com"])
+
+        assert groups == {
+            "https://b.com/": ["https://b.com/?utm_campaign=1", "https://B.com"],
+            "https://a.com/": ["https://a.com"],
+        }
+
+    def test_disabled_only_merges_exact_duplicates(self):
+        browser_config.update(canonicalize_urls=False)
+        try:
+            groups = dedupe_urls(["https://a.com", "https://A.com", "https://a.com"])
+        finally:
+            browser_config.update(canonicalize_urls=True)
+
+        assert groups == {"https://a.com": ["https://a.com", "https://a.com"], "https://A.com": ["https://A.com"]}
+
+
+def test_cache_key_uses_canonical_url(tmp_path):
+    """Test equivalent spellings share one cache entry."""
+    original = browser_config.cache_dir
+    browser_config.update(cache_dir=str(tmp_path))
+    cache = ScreenshotCache()
+    try:
+        assert cache.get_cache_key("https://Example.com/?utm_source=x#top") == \
+            cache.get_cache_key("https://example.com/")
+    finally:
+        cache.close()
+        browser_config.update(cache_dir=original)